@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Compact encoding of a companies dataset for faster dashboard loads.
+
+The regular companies.json is pretty-printed and repeats the same Hebrew
+status strings and 23-key process objects for every company. The compact
+form is still JSON (so the browser parses it natively) but column-oriented:
+
+  - every leaf field of the records becomes one column (nested objects such
+    as process / outcomes / community are flattened to key paths),
+  - low-cardinality strings (statuses, step states, industries, ...) are
+    dictionary-encoded and bit-packed as 4-bit codes,
+  - other strings are indices into one shared string table,
+  - booleans are bit-packed (1 bit, or 2 bits when null is allowed),
+  - no whitespace.
+
+Usage:
+    python3 scripts/compact_dataset.py src/shaveh/data/companies.json [--output PATH] [--check]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+FORMAT = "shaveh-compact/1"
+
+# Distinct non-null values that still fit a 4-bit enum code (0 is null)
+MAX_ENUM_LABELS = 15
+
+
+# ── Bit packing ────────────────────────────────────────────────────────────────
+def pack_bits(codes, width):
+    """Pack small non-negative ints `width` bits each, LSB first, into base64."""
+    out = bytearray((len(codes) * width + 7) // 8)
+    pos = 0
+    for code in codes:
+        byte, shift = divmod(pos, 8)
+        value = code << shift
+        out[byte] |= value & 0xFF
+        if shift + width > 8:
+            out[byte + 1] |= value >> 8
+        pos += width
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def unpack_bits(data, width, count):
+    raw = base64.b64decode(data)
+    mask = (1 << width) - 1
+    codes = []
+    pos = 0
+    for _ in range(count):
+        byte, shift = divmod(pos, 8)
+        value = raw[byte]
+        if shift + width > 8:
+            value |= raw[byte + 1] << 8
+        codes.append((value >> shift) & mask)
+        pos += width
+    return codes
+
+
+# ── Records <-> columns ────────────────────────────────────────────────────────
+def _flatten(record, prefix=()):
+    """Yield (path, value) leaves; non-empty dicts are recursed into."""
+    for key, value in record.items():
+        path = prefix + (key,)
+        if isinstance(value, dict) and value:
+            yield from _flatten(value, path)
+        else:
+            yield path, value
+
+
+def _column_kind(values):
+    nullable = False
+    kinds = set()
+    for v in values:
+        if v is None:
+            nullable = True
+        elif isinstance(v, bool):
+            kinds.add("bool")
+        elif isinstance(v, str):
+            kinds.add("str")
+        elif isinstance(v, int):
+            kinds.add("int")
+        else:
+            return "json"
+    if kinds <= {"bool"}:
+        return "tri" if nullable else "bool"
+    if kinds == {"str"}:
+        distinct = {v for v in values if v is not None}
+        return "enum" if len(distinct) <= MAX_ENUM_LABELS else "str"
+    if kinds == {"int"}:
+        return "int"
+    return "json"
+
+
+# Placeholder for a field a record does not have
+_MISSING = object()
+
+
+class CompactEncoder:
+    """Accumulates records one at a time and encodes them on finish().
+
+    Records may differ in layout (the hand-edited datasets carry extra or
+    renamed fields); a column that some records lack gets a 1-bit presence
+    map and stores values only for the records that have it.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.paths = []
+        self.path_index = {}
+        self.values = []
+
+    def add(self, record):
+        seen = set()
+        for path, value in _flatten(record):
+            i = self.path_index.get(path)
+            if i is None:
+                i = self.path_index[path] = len(self.paths)
+                self.paths.append(path)
+                self.values.append([_MISSING] * self.count)
+            self.values[i].append(value)
+            seen.add(i)
+        self.count += 1
+        if len(seen) < len(self.paths):
+            for i, column in enumerate(self.values):
+                if i not in seen:
+                    column.append(_MISSING)
+
+    def finish(self, aggregates=None):
+        for path in self.paths:
+            for n in range(1, len(path)):
+                if path[:n] in self.path_index:
+                    raise ValueError(f"field {'.'.join(path[:n])} is both a value and an object")
+
+        strings = []
+        string_index = {}
+        columns = []
+        for path, values in zip(self.paths, self.values):
+            column = {"path": list(path)}
+            if any(v is _MISSING for v in values):
+                column["present"] = pack_bits([0 if v is _MISSING else 1 for v in values], 1)
+                values = [v for v in values if v is not _MISSING]
+            kind = _column_kind(values)
+            column["kind"] = kind
+            if kind == "bool":
+                column["data"] = pack_bits([1 if v else 0 for v in values], 1)
+            elif kind == "tri":
+                column["data"] = pack_bits([0 if v is None else 2 if v else 1 for v in values], 2)
+            elif kind == "enum":
+                labels = list(dict.fromkeys(v for v in values if v is not None))
+                codes = {label: i + 1 for i, label in enumerate(labels)}
+                column["labels"] = labels
+                column["data"] = pack_bits([0 if v is None else codes[v] for v in values], 4)
+            elif kind == "str":
+                data = []
+                for v in values:
+                    if v is None:
+                        data.append(-1)
+                        continue
+                    i = string_index.get(v)
+                    if i is None:
+                        i = string_index[v] = len(strings)
+                        strings.append(v)
+                    data.append(i)
+                column["data"] = data
+            else:
+                column["data"] = values
+            columns.append(column)
+
+        dataset = {"format": FORMAT, "count": self.count, "strings": strings, "columns": columns}
+        if aggregates is not None:
+            dataset["aggregates"] = aggregates
+        return dataset
+
+
+def encode(data):
+    """{"companies": [...], "aggregates": {...}} -> compact dataset dict."""
+    encoder = CompactEncoder()
+    for company in data["companies"]:
+        encoder.add(company)
+    return encoder.finish(data.get("aggregates"))
+
+
+def decode(dataset):
+    """Inverse of encode()."""
+    if dataset.get("format") != FORMAT:
+        raise ValueError(f"unsupported compact format {dataset.get('format')!r}")
+    count = dataset["count"]
+    strings = dataset["strings"]
+    records = [{} for _ in range(count)]
+
+    for column in dataset["columns"]:
+        if "present" in column:
+            present = unpack_bits(column["present"], 1, count)
+            targets = [r for r, flag in zip(records, present) if flag]
+        else:
+            targets = records
+        n = len(targets)
+
+        kind = column["kind"]
+        data = column["data"]
+        if kind == "bool":
+            values = [bool(c) for c in unpack_bits(data, 1, n)]
+        elif kind == "tri":
+            values = [None if c == 0 else c == 2 for c in unpack_bits(data, 2, n)]
+        elif kind == "enum":
+            labels = [None] + column["labels"]
+            values = [labels[c] for c in unpack_bits(data, 4, n)]
+        elif kind == "str":
+            values = [None if i < 0 else strings[i] for i in data]
+        else:
+            values = data
+
+        *parents, leaf = column["path"]
+        for record, value in zip(targets, values):
+            target = record
+            for key in parents:
+                target = target.setdefault(key, {})
+            target[leaf] = value
+
+    result = {"companies": records}
+    if "aggregates" in dataset:
+        result["aggregates"] = dataset["aggregates"]
+    return result
+
+
+def dumps(dataset):
+    return json.dumps(dataset, ensure_ascii=False, separators=(",", ":"))
+
+
+def write_compact(path, dataset):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(dumps(dataset))
+    os.replace(tmp_path, path)
+
+
+def read_compact(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return decode(json.load(f))
+
+
+def compact_path(json_path):
+    """companies.json -> companies.compact.json"""
+    base, ext = os.path.splitext(json_path)
+    return f"{base}.compact{ext}"
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Encode a companies JSON file in the compact format.")
+    parser.add_argument("source", help="companies JSON file")
+    parser.add_argument("--output", help="compact output path (default: <source>.compact.json)")
+    parser.add_argument("--check", action="store_true",
+                        help="decode the result and verify it round-trips to the source")
+    args = parser.parse_args(argv)
+
+    with open(args.source, "r", encoding="utf-8") as f:
+        source_text = f.read()
+    data = json.loads(source_text)
+    if isinstance(data, list):
+        data = {"companies": data}
+
+    output = args.output or compact_path(args.source)
+    write_compact(output, encode(data))
+    with open(output, "r", encoding="utf-8") as f:
+        compact_text = f.read()
+
+    source_bytes = len(source_text.encode("utf-8"))
+    compact_bytes = len(compact_text.encode("utf-8"))
+    print(f"{args.source}: {source_bytes:,} bytes -> {output}: {compact_bytes:,} bytes "
+          f"({compact_bytes / source_bytes:.0%})")
+
+    if args.check:
+        start = time.perf_counter()
+        json.loads(source_text)
+        json_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        decoded = decode(json.loads(compact_text))
+        compact_ms = (time.perf_counter() - start) * 1000
+        if decoded != data:
+            print("Round-trip FAILED: decoded dataset differs from the source")
+            sys.exit(1)
+        print(f"Round-trip OK (parse: json {json_ms:.2f} ms, compact {compact_ms:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@
  * Local server for the Shaveh dashboard.
  *
  * Endpoints:
- *   POST /save-companies  — saves the full companies array back to companies.json
+ *   POST /save-companies  — validates the companies array (validate_companies.py),
+ *                           saves it back to companies.json, re-encodes the
+ *                           companies.compact.json the dashboard loads
+ *                           (compact_dataset.py) and appends the changes to
+ *                           its event log (company_events.py)
  *   POST /send-email      — generates a PDF report and sends it via Resend API
  *   GET  /health          — health check
  *
@@ -15,6 +19,7 @@
 import { createServer } from 'http'
 import { writeFile, readFile } from 'fs/promises'
 import { existsSync, readFileSync } from 'fs'
+import { execFile } from 'child_process'
 import { join, dirname } from 'path'
 import { fileURLToPath } from 'url'
 import puppeteer from 'puppeteer-core'
@@ -23,6 +28,9 @@ const __dirname = dirname(fileURLToPath(import.meta.url))
 const PROJECT_ROOT = join(__dirname, '..')
 const COMPANIES_FILE = join(PROJECT_ROOT, 'src', 'shaveh', 'data', 'companies.json')
 const PUBLIC_DIR = join(PROJECT_ROOT, 'public')
+const VALIDATOR = join(__dirname, 'validate_companies.py')
+const EVENT_LOG = join(__dirname, 'company_events.py')
+const COMPACT_ENCODER = join(__dirname, 'compact_dataset.py')
 
 // ── Pre-load logos as base64 data URIs ────────────────────────────────────────
 let LOGO_Z2000     = ''  // zionism2000-logo.jpg      → data:image/jpeg;base64,...
@@ -65,6 +73,43 @@ if (existsSync(ENV_FILE)) {
 
 const PORT = 3457
 
+// ── Validation ────────────────────────────────────────────────────────────────
+// Runs validate_companies.py on the JSON about to be saved. Resolves to
+// { errors, warnings } (lists of messages), or null when python3 is not
+// available, in which case the save goes through unchecked.
+function validateCompanies(json) {
+  return new Promise(resolve => {
+    const child = execFile('python3', [VALIDATOR, '--json', '-'], { cwd: __dirname }, (err, stdout) => {
+      if (err && typeof err.code !== 'number') { resolve(null); return }
+      try { resolve(JSON.parse(stdout)) } catch { resolve(null) }
+    })
+    child.stdin.on('error', () => {})
+    child.stdin.end(json)
+  })
+}
+
+// Appends the changes between the logged state and the file just saved to
+// the event log. Resolves to the recorder's summary line, or null when it
+// could not run; a save never fails because of it.
+function recordEvents() {
+  return new Promise(resolve => {
+    execFile('python3', [EVENT_LOG, 'record', COMPANIES_FILE], { cwd: __dirname }, (err, stdout) => {
+      resolve(err ? null : stdout.trim())
+    })
+  })
+}
+
+// Re-encodes the file just saved into companies.compact.json, which is what
+// the dashboard imports. Resolves to the encoder's summary line, or null when
+// it could not run; the dashboard then keeps showing the previous encoding.
+function encodeCompact() {
+  return new Promise(resolve => {
+    execFile('python3', [COMPACT_ENCODER, COMPANIES_FILE], { cwd: __dirname }, (err, stdout) => {
+      resolve(err ? null : stdout.trim())
+    })
+  })
+}
+
 // ── HTTP helpers ──────────────────────────────────────────────────────────────
 function cors(res) {
   res.setHeader('Access-Control-Allow-Origin', '*')
@@ -859,9 +904,21 @@ const server = createServer(async (req, res) => {
         jsonResponse(res, 400, { error: 'companies must be an array' }); return
       }
       const json = JSON.stringify({ companies }, null, 2)
+      const report = await validateCompanies(json)
+      if (report && report.errors.length) {
+        console.warn(`  Rejected save: ${report.errors.length} validation errors`)
+        jsonResponse(res, 422, { error: 'validation failed', errors: report.errors, warnings: report.warnings }); return
+      }
       await writeFile(COMPANIES_FILE, json, 'utf8')
-      console.log(`  Saved ${companies.length} companies to companies.json`)
-      jsonResponse(res, 200, { ok: true, count: companies.length }); return
+      const warnings = report ? report.warnings : []
+      console.log(`  Saved ${companies.length} companies to companies.json (${report ? `${warnings.length} warnings` : 'not validated'})`)
+      const encoded = await encodeCompact()
+      if (encoded) console.log(`  ${encoded}`)
+      else console.warn('  Warning: could not re-encode companies.compact.json; run scripts/compact_dataset.py')
+      const recorded = await recordEvents()
+      if (recorded) console.log(`  ${recorded}`)
+      else console.warn('  Warning: could not record the changes in the event log')
+      jsonResponse(res, 200, { ok: true, count: companies.length, warnings }); return
     }
 
     // ── POST /download-pdf ───────────────────────────────────────────────────
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Append-only history of company state changes, with snapshots.
+
+companies.json only holds each company's current state, and every save
+overwrites it. Recording a dataset here diffs it against the state the log
+already describes and appends one JSON line per changed field:
+
+    {"t": "2026-10-17T09:30:00Z", "id": "strauss", "field": "paid", "from": false, "to": true}
+
+Tracked fields are the funnel flags, status, recruitmentStatus and every
+process step ("process.learning.industryReview"). A company that disappears
+has its fields set to null.
+
+Every SNAPSHOT_EVERY events the full state is written to a second JSON
+lines file together with the event log's byte offset at that point, so the
+state at any time is the last snapshot before it plus the events after its
+offset: a replay reads O(events since the snapshot), not the whole log.
+Snapshots also carry the time each company entered each funnel stage, so
+time in stage is known without reading the events before the snapshot.
+generate_v2_json adds the resulting stageTimes and velocity sections, as
+of the newest event, to the aggregates of any dataset that has a log.
+
+The first recording of a dataset is written as a snapshot only: the log
+cannot know when the existing flags were set, so they get no entry times.
+
+Usage:
+    python3 scripts/company_events.py record [DATASET]     # the save server runs this
+    python3 scripts/company_events.py state [--at TIME] [--id ID]
+    python3 scripts/company_events.py stats [--now TIME]
+    python3 scripts/company_events.py snapshot
+"""
+
+import argparse
+import json
+import os
+import statistics
+from datetime import datetime, timedelta, timezone
+
+from generate_v2_json import FUNNEL_FIELDS, OUTPUT_PATH, PHASE_DEFS, load_source_companies
+
+# Events between two snapshots
+SNAPSHOT_EVERY = 500
+
+# Weeks of stage transitions counted by the velocity aggregate
+VELOCITY_WEEKS = 8
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+STEP_FIELDS = tuple(f"process.{phase}.{key}" for phase, _, keys in PHASE_DEFS for key in keys)
+FLAT_FIELDS = tuple(FUNNEL_FIELDS) + ("status", "recruitmentStatus")
+TRACKED_FIELDS = FLAT_FIELDS + STEP_FIELDS
+
+
+def events_path(json_path):
+    """companies.json -> companies.events.jsonl"""
+    return f"{os.path.splitext(json_path)[0]}.events.jsonl"
+
+
+def snapshots_path(json_path):
+    """companies.json -> companies.snapshots.jsonl"""
+    return f"{os.path.splitext(json_path)[0]}.snapshots.jsonl"
+
+
+def format_time(dt):
+    return dt.astimezone(timezone.utc).strftime(TIME_FORMAT)
+
+
+def parse_time(text):
+    return datetime.strptime(text, TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def now_time():
+    return format_time(datetime.now(timezone.utc))
+
+
+def flatten(company):
+    """{field: value} of the tracked fields of one company, nulls left out."""
+    process = company.get("process") or {}
+    state = {}
+    for field in FLAT_FIELDS:
+        if company.get(field) is not None:
+            state[field] = company[field]
+    for phase, _, keys in PHASE_DEFS:
+        steps = process.get(phase) or {}
+        for key in keys:
+            if steps.get(key) is not None:
+                state[f"process.{phase}.{key}"] = steps[key]
+    return state
+
+
+# ── Replay ─────────────────────────────────────────────────────────────────────
+class History:
+    """Company states and funnel stage entry times, advanced one event at a time."""
+
+    def __init__(self, t=None, state=None, entered=None):
+        self.t = t
+        self.state = state if state is not None else {}        # id -> {field: value}
+        self.entered = entered if entered is not None else {}  # id -> {funnel field: time}
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls(snapshot["t"], snapshot["state"], snapshot["entered"])
+
+    def apply(self, event):
+        cid, field, value = event["id"], event["field"], event["to"]
+        self.t = event["t"]
+        fields = self.state.setdefault(cid, {})
+        if value is None:
+            fields.pop(field, None)
+            if not fields:
+                del self.state[cid]
+        else:
+            fields[field] = value
+        if field in FUNNEL_FIELDS:
+            entered = self.entered.setdefault(cid, {})
+            if value is True:
+                entered[field] = event["t"]
+            else:
+                entered.pop(field, None)
+            if not entered:
+                del self.entered[cid]
+
+    def diff(self, companies, t):
+        """Events taking this state to `companies` at time `t`."""
+        new_state = {}
+        for company in companies:
+            new_state[company["id"]] = flatten(company)
+        events = []
+        for cid in list(self.state) + [cid for cid in new_state if cid not in self.state]:
+            old, new = self.state.get(cid, {}), new_state.get(cid, {})
+            for field in TRACKED_FIELDS:
+                before, after = old.get(field), new.get(field)
+                if before != after:
+                    events.append({"t": t, "id": cid, "field": field, "from": before, "to": after})
+        return events
+
+
+class EventLog:
+    """The event log and snapshot files of one dataset."""
+
+    def __init__(self, dataset_path=OUTPUT_PATH, snapshot_every=SNAPSHOT_EVERY):
+        self.path = events_path(dataset_path)
+        self.snapshots = snapshots_path(dataset_path)
+        self.snapshot_every = snapshot_every
+
+    def exists(self):
+        return os.path.exists(self.snapshots)
+
+    def _snapshot_before(self, t=None, or_first=False):
+        """The last snapshot taken at or before `t` (the last one when None).
+
+        With `or_first`, the first snapshot when all of them are later than `t`.
+        """
+        if not self.exists():
+            return None
+        with open(self.snapshots, "rb") as f:
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        for line in reversed(lines):
+            snapshot = json.loads(line)
+            if t is None or snapshot["t"] <= t:
+                return snapshot
+        return json.loads(lines[0]) if or_first and lines else None
+
+    def _events_from(self, offset):
+        """(event, offset after it) from byte `offset` of the event log on."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                if line.endswith(b"\n"):     # a torn last line is not an event yet
+                    yield json.loads(line), offset
+
+    def replay(self, t=None, on_event=None, since=None):
+        """(History at `t`, log offset, events replayed); None if nothing is recorded.
+
+        `t` None replays to the end of the log. `on_event` sees every event
+        replayed; `since` starts from a snapshot no later than that time (or
+        the first one) so that it sees every event from then on.
+        """
+        if since is not None:
+            snapshot = self._snapshot_before(since, or_first=True)
+        else:
+            snapshot = self._snapshot_before(t)
+        if snapshot is None:
+            return None
+        history = History.from_snapshot(snapshot)
+        offset, count = snapshot["offset"], 0
+        for event, end in self._events_from(snapshot["offset"]):
+            if t is not None and event["t"] > t:
+                break
+            history.apply(event)
+            if on_event is not None:
+                on_event(event)
+            offset, count = end, count + 1
+        return history, offset, count
+
+    def latest_time(self):
+        """Time of the newest event (of the last snapshot if none follow it), or None."""
+        snapshot = self._snapshot_before()
+        if snapshot is None:
+            return None
+        t = snapshot["t"]
+        for event, _ in self._events_from(snapshot["offset"]):
+            t = event["t"]
+        return t
+
+    def state_at(self, t=None):
+        replayed = self.replay(t)
+        return {} if replayed is None else replayed[0].state
+
+    def _write_snapshot(self, history, offset):
+        snapshot = {"t": history.t, "offset": offset, "state": history.state, "entered": history.entered}
+        with open(self.snapshots, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+
+    def snapshot(self):
+        """Write a snapshot of the current state."""
+        replayed = self.replay()
+        if replayed is not None:
+            history, offset, _ = replayed
+            self._write_snapshot(history, offset)
+
+    def record(self, companies, t=None):
+        """Append the changes from the logged state to `companies`; returns the event count."""
+        t = t or now_time()
+        replayed = self.replay()
+        if replayed is None:
+            offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            history = History(t)
+            history.state = {c["id"]: flatten(c) for c in companies}
+            self._write_snapshot(history, offset)
+            return 0
+        history, offset, pending = replayed
+        if history.t is not None and t < history.t:
+            raise ValueError(f"cannot record at {t}: the log already reaches {history.t}")
+
+        events = history.diff(companies, t)
+        if not events:
+            return 0
+        with open(self.path, "ab") as f:
+            f.truncate(offset)   # drop a torn line left by an interrupted write
+            for event in events:
+                line = (json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                f.write(line)
+                offset += len(line)
+                history.apply(event)
+        if pending + len(events) >= self.snapshot_every:
+            self._write_snapshot(history, offset)
+        return len(events)
+
+    # ── Aggregates ─────────────────────────────────────────────────────────────
+    def aggregates(self, now=None):
+        """{"stageTimes", "velocity"} sections, or {} if nothing is recorded.
+
+        stageTimes: days spent in each funnel stage before reaching the next
+        one (completed) and days spent so far by companies still in it (open),
+        for companies whose entry into the stage was recorded. velocity:
+        transitions into each funnel stage per week, over the last
+        VELOCITY_WEEKS weeks.
+
+        Both are taken as of `now`, by default the newest recorded event, so
+        that the same log always gives the same sections.
+        """
+        now = now or self.latest_time()
+        if now is None:
+            return {}
+        now_dt = parse_time(now)
+        week0 = (now_dt - timedelta(days=now_dt.weekday())).replace(hour=0, minute=0, second=0)
+        week0 -= timedelta(weeks=VELOCITY_WEEKS - 1)
+
+        # One replay from the snapshot before the velocity window covers both sections
+        counts = {field: [0] * VELOCITY_WEEKS for field in FUNNEL_FIELDS}
+
+        def count(event):
+            if event["to"] is True and event["field"] in counts:
+                week = (parse_time(event["t"]) - week0).days // 7
+                if 0 <= week < VELOCITY_WEEKS:
+                    counts[event["field"]][week] += 1
+
+        replayed = self.replay(now, on_event=count, since=format_time(week0))
+        if replayed is None:
+            return {}
+        history = replayed[0]
+
+        stages = FUNNEL_FIELDS[:-1]
+        completed = {field: [] for field in stages}
+        open_ = {field: [] for field in stages}
+        for entered in history.entered.values():
+            for field, following in zip(stages, FUNNEL_FIELDS[1:]):
+                if field not in entered:
+                    continue
+                start = parse_time(entered[field])
+                if following in entered:
+                    completed[field].append((parse_time(entered[following]) - start).total_seconds() / 86400)
+                else:
+                    open_[field].append((now_dt - start).total_seconds() / 86400)
+
+        def summary(days):
+            return round(statistics.median(days), 1) if days else None
+
+        return {
+            "stageTimes": {
+                "asOf": now,
+                "stages": list(stages),
+                "completed": [len(completed[f]) for f in stages],
+                "medianDays": [summary(completed[f]) for f in stages],
+                "meanDays": [round(statistics.fmean(completed[f]), 1) if completed[f] else None
+                             for f in stages],
+                "open": [len(open_[f]) for f in stages],
+                "openMedianDays": [summary(open_[f]) for f in stages],
+            },
+            "velocity": {
+                "asOf": now,
+                "weeks": [format_time(week0 + timedelta(weeks=i))[:10] for i in range(VELOCITY_WEEKS)],
+                "counts": counts,
+                "perWeek": {f: round(sum(c) / VELOCITY_WEEKS, 2) for f, c in counts.items()},
+            },
+        }
+
+
+def history_aggregates(dataset_path, now=None):
+    """EventLog(dataset_path).aggregates(now), or {} when the dataset has no log."""
+    log = EventLog(dataset_path)
+    return log.aggregates(now) if log.exists() else {}
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and replay company state changes.")
+    parser.add_argument("command", choices=("record", "state", "stats", "snapshot"))
+    parser.add_argument("dataset", nargs="?", default=OUTPUT_PATH, help="companies JSON (default: %(default)s)")
+    parser.add_argument("--at", help=f"state at this time ({TIME_FORMAT}, default: now)")
+    parser.add_argument("--id", help="only this company (state)")
+    parser.add_argument("--now", help="reference time for stats (default: now)")
+    args = parser.parse_args(argv)
+
+    log = EventLog(args.dataset)
+    if args.command == "record":
+        count = log.record(load_source_companies(args.dataset))
+        print(f"Recorded {count} changes -> {log.path}")
+    elif args.command == "snapshot":
+        log.snapshot()
+        print(f"Snapshot -> {log.snapshots}")
+    elif args.command == "state":
+        state = log.state_at(args.at)
+        if args.id is not None:
+            state = state.get(args.id, {})
+        print(json.dumps(state, ensure_ascii=False, indent=2))
+    else:
+        print(json.dumps(log.aggregates(args.now or now_time()), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
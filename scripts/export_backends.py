@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Output backends for export_to_sheets.py.
+
+Every backend takes the same list of sheets_sync.Tab objects (title + rows,
+header first) and writes them somewhere:
+
+  sheets   Google Sheets, diff-synced through sheets_sync (network)
+  xlsx     one workbook, streamed with openpyxl's write-only mode
+  csv      one UTF-8 CSV per tab (with BOM, so Excel shows Hebrew correctly)
+  parquet  one Parquet file per tab (pyarrow)
+
+openpyxl and pyarrow are imported only by the backend that needs them.
+"""
+
+import csv
+import os
+from pathlib import Path
+
+from sheets_sync import HEADER_FORMAT, sync_tabs
+
+
+class ExportBackend:
+    """Writes a list of Tabs. `write` returns a short description of the result."""
+
+    name = None
+
+    def write(self, tabs):
+        raise NotImplementedError
+
+
+def safe_filename(title):
+    """Tab title as a file name (Hebrew kept; path separators and quotes dropped)."""
+    return "".join("_" if ch in '/\\:*?"<>|' else ch for ch in title).strip()
+
+
+class SheetsBackend(ExportBackend):
+    """Diff-sync into a spreadsheet object (gspread.Spreadsheet or FakeSpreadsheet)."""
+
+    name = "sheets"
+
+    def __init__(self, open_spreadsheet):
+        self.open_spreadsheet = open_spreadsheet
+
+    def write(self, tabs):
+        sh = self.open_spreadsheet()
+        result = sync_tabs(sh, tabs)
+        for tab in tabs:
+            print(f"  ✓ {tab.title} — {len(tab.rows)-1} rows, {result.changed_cells[tab.title]} cells changed")
+        if hasattr(sh, "save"):
+            sh.save()
+        if result.requests:
+            return f"{len(result.requests)} changes in one batch update → {sh.url}"
+        return f"already up to date → {sh.url}"
+
+
+class XlsxBackend(ExportBackend):
+    """One workbook, one worksheet per tab, RTL with a bold frozen header row."""
+
+    name = "xlsx"
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def write(self, tabs):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill
+
+        color = HEADER_FORMAT["backgroundColor"]
+        fill_rgb = "".join(f"{round(color[c] * 255):02X}" for c in ("red", "green", "blue"))
+        header_font = Font(bold=True)
+        header_fill = PatternFill("solid", fgColor=fill_rgb)
+
+        wb = Workbook(write_only=True)
+        for tab in tabs:
+            ws = wb.create_sheet(title=tab.title[:31])     # Excel's title limit
+            ws.sheet_view.rightToLeft = True
+            ws.freeze_panes = "A2"
+            header = []
+            for value in tab.rows[0]:
+                cell = WriteOnlyCell(ws, value=value)
+                cell.font = header_font
+                cell.fill = header_fill
+                header.append(cell)
+            ws.append(header)
+            for row in tab.rows[1:]:
+                ws.append(row)
+            print(f"  ✓ {tab.title} — {len(tab.rows)-1} rows")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        wb.save(tmp_path)
+        os.replace(tmp_path, self.path)
+        return str(self.path)
+
+
+class CsvBackend(ExportBackend):
+    """<out>/<tab title>.csv for every tab."""
+
+    name = "csv"
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def write(self, tabs):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for tab in tabs:
+            path = self.directory / f"{safe_filename(tab.title)}.csv"
+            with open(path, "w", encoding="utf-8-sig", newline="") as f:
+                csv.writer(f).writerows(tab.rows)
+            print(f"  ✓ {tab.title} — {len(tab.rows)-1} rows → {path.name}")
+        return str(self.directory)
+
+
+def parquet_columns(tab):
+    """Header -> column values; columns mixing numbers and text become text."""
+    header, body = tab.rows[0], tab.rows[1:]
+    columns = {}
+    for i, name in enumerate(header):
+        values = [row[i] if i < len(row) else None for row in body]
+        kinds = {type(v) for v in values if v is not None and v != ""}
+        if str in kinds and len(kinds) > 1:
+            values = [None if v is None else str(v) for v in values]
+        elif str not in kinds:
+            values = [None if v == "" else v for v in values]
+        if kinds == {int, float}:
+            values = [None if v is None else float(v) for v in values]
+        columns[str(name)] = values
+    return columns
+
+
+class ParquetBackend(ExportBackend):
+    """<out>/<tab title>.parquet for every tab, header row as column names."""
+
+    name = "parquet"
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def write(self, tabs):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for tab in tabs:
+            path = self.directory / f"{safe_filename(tab.title)}.parquet"
+            pq.write_table(pa.table(parquet_columns(tab)), path, compression="zstd")
+            print(f"  ✓ {tab.title} — {len(tab.rows)-1} rows → {path.name}")
+        return str(self.directory)
+
+
+LOCAL_BACKENDS = {
+    "xlsx": XlsxBackend,
+    "csv": CsvBackend,
+    "parquet": ParquetBackend,
+}
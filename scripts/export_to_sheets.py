@@ -2,28 +2,42 @@
 """
 Export all normalized Zionism 2000 dashboard data to Google Sheets.
 
+The sheet is synced, not rewritten: its current state is read once and only
+the cells that differ are written, in a single batch update (see
+sheets_sync.py). The same tabs can be written locally instead, with no
+network access (see export_backends.py).
+
 Usage:
-    python3 scripts/export_to_sheets.py
+    python3 scripts/export_to_sheets.py [--fake-sheet STATE_JSON]
+    python3 scripts/export_to_sheets.py --backend xlsx|csv|parquet [--out PATH]
 
 Requires:
     - credentials.json (Google service account key) in the dashboard/ folder
     - pip install gspread pandas openpyxl
+    (--fake-sheet syncs into a local JSON file instead and needs neither;
+     the xlsx backend needs openpyxl, parquet needs pyarrow)
 """
 
-import json
+import argparse
 import os
 import sys
-import gspread
-from gspread.utils import ValueInputOption
 from pathlib import Path
 
+from export_backends import LOCAL_BACKENDS, SheetsBackend
+from plants_metrics import (
+    PLANTS_JSON, STAGE_ACTIVE, STAGE_PILOT, compute_metrics, format_month, load_metrics, program_totals,
+)
+from plants_timeline import PERIODS, load_timeline
+from sheets_sync import FakeSpreadsheet, Tab
+from xlsx_ingest import build_factory_table
+
 # ──────────────────────────────────────────────
 # Paths
 # ──────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent
 RAW_DIR = BASE_DIR.parent / "Raw Material"
 CREDS_PATH = RAW_DIR / "zionismdashboard-3984a62a7be3.json"
-PLANTS_JSON = BASE_DIR / "src" / "data" / "plants.json"
+EXPORT_DIR = BASE_DIR / "exports"
 
 XLSX_BITUACH = RAW_DIR / "דווח מפורט לביטוח לאומי על פירוט סדנאות לפי מפעלים ועלות מרץ- נובמבר 2025 (version 1).xlsb.xlsx"
 XLSX_JOINT = RAW_DIR / "דוח לשרי להגשה למכרז לגוינט.xlsx"
@@ -36,7 +50,8 @@ SHEET_TITLE = "ציונות 2000 — דאטה מנורמל"
 EXISTING_SHEET_URL = "https://docs.google.com/spreadsheets/d/1-5SCucco-T0ECvW7GDSrdnKm0LzBVXJaBpwajmfxZFU/edit"
 
 # ──────────────────────────────────────────────
-# Additional data from XLSX files (extracted)
+# Additional data from XLSX files (hand-copied; used where xlsx_ingest.py
+# cannot read the reports themselves)
 # ──────────────────────────────────────────────
 
 # Employee counts and names from the Bituach Leumi report (צפון sheet)
@@ -44,7 +59,6 @@ FACTORY_EXTRA = {
     "אלכם": {"employees": 500, "ceo_name": "יגאל כהן (גולי)", "hr_name": "תמר ויצמן"},
     "גלקון": {"employees": 114, "ceo_name": "ערן גרבינר", "hr_name": "יערה גרינשפאן"},
     "נעלי נאות": {"employees": 300, "ceo_name": "משה מרי", "hr_name": "ענת אללי"},
-    "שמיר  אופטיקה": {"employees": 200, "ceo_name": "יגן משה", "hr_name": "ימית יוליס"},
     "שמיר אופטיקה": {"employees": 200, "ceo_name": "יגן משה", "hr_name": "ימית יוליס"},
     "בנטל": {"employees": 110, "ceo_name": "", "hr_name": "לירון"},
     "קפרו": {"employees": 65, "ceo_name": "אריאל ברין דולינקו", "hr_name": "מילי ווסרשטרום"},
@@ -158,20 +172,29 @@ def get_client():
         print(f"ERROR: credentials.json not found at {CREDS_PATH}")
         print("Please set up Google Cloud service account and download the key file.")
         sys.exit(1)
+    import gspread  # only needed when talking to Google
     return gspread.service_account(filename=str(CREDS_PATH))
 
 
 def load_plants():
-    """Load plants.json data."""
-    with open(PLANTS_JSON, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Load plants.json data and its (cached) metrics."""
+    return load_metrics(PLANTS_JSON)
 
 
-def create_plants_tab(sh, data):
-    """Tab 1: מפעלים — all 19 plants with merged XLSX data."""
-    ws = sh.sheet1
-    ws.update_title("מפעלים")
+def load_factory_table(data):
+    """Per-plant employee / CEO / HR data: the XLSX reports over the hand-copied tables."""
+    table, report = build_factory_table(data["plants"], [XLSX_BITUACH, XLSX_JOINT], FACTORY_EXTRA)
+    for path in report["skipped"]:
+        print(f"  (XLSX not read, using hand-copied data: {Path(path).name})")
+    for line in report["unmatched"]:
+        print(f"  ! no plant matches {line}")
+    return table
 
+
+def create_plants_tab(data, factory_table=None):
+    """Tab 1: מפעלים — all 19 plants with merged XLSX data."""
+    if factory_table is None:
+        factory_table, _ = build_factory_table(data["plants"], [], FACTORY_EXTRA)
     headers = [
         "שם מפעל", "קיבוץ", "ענף", "אזור", "שלב", "סוג פעילות",
         "תקופת פעילות", "חודש התחלה", "שנת התחלה", "חודש סיום", "שנת סיום",
@@ -187,7 +210,7 @@ def create_plants_tab(sh, data):
     rows = [headers]
     for p in data["plants"]:
         name = p["name"]
-        extra = FACTORY_EXTRA.get(name, {"employees": 0, "ceo_name": "", "hr_name": ""})
+        extra = factory_table[p["id"]]
         emp = extra["employees"]
         size_group = employee_group(emp)
 
@@ -220,95 +243,69 @@ def create_plants_tab(sh, data):
             p.get("description", ""),
         ])
 
-    ws.update("A1", rows, value_input_option=ValueInputOption.user_entered)
+    return Tab("מפעלים", rows)
 
-    # Format: bold headers, freeze row
-    ws.format("A1:AA1", {
-        "textFormat": {"bold": True},
-        "backgroundColor": {"red": 0.85, "green": 0.92, "blue": 1.0},
-    })
-    ws.freeze(rows=1)
-    print(f"  ✓ מפעלים — {len(rows)-1} rows")
 
-
-def create_timeline_tab(sh, data):
-    """Tab 2: ציר זמן — monthly session data."""
-    ws = sh.add_worksheet(title="ציר זמן", rows=30, cols=6)
-
-    headers = ["חודש", "הנהלה", "מנהלים ביניים", "עובדים", "סה\"כ"]
+def create_timeline_tab(data, period="month", derive=False):
+    """Tab 2: ציר זמן — session data by month (or quarter / year)."""
+    headers = ["חודש" if period == "month" else "תקופה", "הנהלה", "מנהלים ביניים", "עובדים", "סה\"כ"]
     rows = [headers]
 
-    # Sort timeline months chronologically
-    timeline = data["timeline"]
-    sorted_months = sorted(timeline.keys())
-
-    for month in sorted_months:
-        d = timeline[month]
+    timeline = load_timeline(data, derive=derive)
+    for key, d in timeline.rollup(period).items():
         total = round(d["mgmt"] + d["midMgmt"] + d["workers"], 2)
-        rows.append([month, d["mgmt"], d["midMgmt"], d["workers"], total])
+        rows.append([key, d["mgmt"], d["midMgmt"], d["workers"], total])
 
-    ws.update("A1", rows, value_input_option=ValueInputOption.user_entered)
-    ws.format("A1:E1", {
-        "textFormat": {"bold": True},
-        "backgroundColor": {"red": 0.85, "green": 0.92, "blue": 1.0},
-    })
-    ws.freeze(rows=1)
-    print(f"  ✓ ציר זמן — {len(rows)-1} rows")
+    return Tab("ציר זמן", rows)
 
 
-def create_summary_tab(sh, data):
+def create_summary_tab(data, metrics=None):
     """Tab 3: סיכום — key metrics."""
-    ws = sh.add_worksheet(title="סיכום כללי", rows=20, cols=3)
-
     plants = data["plants"]
-    total_participants = sum(p["totalParticipants"] for p in plants)
-    total_sessions = sum(p["totalSessions"] for p in plants)
-    total_ceos = sum(p["ceoCount"] for p in plants)
-    total_hr = sum(p["hrManagerCount"] for p in plants)
-    total_mgmt = sum(p["mgmtParticipants"] for p in plants)
-    total_mid = sum(p["midMgmtParticipants"] for p in plants)
-    total_workers = sum(p["workerParticipants"] for p in plants)
-    pilots = [p for p in plants if p["stage"] == "פיילוט"]
-    active = [p for p in plants if p["stage"] == "תכנית פעילה"]
-
-    # Count layers per plant
-    three_layers = sum(1 for p in plants if p["mgmtParticipants"] > 0 and p["midMgmtParticipants"] > 0 and p["workerParticipants"] > 0)
+    if metrics is None:
+        metrics = compute_metrics(plants)
+    totals = metrics["totals"]
+    stages = metrics["groups"]["stage"]
+    regions = list(metrics["groups"]["geography"])
+    sectors = list(metrics["groups"]["sector"])
+    program = program_totals(PHASES)
+    period = metrics["period"]
+
+    n_plants = totals["plants"]
+    total_participants = totals["participants"]
+    total_sessions = totals["sessions"]
+
+    def share(count):
+        return round(count / total_participants * 100)
 
     rows = [
         ["מדד", "ערך", "הערות"],
-        ["סה\"כ מפעלים", len(plants), ""],
-        ["מפעלי פיילוט", len(pilots), ""],
-        ["מפעלי תכנית פעילה", len(active), ""],
+        ["סה\"כ מפעלים", n_plants, ""],
+        ["מפעלי פיילוט", stages.get(STAGE_PILOT, {}).get("plants", 0), ""],
+        ["מפעלי תכנית פעילה", stages.get(STAGE_ACTIVE, {}).get("plants", 0), ""],
         ["סה\"כ משתתפים", total_participants, ""],
         ["סה\"כ סדנאות", total_sessions, ""],
-        ["מנכ\"לים שהשתתפו (במפעלים)", total_ceos, "מתוך הדאטה — 1 לכל מפעל"],
-        ["מנכ\"לים שנחשפו (כלל התכנית)", 68, "כולל מפגשי חשיפה ושיווק"],
-        ["מנהלי מש\"א (במפעלים)", total_hr, ""],
-        ["מנהלי מש\"א (כלל התכנית)", 88, "כולל קורסי הכשרה"],
-        ["משתתפי הנהלה", total_mgmt, f"{round(total_mgmt/total_participants*100)}% מכלל המשתתפים"],
-        ["משתתפי מנהלים ביניים", total_mid, f"{round(total_mid/total_participants*100)}% מכלל המשתתפים"],
-        ["משתתפי עובדים", total_workers, f"{round(total_workers/total_participants*100)}% מכלל המשתתפים"],
-        ["ממוצע משתתפים למפעל", round(total_participants / len(plants), 1), ""],
-        ["ממוצע סדנאות למפעל", round(total_sessions / len(plants), 1), ""],
-        ["מפעלים עם 3 שכבות", three_layers, f"{round(three_layers/len(plants)*100)}%"],
-        ["אזורים גיאוגרפיים", 5, "עוטף עזה, חוף אשקלון, גליל עליון, רמת הגולן, גליל מערבי"],
-        ["ענפים תעשייתיים", 6, "פלסטיק וגומי, מתכת ומכונות, דפוס, פארמה, חשמל, טקסטיל"],
-        ["תקופת תכנית", "דצמבר 2023 — נובמבר 2025", "כ-24 חודשים"],
+        ["מנכ\"לים שהשתתפו (במפעלים)", totals["ceos"], "מתוך הדאטה — 1 לכל מפעל"],
+        ["מנכ\"לים שנחשפו (כלל התכנית)", program["ceos"], "כולל מפגשי חשיפה ושיווק"],
+        ["מנהלי מש\"א (במפעלים)", totals["hrManagers"], ""],
+        ["מנהלי מש\"א (כלל התכנית)", program["hrManagers"], "כולל קורסי הכשרה"],
+        ["משתתפי הנהלה", totals["mgmt"], f"{share(totals['mgmt'])}% מכלל המשתתפים"],
+        ["משתתפי מנהלים ביניים", totals["midMgmt"], f"{share(totals['midMgmt'])}% מכלל המשתתפים"],
+        ["משתתפי עובדים", totals["workers"], f"{share(totals['workers'])}% מכלל המשתתפים"],
+        ["ממוצע משתתפים למפעל", round(total_participants / n_plants, 1), ""],
+        ["ממוצע סדנאות למפעל", round(total_sessions / n_plants, 1), ""],
+        ["מפעלים עם 3 שכבות", totals["threeLayers"], f"{round(totals['threeLayers']/n_plants*100)}%"],
+        ["אזורים גיאוגרפיים", len(regions), ", ".join(regions)],
+        ["ענפים תעשייתיים", len(sectors), ", ".join(sectors)],
+        ["תקופת תכנית", f"{format_month(period['start'])} — {format_month(period['end'])}",
+         f"כ-{period['months']} חודשים"],
     ]
 
-    ws.update("A1", rows, value_input_option=ValueInputOption.user_entered)
-    ws.format("A1:C1", {
-        "textFormat": {"bold": True},
-        "backgroundColor": {"red": 0.85, "green": 0.92, "blue": 1.0},
-    })
-    ws.freeze(rows=1)
-    print(f"  ✓ סיכום כללי — {len(rows)-1} rows")
+    return Tab("סיכום כללי", rows)
 
 
-def create_phases_tab(sh):
+def create_phases_tab():
     """Tab 4: שלבי התכנית — program phase breakdown."""
-    ws = sh.add_worksheet(title="שלבי התכנית", rows=10, cols=12)
-
     headers = [
         "שלב", "תיאור", "מפעלים / משתתפים",
         "מנכ\"לים", "מנהלי מש\"א", "סדנאות מש\"א",
@@ -334,68 +331,71 @@ def create_phases_tab(sh):
             phase["worker_workshops"],
         ])
 
-    ws.update("A1", rows, value_input_option=ValueInputOption.user_entered)
-    ws.format("A1:L1", {
-        "textFormat": {"bold": True},
-        "backgroundColor": {"red": 0.85, "green": 0.92, "blue": 1.0},
-    })
-    ws.freeze(rows=1)
-    print(f"  ✓ שלבי התכנית — {len(rows)-1} rows")
-
-
-def set_rtl(sh):
-    """Set all sheets to RTL."""
-    body = {
-        "requests": [
-            {
-                "updateSheetProperties": {
-                    "properties": {
-                        "sheetId": ws.id,
-                        "rightToLeft": True,
-                    },
-                    "fields": "rightToLeft",
-                }
-            }
-            for ws in sh.worksheets()
-        ]
-    }
-    sh.batch_update(body)
-    print("  ✓ RTL set on all sheets")
-
-
-def main():
-    print("Loading data...")
-    data = load_plants()
+    return Tab("שלבי התכנית", rows)
+
+
+def build_tabs(data, metrics=None, timeline_period="month", derive_timeline=False, factory_table=None):
+    """All tabs, in sheet order."""
+    return [
+        create_plants_tab(data, factory_table),
+        create_timeline_tab(data, timeline_period, derive_timeline),
+        create_summary_tab(data, metrics),
+        create_phases_tab(),
+    ]
 
-    print("Authenticating with Google Sheets...")
-    gc = get_client()
 
+def open_spreadsheet(gc):
     if EXISTING_SHEET_URL:
         print(f"Opening existing sheet...")
-        sh = gc.open_by_url(EXISTING_SHEET_URL)
-        # Clear all existing worksheets except the first
-        for ws in sh.worksheets()[1:]:
-            sh.del_worksheet(ws)
-        sh.sheet1.clear()
-    else:
-        print(f"Creating sheet: '{SHEET_TITLE}'...")
-        sh = gc.create(SHEET_TITLE)
-        # Share with Ori's email
-        print("Sharing sheet...")
-        sh.share("oristeinitz@gmail.com", perm_type="user", role="writer")
+        return gc.open_by_url(EXISTING_SHEET_URL)
+    print(f"Creating sheet: '{SHEET_TITLE}'...")
+    sh = gc.create(SHEET_TITLE)
+    # Share with Ori's email
+    print("Sharing sheet...")
+    sh.share("oristeinitz@gmail.com", perm_type="user", role="writer")
+    return sh
+
+
+def default_output(backend):
+    """exports/zionism2000.xlsx for the workbook, exports/<backend>/ for per-tab files."""
+    if backend == "xlsx":
+        return EXPORT_DIR / "zionism2000.xlsx"
+    return EXPORT_DIR / backend
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the normalized dashboard data.")
+    parser.add_argument("--backend", choices=["sheets", *LOCAL_BACKENDS], default="sheets",
+                        help="where to write the tabs (default: %(default)s)")
+    parser.add_argument("--out", type=Path,
+                        help="output file (xlsx) or directory (csv, parquet); default under exports/")
+    parser.add_argument("--timeline-period", choices=PERIODS, default="month",
+                        help="row granularity of the timeline tab (default: %(default)s)")
+    parser.add_argument("--derive-timeline", action="store_true",
+                        help="derive the timeline from the plants' activity periods and sessions")
+    parser.add_argument("--fake-sheet", metavar="STATE_JSON",
+                        help="sheets backend: sync into a local fake spreadsheet stored in this JSON file")
+    args = parser.parse_args(argv)
+
+    print("Loading data...")
+    data, metrics = load_plants()
+    tabs = build_tabs(data, metrics, args.timeline_period, args.derive_timeline, load_factory_table(data))
 
-    print("Populating tabs...")
-    create_plants_tab(sh, data)
-    create_timeline_tab(sh, data)
-    create_summary_tab(sh, data)
-    create_phases_tab(sh)
+    if args.backend != "sheets":
+        backend = LOCAL_BACKENDS[args.backend](args.out or default_output(args.backend))
+    elif args.fake_sheet:
+        backend = SheetsBackend(lambda: FakeSpreadsheet(args.fake_sheet))
+    else:
+        def open_google_sheet():
+            print("Authenticating with Google Sheets...")
+            return open_spreadsheet(get_client())
+        backend = SheetsBackend(open_google_sheet)
 
-    print("Setting RTL...")
-    set_rtl(sh)
+    print(f"Writing tabs ({backend.name})...")
+    result = backend.write(tabs)
 
     print(f"\n{'='*60}")
-    print(f"Google Sheet created successfully!")
-    print(f"URL: {sh.url}")
+    print(f"Export done: {result}")
     print(f"{'='*60}")
 
 
@@ -4,24 +4,69 @@ Fetch logo candidates for all 70 companies.
 Sources: Google Favicon (128px), DuckDuckGo Instant Answer icon, direct website icon.
 Also tries Brandfetch-style icon URLs.
 Generates a manifest for the admin page.
+
+Companies are fetched concurrently through one HttpPool: keep-alive
+connections are reused per host, at most --workers requests are in flight,
+and requests to the same host are spaced by --host-interval seconds.
+
+Freshness is tracked in an HTTP cache index under public/logos/candidates:
+fresh files are reused without a request, stale ones are revalidated with
+If-None-Match / If-Modified-Since, and failed URLs and unreachable hosts are
+not retried until their negative-cache TTL expires. A host counts as
+unreachable after HOST_FAILURE_LIMIT network errors in a row; when a
+revalidation fails, the cached file is served stale.
+
+Image bodies are stored once, content-addressed, under
+public/logos/candidates/_blobs/<sha256>.<ext>; companies sharing a domain
+(the Strauss, Tnuva and Osem units) point at the same blob, and identical
+URLs requested by several companies in one run are fetched only once.
+
+Usage:
+    python3 scripts/fetch_logo_candidates.py [--workers N] [--host-interval SECONDS]
+                                             [--refresh] [--retry-failed]
 """
 
+import argparse
+import hashlib
+import http.client
 import json
 import os
-import urllib.parse
-import urllib.request
 import ssl
-import sys
-import re
-
-# Allow unverified HTTPS for APIs
-ssl._create_default_https_context = ssl._create_unverified_context
+import threading
+import time
+import urllib.parse
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import formatdate
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 COMPANIES_PATH = os.path.join(BASE_DIR, "src", "shaveh", "data", "companies.json")
 CANDIDATES_DIR = os.path.join(BASE_DIR, "public", "logos", "candidates")
 MANIFEST_DIR = os.path.join(BASE_DIR, "src", "admin", "data")
 MANIFEST_PATH = os.path.join(MANIFEST_DIR, "logo_candidates.json")
+HTTP_CACHE_PATH = os.path.join(CANDIDATES_DIR, "_http_cache.json")
+BLOB_DIRNAME = "_blobs"
+BLOB_DIR = os.path.join(CANDIDATES_DIR, BLOB_DIRNAME)
+
+# Source URLs (module-level so a local stub server can stand in for them)
+GOOGLE_FAVICON_URL = "https://www.google.com/s2/favicons?domain={domain}&sz=128"
+APPLE_TOUCH_ICON_URL = "https://{domain}/apple-touch-icon.png"
+FAVICON_ICO_URL = "https://{domain}/favicon.ico"
+DUCKDUCKGO_API_URL = "https://api.duckduckgo.com/?q={query}&format=json&no_redirect=1"
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+REQUEST_TIMEOUT = 10
+MAX_REDIRECTS = 5
+DEFAULT_WORKERS = 8
+DEFAULT_HOST_INTERVAL = 0.25
+
+# Freshness when a response carries no Cache-Control max-age, and how long a
+# failed URL or unreachable host is left alone (seconds)
+DEFAULT_MAX_AGE = 24 * 3600
+NEGATIVE_TTL = 24 * 3600
+
+# Consecutive network errors after which a host is treated as unreachable
+HOST_FAILURE_LIMIT = 3
 
 # ── Domain map: company_id → website domain ────────────────────────────────────
 DOMAIN_MAP = {
@@ -183,55 +228,520 @@ ENGLISH_NAMES = {
 }
 
 
-def fetch_image(url, save_path, min_bytes=100):
-    """Download an image from URL. Returns True if successful."""
+# ── HTTP engine ────────────────────────────────────────────────────────────────
+Response = namedtuple("Response", ["status", "headers", "body", "url"])
+
+
+class HttpPool:
+    """Thread-safe HTTP client with per-host keep-alive connections.
+
+    At most `max_connections` requests are in flight at once, and requests to
+    the same host start at least `host_interval` seconds apart. Redirects are
+    followed; HTTPS certificates are not verified (as before, for the APIs).
+    """
+
+    def __init__(self, max_connections=DEFAULT_WORKERS, host_interval=DEFAULT_HOST_INTERVAL,
+                 timeout=REQUEST_TIMEOUT):
+        self.host_interval = host_interval
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._next_start = {}
+        self._ssl_context = ssl._create_unverified_context()
+
+    def _wait_turn(self, host):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start + self.host_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def _connect(self, key):
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _checkout(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    def _send(self, url, headers):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"unsupported URL: {url}")
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+
+        self._wait_turn(parts.hostname)
+        with self._slots:
+            while True:
+                conn, reused = self._checkout(key)
+                try:
+                    conn.request("GET", path, headers=headers)
+                    resp = conn.getresponse()
+                    body = resp.read()
+                except (http.client.HTTPException, OSError):
+                    conn.close()
+                    if reused:
+                        continue  # stale keep-alive connection: retry on a fresh one
+                    raise
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._checkin(key, conn)
+                return Response(resp.status, {k.lower(): v for k, v in resp.getheaders()}, body, url)
+
+    def get(self, url, headers=None):
+        hdrs = {"User-Agent": USER_AGENT}
+        hdrs.update(headers or {})
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = self._send(url, hdrs)
+            location = resp.headers.get("location")
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            return resp
+        raise http.client.HTTPException(f"too many redirects: {url}")
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+# ── HTTP cache ─────────────────────────────────────────────────────────────────
+def parse_max_age(headers):
+    """Freshness lifetime from Cache-Control, else DEFAULT_MAX_AGE."""
+    directives = [d.strip().lower() for d in headers.get("cache-control", "").split(",")]
+    if "no-store" in directives or "no-cache" in directives:
+        return 0
+    for d in directives:
+        if d.startswith("max-age="):
+            try:
+                return max(0, int(d[len("max-age="):]))
+            except ValueError:
+                break
+    return DEFAULT_MAX_AGE
+
+
+class HttpCache:
+    """On-disk index of fetched URLs: validators, fetch time and max-age.
+
+    Entries are keyed by URL; network errors are counted per host, and a
+    host is negatively cached once HOST_FAILURE_LIMIT of them come in a
+    row. `refresh` treats every entry as stale (forcing conditional
+    revalidation) and `retry_failed` ignores negative entries.
+    """
+
+    def __init__(self, path, refresh=False, retry_failed=False):
+        self.path = path
+        self.refresh = refresh
+        self.retry_failed = retry_failed
+        self._lock = threading.Lock()
+        self.stats = {"fresh": 0, "not_modified": 0, "downloaded": 0, "bytes": 0, "negative": 0,
+                      "stale": 0, "coalesced": 0}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        self.urls = index.get("urls", {})
+        # host -> {"failures": consecutive network errors, "at": time of the last one}
+        self.failed_hosts = {host: failed for host, failed in index.get("failedHosts", {}).items()
+                             if isinstance(failed, dict)}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            index = {"urls": self.urls, "failedHosts": self.failed_hosts}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def lookup(self, url):
+        with self._lock:
+            entry = self.urls.get(url)
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry, now):
+        if entry is None:
+            return False
+        if not entry["ok"]:
+            return not self.retry_failed and now - entry["fetchedAt"] < NEGATIVE_TTL
+        return not self.refresh and now - entry["fetchedAt"] < entry["maxAge"]
+
+    def host_failed(self, host, now):
+        with self._lock:
+            failed = self.failed_hosts.get(host)
+        return (failed is not None and failed["failures"] >= HOST_FAILURE_LIMIT
+                and not self.retry_failed and now - failed["at"] < NEGATIVE_TTL)
+
+    def record_host_failure(self, host, now):
+        with self._lock:
+            failed = self.failed_hosts.get(host) or {"failures": 0}
+            self.failed_hosts[host] = {"failures": failed["failures"] + 1, "at": now}
+
+    def store(self, url, entry, host=None):
+        with self._lock:
+            self.urls[url] = entry
+            if host:
+                self.failed_hosts.pop(host, None)
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+
+def _validators(resp, previous=None):
+    previous = previous or {}
+    return {
+        "etag": resp.headers.get("etag", previous.get("etag")),
+        "lastModified": resp.headers.get("last-modified", previous.get("lastModified")),
+    }
+
+
+def cached_get(pool, cache, url, have_body, mtime=None):
+    """GET `url` through the cache.
+
+    Returns (resp, entry): resp is None when the cache answered on its own
+    (fresh entry, negative hit, or the stale entry when the request could
+    not be made). `have_body` says whether a local copy exists that a 304
+    may confirm; `mtime` is its modification time, used as
+    If-Modified-Since when the index has no validators for it yet.
+    """
+    now = time.time()
+    host = urllib.parse.urlsplit(url).hostname
+    entry = cache.lookup(url)
+    if cache.is_fresh(entry, now) and (have_body or not entry["ok"]):
+        cache.count("fresh" if entry["ok"] else "negative")
+        return None, entry
+
+    def unreachable():
+        if have_body and entry and entry["ok"]:
+            cache.count("stale")
+            return None, entry
+        cache.count("negative")
+        return None, {"ok": False}
+
+    if cache.host_failed(host, now):
+        return unreachable()
+
+    headers = {}
+    if have_body:
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+        elif mtime is not None and not (entry and entry.get("etag")):
+            headers["If-Modified-Since"] = formatdate(mtime, usegmt=True)
     try:
-        req = urllib.request.Request(url, headers={
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        })
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            if resp.status == 200:
-                data = resp.read()
-                if len(data) > min_bytes:
-                    with open(save_path, "wb") as f:
-                        f.write(data)
-                    return True
-        return False
+        resp = pool.get(url, headers)
     except Exception:
-        return False
-
-
-def try_duckduckgo_icon(english_name, save_path):
+        cache.record_host_failure(host, now)
+        return unreachable()
+    return resp, entry
+
+
+# ── Content-addressed blob store ───────────────────────────────────────────────
+# Leading bytes → file extension (anything unrecognised is kept as .bin)
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"\x00\x00\x01\x00", ".ico"),
+    (b"<svg", ".svg"),
+    (b"<?xml", ".svg"),
+)
+
+
+def sniff_extension(data):
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp"
+    for magic, ext in IMAGE_SIGNATURES:
+        if data.startswith(magic):
+            return ext
+    return ".bin"
+
+
+class BlobStore:
+    """Image bodies stored once under their sha256 digest."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def exists(self, name):
+        return bool(name) and os.path.exists(self.path(name))
+
+    def put(self, data):
+        """Store `data` (if not already present) and return its blob name."""
+        name = hashlib.sha256(data).hexdigest() + sniff_extension(data)
+        path = self.path(name)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return name
+
+    def prune(self, keep):
+        """Remove blobs not named in `keep`. Returns the number removed."""
+        removed = 0
+        for name in os.listdir(self.root):
+            if name not in keep and not name.endswith(".tmp"):
+                os.remove(self.path(name))
+                removed += 1
+        return removed
+
+    def manifest_filename(self, name):
+        """Blob path relative to a company directory, as the admin page expects."""
+        return f"../{BLOB_DIRNAME}/{name}"
+
+
+# ── Sources ────────────────────────────────────────────────────────────────────
+class LogoFetcher:
+    """Pool, HTTP cache and blob store, with identical requests coalesced.
+
+    The first worker to ask for a URL fetches it; workers asking for the same
+    URL while (or after) it is in flight get the same result.
+    """
+
+    def __init__(self, pool, cache, blobs):
+        self.pool = pool
+        self.cache = cache
+        self.blobs = blobs
+        self.adopted = []
+        self._lock = threading.Lock()
+        self._results = {}
+
+    def _once(self, key, fetch):
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+        if not owner:
+            self.cache.count("coalesced")
+            return future.result()
+        try:
+            future.set_result(fetch())
+        except BaseException as e:
+            future.set_exception(e)
+        return future.result()
+
+    def image(self, url, min_bytes=100, legacy_path=None):
+        """Blob name for the image at `url`, or None."""
+        return self._once(("image", url, min_bytes),
+                          lambda: fetch_image(self, url, min_bytes, legacy_path))
+
+    def json(self, url):
+        return self._once(("json", url), lambda: fetch_json(self.pool, self.cache, url))
+
+    def adopt(self, path, min_bytes):
+        """Move a per-company file from before the blob store into it.
+
+        Returns (blob name, mtime) or (None, None). The file itself is removed
+        by main(), and only once the cache index references its blob.
+        """
+        if not (os.path.exists(path) and os.path.getsize(path) > min_bytes):
+            return None, None
+        with open(path, "rb") as f:
+            name = self.blobs.put(f.read())
+        with self._lock:
+            self.adopted.append((path, name))
+        return name, os.path.getmtime(path)
+
+
+def fetch_image(fetcher, url, min_bytes=100, legacy_path=None):
+    """Download an image from URL into the blob store. Returns the blob name or None."""
+    cache, blobs = fetcher.cache, fetcher.blobs
+    entry = cache.lookup(url)
+    blob = entry.get("blob") if entry else None
+    have_blob = blobs.exists(blob)
+    mtime = None
+    if not have_blob and legacy_path:
+        blob, mtime = fetcher.adopt(legacy_path, min_bytes)
+        have_blob = blob is not None
+        if have_blob:
+            # Indexed before revalidating, so a failed request cannot orphan it;
+            # maxAge 0 makes the request below revalidate it against its mtime
+            previous = entry if entry and entry["ok"] else {"ok": True, "fetchedAt": mtime, "maxAge": 0}
+            cache.store(url, {**previous, "blob": blob})
+    try:
+        resp, entry = cached_get(fetcher.pool, cache, url, have_blob, mtime)
+        if resp is None:
+            return blob if entry["ok"] and have_blob else None
+        now = time.time()
+        host = urllib.parse.urlsplit(url).hostname
+        if resp.status == 304 and have_blob:
+            cache.store(url, {"ok": True, "fetchedAt": now, "maxAge": parse_max_age(resp.headers),
+                              "blob": blob, **_validators(resp, entry)}, host)
+            cache.count("not_modified")
+            return blob
+        # Error pages served with 200 are rejected by their magic bytes
+        if resp.status == 200 and len(resp.body) > min_bytes and sniff_extension(resp.body) != ".bin":
+            blob = blobs.put(resp.body)
+            cache.store(url, {"ok": True, "fetchedAt": now, "maxAge": parse_max_age(resp.headers),
+                              "blob": blob, **_validators(resp)}, host)
+            cache.count("downloaded")
+            cache.count("bytes", len(resp.body))
+            return blob
+        cache.store(url, {"ok": False, "status": resp.status, "fetchedAt": now}, host)
+        return None
+    except Exception:
+        return None
+
+
+def fetch_json(pool, cache, url):
+    """GET a small JSON document; the parsed body is kept in the cache entry."""
+    entry = cache.lookup(url)
+    have_body = bool(entry and entry.get("ok") and "body" in entry)
+    resp, entry = cached_get(pool, cache, url, have_body)
+    if resp is None:
+        return entry.get("body") if entry["ok"] else None
+    now = time.time()
+    host = urllib.parse.urlsplit(url).hostname
+    if resp.status == 304 and have_body:
+        body = entry["body"]
+    elif resp.status == 200:
+        body = json.loads(resp.body)
+        cache.count("downloaded")
+        cache.count("bytes", len(resp.body))
+    else:
+        cache.store(url, {"ok": False, "status": resp.status, "fetchedAt": now}, host)
+        return None
+    cache.store(url, {"ok": True, "fetchedAt": now, "maxAge": parse_max_age(resp.headers),
+                      "body": body, **_validators(resp, entry)}, host)
+    return body
+
+
+def try_duckduckgo_icon(fetcher, english_name, legacy_path=None):
     """Try DuckDuckGo instant answer API to get an icon."""
     try:
         query = urllib.parse.quote(f"{english_name}")
-        url = f"https://api.duckduckgo.com/?q={query}&format=json&no_redirect=1"
-        req = urllib.request.Request(url, headers={
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
-        })
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read())
-            icon_url = data.get("Image", "")
-            if icon_url and icon_url.startswith("http"):
-                return fetch_image(icon_url, save_path)
+        data = fetcher.json(DUCKDUCKGO_API_URL.format(query=query))
+        icon_url = (data or {}).get("Image", "")
+        if icon_url and icon_url.startswith("http"):
+            return fetcher.image(icon_url, legacy_path=legacy_path)
     except Exception:
         pass
-    return False
+    return None
 
 
-def try_website_apple_touch_icon(domain, save_path):
+def try_website_apple_touch_icon(fetcher, domain, legacy_path=None):
     """Try fetching /apple-touch-icon.png from the website."""
-    url = f"https://{domain}/apple-touch-icon.png"
-    return fetch_image(url, save_path, min_bytes=500)
+    url = APPLE_TOUCH_ICON_URL.format(domain=domain)
+    return fetcher.image(url, min_bytes=500, legacy_path=legacy_path)
 
 
-def try_website_favicon_ico(domain, save_path):
+def try_website_favicon_ico(fetcher, domain, legacy_path=None):
     """Try fetching /favicon.ico from the website."""
-    url = f"https://{domain}/favicon.ico"
-    return fetch_image(url, save_path, min_bytes=500)
+    url = FAVICON_ICO_URL.format(domain=domain)
+    return fetcher.image(url, min_bytes=500, legacy_path=legacy_path)
+
+
+def collect_candidates(fetcher, company):
+    """Fetch every source for one company.
+
+    Returns (manifest_entry, stats_delta, log) so workers never touch shared state.
+    Candidate filenames are relative to the company directory and point into
+    the shared blob store.
+    """
+    cid = company["id"]
+    name = company["name"]
+    domain = DOMAIN_MAP.get(cid)
+    en_name = ENGLISH_NAMES.get(cid, "")
+    stats = {"favicon_ok": 0, "duckduckgo_ok": 0, "apple_touch_ok": 0, "no_domain": 0}
+    log = []
+
+    # Files written per company before the blob store; adopted if present
+    company_dir = os.path.join(CANDIDATES_DIR, cid)
+
+    candidates = []
+    google_query = urllib.parse.quote(f"{name} logo לוגו")
+    google_url = f"https://www.google.com/search?q={google_query}&tbm=isch"
+
+    def add(blob, source):
+        candidates.append({"filename": fetcher.blobs.manifest_filename(blob), "source": source})
+
+    if domain:
+        # Source 1: Google Favicon API (128px)
+        favicon_url = GOOGLE_FAVICON_URL.format(domain=domain)
+        blob = fetcher.image(favicon_url, legacy_path=os.path.join(company_dir, "favicon.png"))
+        if blob:
+            add(blob, "google-favicon")
+            stats["favicon_ok"] += 1
+            log.append("favicon✓")
+
+        # Source 2: Apple Touch Icon from website
+        blob = try_website_apple_touch_icon(fetcher, domain, os.path.join(company_dir, "apple-touch.png"))
+        if blob:
+            add(blob, "apple-touch-icon")
+            stats["apple_touch_ok"] += 1
+            log.append("apple✓")
+
+    else:
+        stats["no_domain"] += 1
+        log.append("no-domain")
+
+    # Source 3: DuckDuckGo Instant Answer icon (works with or without domain)
+    if en_name:
+        blob = try_duckduckgo_icon(fetcher, en_name, os.path.join(company_dir, "duckduckgo.png"))
+        if blob:
+            add(blob, "duckduckgo")
+            stats["duckduckgo_ok"] += 1
+            log.append("ddg✓")
+
+    entry = {
+        "name": name,
+        "domain": domain,
+        "candidates": candidates,
+        "googleSearchUrl": google_url,
+    }
+    return entry, stats, " ".join(log)
+
+
+def remove_legacy_files(adopted, referenced):
+    """Delete adopted per-company files whose blob is referenced, and their directories once empty."""
+    for path, blob in adopted:
+        if blob not in referenced:
+            continue
+        try:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch logo candidates for the admin page.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="companies fetched (and requests in flight) at once (default: %(default)s)")
+    parser.add_argument("--host-interval", type=float, default=DEFAULT_HOST_INTERVAL,
+                        help="minimum seconds between requests to the same host (default: %(default)s)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="revalidate every cached file regardless of max-age")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="ignore negative-cache entries for failed URLs and hosts")
+    args = parser.parse_args(argv)
 
-
-def main():
     with open(COMPANIES_PATH, "r", encoding="utf-8") as f:
         data = json.load(f)
     companies = data["companies"]
@@ -241,74 +751,30 @@ def main():
     manifest = {}
     stats = {"favicon_ok": 0, "duckduckgo_ok": 0, "apple_touch_ok": 0, "no_domain": 0, "total_candidates": 0}
 
-    for i, company in enumerate(companies):
-        cid = company["id"]
-        name = company["name"]
-        domain = DOMAIN_MAP.get(cid)
-        en_name = ENGLISH_NAMES.get(cid, "")
-
-        company_dir = os.path.join(CANDIDATES_DIR, cid)
-        os.makedirs(company_dir, exist_ok=True)
-
-        candidates = []
-        google_query = urllib.parse.quote(f"{name} logo לוגו")
-        google_url = f"https://www.google.com/search?q={google_query}&tbm=isch"
-
-        print(f"  [{i+1}/{len(companies)}] {cid}:", end="")
-
-        if domain:
-            # Source 1: Google Favicon API (128px)
-            favicon_url = f"https://www.google.com/s2/favicons?domain={domain}&sz=128"
-            favicon_path = os.path.join(company_dir, "favicon.png")
-            if not os.path.exists(favicon_path) or os.path.getsize(favicon_path) < 100:
-                ok = fetch_image(favicon_url, favicon_path)
-            else:
-                ok = True  # Already fetched
-            if ok and os.path.exists(favicon_path) and os.path.getsize(favicon_path) > 100:
-                candidates.append({"filename": "favicon.png", "source": "google-favicon"})
-                stats["favicon_ok"] += 1
-                print(" favicon✓", end="")
-
-            # Source 2: Apple Touch Icon from website
-            apple_path = os.path.join(company_dir, "apple-touch.png")
-            if not os.path.exists(apple_path) or os.path.getsize(apple_path) < 500:
-                ok2 = try_website_apple_touch_icon(domain, apple_path)
-            else:
-                ok2 = True
-            if ok2 and os.path.exists(apple_path) and os.path.getsize(apple_path) > 500:
-                candidates.append({"filename": "apple-touch.png", "source": "apple-touch-icon"})
-                stats["apple_touch_ok"] += 1
-                print(" apple✓", end="")
-
-        else:
-            stats["no_domain"] += 1
-            print(" no-domain", end="")
-
-        # Source 3: DuckDuckGo Instant Answer icon (works with or without domain)
-        if en_name:
-            ddg_path = os.path.join(company_dir, "duckduckgo.png")
-            if not os.path.exists(ddg_path) or os.path.getsize(ddg_path) < 100:
-                ok3 = try_duckduckgo_icon(en_name, ddg_path)
-            else:
-                ok3 = True
-            if ok3 and os.path.exists(ddg_path) and os.path.getsize(ddg_path) > 100:
-                candidates.append({"filename": "duckduckgo.png", "source": "duckduckgo"})
-                stats["duckduckgo_ok"] += 1
-                print(" ddg✓", end="")
-
-        stats["total_candidates"] += len(candidates)
-        print(f"  ({len(candidates)} candidates)")
-
-        manifest[cid] = {
-            "name": name,
-            "domain": domain,
-            "candidates": candidates,
-            "googleSearchUrl": google_url,
-        }
+    pool = HttpPool(max_connections=args.workers, host_interval=args.host_interval)
+    cache = HttpCache(HTTP_CACHE_PATH, refresh=args.refresh, retry_failed=args.retry_failed)
+    fetcher = LogoFetcher(pool, cache, BlobStore(BLOB_DIR))
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(collect_candidates, fetcher, company) for company in companies]
+            for i, (company, future) in enumerate(zip(companies, futures)):
+                entry, company_stats, log = future.result()
+                for key, value in company_stats.items():
+                    stats[key] += value
+                stats["total_candidates"] += len(entry["candidates"])
+                manifest[company["id"]] = entry
+                print(f"  [{i+1}/{len(companies)}] {company['id']}: {log}  ({len(entry['candidates'])} candidates)")
+    finally:
+        pool.close()
+        cache.save()
 
     # Write manifest
     with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
         json.dump(manifest, f, ensure_ascii=False, indent=2)
+    referenced = {entry["blob"] for entry in cache.urls.values() if entry.get("blob")}
+    referenced.update(os.path.basename(c["filename"]) for v in manifest.values() for c in v["candidates"])
+    remove_legacy_files(fetcher.adopted, referenced)
+    pruned = fetcher.blobs.prune(referenced)
 
     # Summary
     total = len(companies)
@@ -321,6 +787,14 @@ def main():
     print(f"  Apple touch icons:         {stats['apple_touch_ok']}")
     print(f"  DuckDuckGo icons:          {stats['duckduckgo_ok']}")
     print(f"  No domain mapped:          {stats['no_domain']}")
+    print(f"  HTTP cache:                {cache.stats['fresh']} fresh, "
+          f"{cache.stats['not_modified']} not modified, {cache.stats['stale']} served stale, "
+          f"{cache.stats['negative']} negative, "
+          f"{cache.stats['downloaded']} downloaded ({cache.stats['bytes']:,} bytes), "
+          f"{cache.stats['coalesced']} coalesced")
+    blob_names = {c["filename"] for v in manifest.values() for c in v["candidates"]}
+    print(f"  Unique images:             {len(blob_names)} (of {stats['total_candidates']} candidates), "
+          f"{pruned} unreferenced blobs removed")
     print(f"  Manifest:                  {MANIFEST_PATH}")
 
 
@@ -2,18 +2,43 @@
 """
 Generate v2 companies.json for the Shaveh dashboard.
 Produces a JSON file with 70 companies and aggregate statistics.
+
+Usage:
+    python3 scripts/generate_v2_json.py [--incremental] [--output PATH]
+    python3 scripts/generate_v2_json.py --variants specs.json [--jobs N]
 """
 
+import argparse
+import ast
+import hashlib
 import json
 import os
 import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from compact_dataset import CompactEncoder, compact_path, write_compact
+from name_index import NameIndex
+from search_index import FORMAT as SEARCH_FORMAT, SearchIndexBuilder, document_terms, search_path, write_index
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the stdlib fallback gives identical counts
+    np = None
 
 random.seed(42)  # Reproducible output
 
-OUTPUT_PATH = os.path.join(
-    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-    "src", "shaveh", "data", "companies.json"
-)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_PATH = os.path.join(BASE_DIR, "src", "shaveh", "data", "companies.json")
+
+# By default companies at positions 1..COHORT_SPLIT are cohort 1, the rest
+# cohort 2 (see CohortRules for other assignments)
+COHORT_SPLIT = 50
+
+BUILD_CACHE_VERSION = 6
 
 # ── Process step keys ──────────────────────────────────────────────────────────
 LEARNING_KEYS = [
@@ -33,6 +58,27 @@ MARKETING_KEYS = [
     "pressReleaseApproval", "websiteUpdate", "exposureData"
 ]
 
+# (name, displayName, keys) in process order
+PHASE_DEFS = [
+    ("learning", "למידה", LEARNING_KEYS),
+    ("development", "פיתוח", DEVELOPMENT_KEYS),
+    ("marketing", "שיווק", MARKETING_KEYS),
+]
+
+STEP_COUNT = sum(len(keys) for _, _, keys in PHASE_DEFS)
+
+# Step states packed as small ints; anything unexpected maps to STEP_UNKNOWN
+STEP_STATES = (None, "כן", "בתהליך", "לא")
+STEP_CODES = {state: code for code, state in enumerate(STEP_STATES)}
+STEP_YES = STEP_CODES["כן"]
+STEP_IN_PROGRESS = STEP_CODES["בתהליך"]
+STEP_UNKNOWN = len(STEP_STATES)
+
+FUNNEL_FIELDS = ["emailSent", "meetingHeld", "agreementSent", "agreementSigned", "paid"]
+FUNNEL_BITS = {field: 1 << i for i, field in enumerate(FUNNEL_FIELDS)}
+
+COMMUNITY_FIELDS = ["workshop", "conferenceMay", "conferenceJune", "conferenceApril", "conferenceAugust"]
+
 
 def make_phase(keys, num_yes, num_in_progress):
     """Build a phase dict: first `num_yes` steps as 'כן',
@@ -48,16 +94,33 @@ def make_phase(keys, num_yes, num_in_progress):
     return result
 
 
-def null_phase(keys):
-    return {k: None for k in keys}
+# Shared step codes for companies without process data (every step None)
+NULL_STEPS = bytes(STEP_COUNT)
 
 
-def null_process():
-    return {
-        "learning": null_phase(LEARNING_KEYS),
-        "development": null_phase(DEVELOPMENT_KEYS),
-        "marketing": null_phase(MARKETING_KEYS),
-    }
+def encode_process(process):
+    """Pack a {phase: {step: state}} dict into STEP_COUNT step codes."""
+    codes = bytearray()
+    for phase_name, _, keys in PHASE_DEFS:
+        phase = process[phase_name]
+        for key in keys:
+            state = phase.get(key)
+            if state not in STEP_CODES:
+                raise ValueError(f"unknown step state {state!r} for {phase_name}.{key}")
+            codes.append(STEP_CODES[state])
+    return bytes(codes)
+
+
+def decode_process(steps):
+    """Inverse of encode_process: step codes back to the JSON process dict."""
+    process = {}
+    offset = 0
+    for phase_name, _, keys in PHASE_DEFS:
+        process[phase_name] = {
+            key: STEP_STATES[steps[offset + i]] for i, key in enumerate(keys)
+        }
+        offset += len(keys)
+    return process
 
 
 # ── Raw company data ───────────────────────────────────────────────────────────
@@ -135,6 +198,30 @@ RAW = [
     ("jansport", "JanSport", "", False, False, False, False, False),
 ]
 
+# ── Per-company seeds ──────────────────────────────────────────────────────────
+# hash(str) is salted per interpreter (PYTHONHASHSEED), so seeds come from a
+# stable digest of the id instead: every run and every machine draws the same
+# referral and community values for a company.
+def stable_seed(key):
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+SEED_TABLE = {raw[0]: stable_seed(raw[0]) for raw in RAW}
+_SEED_TABLES = {0: SEED_TABLE}
+
+
+def company_seed(cid, salt=0):
+    """Seed for `cid`; a non-zero `salt` gives an independent draw (dataset variants)."""
+    table = _SEED_TABLES.get(salt)
+    if table is None:
+        table = _SEED_TABLES[salt] = {}
+    seed = table.get(cid)
+    if seed is None:
+        seed = table[cid] = stable_seed(f"{salt}:{cid}" if salt else cid)
+    return seed
+
+
 # ── Industry mapping ───────────────────────────────────────────────────────────
 INDUSTRY_MAP = {
     "מזון": {
@@ -168,11 +255,12 @@ INDUSTRY_MAP = {
     "אחר": {"hamashbir", "partner", "bezeq_store", "max", "be_unique", "hyundai"},
 }
 
-# Invert to id -> industry
-ID_TO_INDUSTRY = {}
+# Invert to id -> industry. Ids are matched verbatim: a near miss is a
+# different company, so it is reported rather than guessed.
+ID_TO_INDUSTRY = NameIndex(fuzzy=False, key=str)
 for industry, ids in INDUSTRY_MAP.items():
     for cid in ids:
-        ID_TO_INDUSTRY[cid] = industry
+        ID_TO_INDUSTRY.add(cid, industry)
 
 # ── Company size mapping ───────────────────────────────────────────────────────
 SIZE_MAP = {
@@ -203,10 +291,23 @@ SIZE_MAP = {
     },
 }
 
-ID_TO_SIZE = {}
+ID_TO_SIZE = NameIndex(fuzzy=False, key=str)
 for size, ids in SIZE_MAP.items():
     for cid in ids:
-        ID_TO_SIZE[cid] = size
+        ID_TO_SIZE.add(cid, size)
+
+
+def unmatched_joins():
+    """Lines for RAW ids missing from INDUSTRY_MAP or SIZE_MAP."""
+    lines = []
+    for table, index in (("INDUSTRY_MAP", ID_TO_INDUSTRY), ("SIZE_MAP", ID_TO_SIZE)):
+        for cid, *_ in RAW:
+            if cid not in index:
+                suggestion = index.suggest(cid)
+                hint = f" (closest: {suggestion})" if suggestion else ""
+                lines.append(f"{cid}: not in {table}{hint}")
+    return lines
+
 
 # ── Referral sources ───────────────────────────────────────────────────────────
 REFERRAL_OPTIONS = [
@@ -296,6 +397,9 @@ PROCESS_DATA = {
     },
 }
 
+# Encoded once; records share these instead of holding their own phase dicts
+PROCESS_STEPS = {cid: encode_process(process) for cid, process in PROCESS_DATA.items()}
+
 # ── Outcomes ───────────────────────────────────────────────────────────────────
 OUTCOMES_DATA = {
     "dizengoff_center": {
@@ -342,12 +446,12 @@ OUTCOMES_DATA = {
     },
 }
 
-NULL_OUTCOMES = {
+NULL_OUTCOMES = MappingProxyType({
     "hasProduct": None,
     "productDescription": None,
     "satisfaction": None,
     "mediaExposure": None,
-}
+})
 
 # ── Notes / requirements placeholders ──────────────────────────────────────────
 NOTES_COMPANIES = {
@@ -444,33 +548,30 @@ YES_COMPANIES = {
 }
 
 
-def make_community(cid, email_sent):
+def make_community(cid, email_sent, salt=0):
+    """Attendance flags in COMMUNITY_FIELDS order, or None if never contacted."""
     if not email_sent:
-        return {
-            "workshop": None,
-            "conferenceMay": None,
-            "conferenceJune": None,
-            "conferenceApril": None,
-            "conferenceAugust": None,
-        }
+        return None
 
-    rng = random.Random(hash(cid) + 100)
+    rng = random.Random(company_seed(cid, salt) + 100)
 
     is_yes = cid in YES_COMPANIES
     threshold = 0.45 if is_yes else 0.15
 
-    return {
-        "workshop": rng.random() < threshold,
-        "conferenceMay": rng.random() < threshold,
-        "conferenceJune": rng.random() < threshold,
-        "conferenceApril": rng.random() < threshold,
-        "conferenceAugust": rng.random() < threshold,
-    }
+    return tuple(rng.random() < threshold for _ in COMMUNITY_FIELDS)
 
 
 # ── Recruitment status ─────────────────────────────────────────────────────────
-def get_recruitment_status(status, email_sent, meeting_held, agreement_sent,
-                           agreement_signed, paid):
+# The rules are written once as a chain of conditions and compiled into a
+# table indexed by (status code << 5) | FUNNEL_BITS mask, so classifying a
+# company is one lookup and a whole column is one bytes.translate().
+STATUSES = ("כן", "לא", "טרם הוחלט", "")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+STATUS_OTHER = len(STATUSES)          # any status not listed above
+
+
+def _recruitment_rule(status, email_sent, meeting_held, agreement_sent,
+                      agreement_signed, paid):
     if status == "כן" and paid:
         return "הצטרפו ושילמו"
     elif status == "כן" and agreement_signed:
@@ -493,195 +594,1142 @@ def get_recruitment_status(status, email_sent, meeting_held, agreement_sent,
         return "נשלח מייל, ממתינים"
     elif status == "טרם הוחלט":
         return "טרם יצרנו קשר"
-    elif status == "":
-        return ""
     return ""
 
 
-# ── Build companies list ───────────────────────────────────────────────────────
-def build_companies():
-    companies = []
-
-    for idx, (cid, name, status, email, meet, agree_sent, agree_sign, paid) in enumerate(RAW):
-        one_based = idx + 1
-        cohort = 1 if one_based <= 50 else 2
-
-        industry = ID_TO_INDUSTRY.get(cid, None)
-        size = ID_TO_SIZE.get(cid, None)
-
-        # Referral sources
-        if email:
-            ref1 = pick_referral(hash(cid) + 1)
-            rng2 = random.Random(hash(cid) + 2)
-            ref2 = pick_referral(hash(cid) + 3) if rng2.random() < 0.30 else None
-            if ref2 == ref1:
-                ref2 = None
-        else:
-            ref1 = None
-            ref2 = None
+def _compile_recruitment_table():
+    labels = []
+    table = bytearray(256)            # (STATUS_OTHER + 1) * 32 entries used; fits a byte index
+    for code in range(STATUS_OTHER + 1):
+        status = STATUSES[code] if code < STATUS_OTHER else None
+        for mask in range(1 << len(FUNNEL_FIELDS)):
+            flags = [bool(mask & FUNNEL_BITS[field]) for field in FUNNEL_FIELDS]
+            label = _recruitment_rule(status, *flags)
+            if label not in labels:
+                labels.append(label)
+            table[code << 5 | mask] = labels.index(label)
+    return tuple(labels), bytes(table)
 
-        # Process
-        if cid in PROCESS_DATA:
-            process = PROCESS_DATA[cid]
-        else:
-            process = null_process()
 
-        # Outcomes
-        if cid in OUTCOMES_DATA:
-            outcomes = OUTCOMES_DATA[cid]
-        else:
-            outcomes = dict(NULL_OUTCOMES)
+# RECRUITMENT_LABELS[code] is the status text; RECRUITMENT_TABLE maps an index byte to a code
+RECRUITMENT_LABELS, RECRUITMENT_TABLE = _compile_recruitment_table()
 
-        # Community
-        community = make_community(cid, email)
+# status code -> the status bits of a table index
+_STATUS_SHIFT = bytes((min(b, STATUS_OTHER) << 5) & 0xFF for b in range(256))
 
-        # Notes/requirements
-        notes = NOTES_COMPANIES.get(cid, "")
-        requirements = REQUIREMENTS_COMPANIES.get(cid, "")
 
-        # Recruitment status
-        recruitment_status = get_recruitment_status(
-            status, email, meet, agree_sent, agree_sign, paid
-        )
+def status_code(status):
+    return STATUS_CODES.get(status, STATUS_OTHER)
+
 
-        company = {
-            "id": cid,
-            "name": name,
-            "companySize": size,
-            "industry": industry,
-            "referralSource1": ref1,
-            "referralSource2": ref2,
-            "cohort": cohort,
-            "emailSent": email,
-            "meetingHeld": meet,
-            "agreementSent": agree_sent,
-            "agreementSigned": agree_sign,
-            "paid": paid,
-            "status": status,
-            "recruitmentStatus": recruitment_status,
-            "notes": notes,
-            "requirements": requirements,
-            "process": process,
-            "outcomes": outcomes,
-            "community": community,
+def get_recruitment_status(status, email_sent, meeting_held, agreement_sent,
+                           agreement_signed, paid):
+    mask = flags_mask(email_sent, meeting_held, agreement_sent, agreement_signed, paid)
+    return RECRUITMENT_LABELS[RECRUITMENT_TABLE[status_code(status) << 5 | mask]]
+
+
+def classify_recruitment(status_codes, masks):
+    """Recruitment codes for whole columns: status_code() bytes and FUNNEL_BITS mask bytes.
+
+    The table index (status << 5 | mask) of every company fits in one byte,
+    so the columns are combined with a single big-integer OR (the fields
+    occupy disjoint bits, nothing carries) and mapped through the table
+    with bytes.translate; with NumPy it is one fancy-indexing gather.
+    """
+    n = len(masks)
+    if n == 0:
+        return b""
+    if np is not None:
+        index = (np.frombuffer(bytes(status_codes), dtype=np.uint8).clip(0, STATUS_OTHER) << 5) \
+            | np.frombuffer(bytes(masks), dtype=np.uint8)
+        return np.frombuffer(RECRUITMENT_TABLE, dtype=np.uint8)[index].tobytes()
+    shifted = bytes(status_codes).translate(_STATUS_SHIFT)
+    index = (int.from_bytes(shifted, "big") | int.from_bytes(masks, "big")).to_bytes(n, "big")
+    return index.translate(RECRUITMENT_TABLE)
+
+
+def recruitment_index(codes, keys):
+    """{recruitment status: [keys]} for classify_recruitment() codes, in label order.
+
+    Only statuses that occur are listed; keys keep their input order.
+    """
+    buckets = [[] for _ in RECRUITMENT_LABELS]
+    for code, key in zip(codes, keys):
+        buckets[code].append(key)
+    return {RECRUITMENT_LABELS[code]: bucket for code, bucket in enumerate(buckets) if bucket}
+
+
+# ── Company record ─────────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class CompanyRecord:
+    """Compact in-memory company.
+
+    Funnel booleans are packed into a FUNNEL_BITS mask and step states into
+    STEP_COUNT byte codes; companies without process data or outcomes share
+    NULL_STEPS / NULL_OUTCOMES. to_dict() expands to the JSON schema and is
+    only called at serialization time.
+    """
+    id: str
+    name: str
+    company_size: Optional[str]
+    industry: Optional[str]
+    referral1: Optional[str]
+    referral2: Optional[str]
+    cohort: int
+    flags: int
+    status: str
+    recruitment_status: str
+    notes: str
+    requirements: str
+    steps: bytes
+    outcomes: Mapping
+    community: Optional[tuple]
+
+    def flag(self, field):
+        return bool(self.flags & FUNNEL_BITS[field])
+
+    def to_dict(self):
+        flags = self.flags
+        community = self.community or (None,) * len(COMMUNITY_FIELDS)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "companySize": self.company_size,
+            "industry": self.industry,
+            "referralSource1": self.referral1,
+            "referralSource2": self.referral2,
+            "cohort": self.cohort,
+            "emailSent": bool(flags & 1),
+            "meetingHeld": bool(flags & 2),
+            "agreementSent": bool(flags & 4),
+            "agreementSigned": bool(flags & 8),
+            "paid": bool(flags & 16),
+            "status": self.status,
+            "recruitmentStatus": self.recruitment_status,
+            "notes": self.notes,
+            "requirements": self.requirements,
+            "process": decode_process(self.steps),
+            "outcomes": dict(self.outcomes),
+            "community": dict(zip(COMMUNITY_FIELDS, community)),
         }
-        companies.append(company)
 
-    return companies
+
+def flags_mask(email, meet, agree_sent, agree_sign, paid):
+    return (
+        (1 if email else 0)
+        | (2 if meet else 0)
+        | (4 if agree_sent else 0)
+        | (8 if agree_sign else 0)
+        | (16 if paid else 0)
+    )
+
+
+# ── Cohorts ────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class CohortRule:
+    """Companies meeting every condition given here join `cohort`.
+
+    `first` / `last` bound the 1-based list position (inclusive), `ids`
+    lists company ids, and `field` / `values` match a company field (id,
+    status, industry or companySize) against a set of values.
+    """
+    cohort: int
+    first: Optional[int] = None
+    last: Optional[int] = None
+    ids: frozenset = frozenset()
+    field: Optional[str] = None
+    values: frozenset = frozenset()
+
+    def matches(self, position, company):
+        if self.first is not None and position < self.first:
+            return False
+        if self.last is not None and position > self.last:
+            return False
+        if self.ids and company.get("id") not in self.ids:
+            return False
+        if self.field is not None and company.get(self.field) not in self.values:
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class CohortRules:
+    """Ordered cohort rules: the first rule a company matches assigns its
+    cohort, and companies matching none get `default`."""
+    rules: tuple = ()
+    default: Optional[int] = None
+
+    @classmethod
+    def split(cls, n):
+        """Positions 1..n are cohort 1, the rest cohort 2."""
+        return cls((CohortRule(1, last=n),), default=2)
+
+    @classmethod
+    def from_json(cls, obj):
+        """From {"rules": [{"cohort", "from", "to", "ids", "field", "values"}], "default"}."""
+        rules = []
+        for item in obj.get("rules", []):
+            if ("field" in item) != ("values" in item):
+                raise ValueError(f"cohort rule {item}: field and values go together")
+            rules.append(CohortRule(
+                cohort=item["cohort"],
+                first=item.get("from"),
+                last=item.get("to"),
+                ids=frozenset(item.get("ids", ())),
+                field=item.get("field"),
+                values=frozenset(item.get("values", ())),
+            ))
+        return cls(tuple(rules), obj.get("default"))
+
+    def assign(self, idx, company):
+        position = idx + 1
+        for rule in self.rules:
+            if rule.matches(position, company):
+                return rule.cohort
+        return self.default
+
+
+DEFAULT_COHORTS = CohortRules.split(COHORT_SPLIT)
+
+
+def cohort_fields(raw):
+    """The fields cohort rules can test, for a RAW row."""
+    cid, status = raw[0], raw[2]
+    return {"id": cid, "status": status, "industry": ID_TO_INDUSTRY.get(cid),
+            "companySize": ID_TO_SIZE.get(cid)}
+
+
+def cohort_for(idx, cohorts=DEFAULT_COHORTS, company=None):
+    return cohorts.assign(idx, company or {})
+
+
+# ── Build companies list ───────────────────────────────────────────────────────
+def build_company(idx, raw, seed=0, cohorts=DEFAULT_COHORTS):
+    cid, name, status, email, meet, agree_sent, agree_sign, paid = raw
+    cohort = cohort_for(idx, cohorts, cohort_fields(raw))
+
+    industry = ID_TO_INDUSTRY.get(cid)
+    size = ID_TO_SIZE.get(cid)
+
+    # Referral sources
+    if email:
+        cseed = company_seed(cid, seed)
+        ref1 = pick_referral(cseed + 1)
+        rng2 = random.Random(cseed + 2)
+        ref2 = pick_referral(cseed + 3) if rng2.random() < 0.30 else None
+        if ref2 == ref1:
+            ref2 = None
+    else:
+        ref1 = None
+        ref2 = None
+
+    # Process
+    steps = PROCESS_STEPS.get(cid, NULL_STEPS)
+
+    # Outcomes
+    outcomes = OUTCOMES_DATA.get(cid, NULL_OUTCOMES)
+
+    # Community
+    community = make_community(cid, email, seed)
+
+    # Notes/requirements
+    notes = NOTES_COMPANIES.get(cid, "")
+    requirements = REQUIREMENTS_COMPANIES.get(cid, "")
+
+    # Recruitment status
+    recruitment_status = get_recruitment_status(
+        status, email, meet, agree_sent, agree_sign, paid
+    )
+
+    return CompanyRecord(
+        id=cid,
+        name=name,
+        company_size=size,
+        industry=industry,
+        referral1=ref1,
+        referral2=ref2,
+        cohort=cohort,
+        flags=flags_mask(email, meet, agree_sent, agree_sign, paid),
+        status=status,
+        recruitment_status=recruitment_status,
+        notes=notes,
+        requirements=requirements,
+        steps=steps,
+        outcomes=outcomes,
+        community=community,
+    )
+
+
+def build_companies():
+    """Yield company records one at a time, in RAW order."""
+    for idx, raw in enumerate(RAW):
+        yield build_company(idx, raw)
 
 
 # ── Build aggregates ───────────────────────────────────────────────────────────
-def build_aggregates(companies):
-    total = len(companies)
-    email_count = sum(1 for c in companies if c["emailSent"])
-    meeting_count = sum(1 for c in companies if c["meetingHeld"])
-    agreement_sent_count = sum(1 for c in companies if c["agreementSent"])
-    agreement_signed_count = sum(1 for c in companies if c["agreementSigned"])
-    paid_count = sum(1 for c in companies if c["paid"])
-
-    funnel = {
-        "total": total,
-        "emailSent": email_count,
-        "meetingHeld": meeting_count,
-        "agreementSent": agreement_sent_count,
-        "agreementSigned": agreement_signed_count,
-        "paid": paid_count,
-    }
+# Aggregate section -> aggregate_row() fields it reads (drives incremental rebuilds)
+AGGREGATE_SECTIONS = {
+    "funnel": ["flags"],
+    "statusBreakdown": ["status"],
+    "phases": ["status", "steps"],
+    "industryBreakdown": ["industry"],
+    "sizeBreakdown": ["companySize"],
+    "recruitmentIndex": ["id", "flags", "status"],
+    "cohortFunnel": ["cohort", "flags"],
+    "cohortPhases": ["cohort", "status", "steps"],
+    "bottlenecks": ["id", "status", "steps"],
+}
 
-    status_counts = {}
-    for c in companies:
-        s = c["status"] if c["status"] else "(ריק)"
-        status_counts[s] = status_counts.get(s, 0) + 1
 
-    # Phase completion (for "כן" companies only)
-    yes_companies = [c for c in companies if c["status"] == "כן"]
+class _Dictionary:
+    """Dictionary-encodes labels in first-seen order, so decoding the codes in
+    order reproduces the key order of a row-by-row dict count."""
 
-    def phase_stats(phase_name, keys):
-        stats = []
-        for key in keys:
-            yes_count = sum(
-                1 for c in yes_companies
-                if c["process"][phase_name].get(key) == "כן"
-            )
-            in_progress = sum(
-                1 for c in yes_companies
-                if c["process"][phase_name].get(key) == "בתהליך"
+    def __init__(self):
+        self.labels = []
+        self._codes = {}
+
+    def code(self, label):
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+
+def _count_codes(codes, size):
+    """Histogram of dictionary codes: one bincount with NumPy, C-level counts otherwise."""
+    if np is not None and len(codes):
+        counts = np.bincount(np.frombuffer(codes, dtype=np.uint32), minlength=size)
+        return [int(n) for n in counts]
+    return [codes.count(i) for i in range(size)]
+
+
+_BIT_TABLES = {
+    bit: bytes(1 if b & bit else 0 for b in range(256)) for bit in FUNNEL_BITS.values()
+}
+
+
+class CompanyColumns:
+    """Columnar pack of the fields build_aggregates needs.
+
+    Each company is visited once: funnel booleans go into a byte column of
+    FUNNEL_BITS masks, status/industry/size into dictionary-coded columns, and the step
+    states of "כן" companies into a flat row-major byte matrix of
+    STEP_COUNT codes per company. Statuses are also kept as status_code()
+    bytes, so recruitment statuses are classified for the whole column at
+    once. All counts are then taken column-wise.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.ids = []
+        self.flags = bytearray()
+        self.status_codes = bytearray()
+        self.cohorts = array("I")            # 0 for companies without a cohort
+        self.status = array("I")
+        self.industry = array("I")
+        self.size = array("I")
+        self.status_dict = _Dictionary()
+        self.industry_dict = _Dictionary()
+        self.size_dict = _Dictionary()
+        self.yes_steps = bytearray()
+        self.yes_cohorts = array("I")
+        self.yes_ids = []
+        self.yes_total = 0
+
+    @classmethod
+    def from_companies(cls, companies):
+        columns = cls()
+        for c in companies:
+            if isinstance(c, CompanyRecord):
+                columns.append_record(c)
+            else:
+                columns.append(c)
+        return columns
+
+    def append(self, c):
+        """Add a company in the JSON schema (dict)."""
+        steps = None
+        if c["status"] == "כן":
+            process = c["process"]
+            steps = bytes(
+                STEP_CODES.get(process[phase_name].get(key), STEP_UNKNOWN)
+                for phase_name, _, keys in PHASE_DEFS
+                for key in keys
             )
-            stats.append({
-                "step": key,
-                "completed": yes_count,
-                "inProgress": in_progress,
-                "total": len(yes_companies),
+        flags = flags_mask(*(c[field] for field in FUNNEL_FIELDS))
+        self.add(c["id"], flags, c["status"], c["industry"], c["companySize"], steps, c.get("cohort"))
+
+    def append_record(self, record):
+        self.add(record.id, record.flags, record.status, record.industry, record.company_size,
+                 record.steps, record.cohort)
+
+    def append_row(self, row):
+        """Add a company from its cached aggregate_row()."""
+        self.add(row["id"], row["flags"], row["status"], row["industry"], row["companySize"],
+                 bytes.fromhex(row["steps"]), row["cohort"])
+
+    def add(self, cid, flags, status, industry, size, steps, cohort=None):
+        self.total += 1
+        self.ids.append(cid)
+        self.flags.append(flags)
+        self.status_codes.append(status_code(status))
+        cohort = cohort if type(cohort) is int and cohort > 0 else 0
+        self.cohorts.append(cohort)
+
+        self.status.append(self.status_dict.code(status if status else "(ריק)"))
+        self.industry.append(self.industry_dict.code(industry if industry else "(לא מוגדר)"))
+        self.size.append(self.size_dict.code(size if size else "(לא מוגדר)"))
+
+        # Phase completion is reported for "כן" companies only
+        if status == "כן":
+            self.yes_total += 1
+            self.yes_steps.extend(steps)
+            self.yes_cohorts.append(cohort)
+            self.yes_ids.append(cid)
+
+    def flag_count(self, field):
+        bit = FUNNEL_BITS[field]
+        if np is not None and self.total:
+            return int(np.count_nonzero(np.frombuffer(bytes(self.flags), dtype=np.uint8) & bit))
+        # Map every byte with `bit` set to 1 and the rest to 0, then count in C
+        return self.flags.translate(_BIT_TABLES[bit]).count(1)
+
+    def step_counts(self, code):
+        """Per-step count of "כן" companies whose step state equals `code`."""
+        if np is not None and self.yes_total:
+            matrix = np.frombuffer(bytes(self.yes_steps), dtype=np.uint8).reshape(self.yes_total, STEP_COUNT)
+            return [int(n) for n in (matrix == code).sum(axis=0)]
+        return [self.yes_steps[j::STEP_COUNT].count(code) for j in range(STEP_COUNT)]
+
+    def breakdown(self, codes, dictionary):
+        counts = _count_codes(codes, len(dictionary.labels))
+        return dict(zip(dictionary.labels, counts))
+
+    def cohort_funnel_section(self):
+        """Cohort x funnel stage: companies per cohort that reached each stage."""
+        keys = sorted(set(self.cohorts) - {0})
+        if np is not None and keys:
+            cohorts = np.asarray(self.cohorts, dtype=np.int64)
+            onehot = (cohorts[None, :] == np.asarray(keys)[:, None]).astype(np.int64)
+            flags = np.frombuffer(bytes(self.flags), dtype=np.uint8)
+            bits = np.asarray([FUNNEL_BITS[f] for f in FUNNEL_FIELDS], dtype=np.uint8)
+            reached = ((flags[:, None] & bits[None, :]) != 0).astype(np.int64)
+            totals = [int(n) for n in onehot.sum(axis=1)]
+            counts = [[int(n) for n in row] for row in onehot @ reached]
+        else:
+            row_of = {key: i for i, key in enumerate(keys)}
+            totals = [0] * len(keys)
+            counts = [[0] * len(FUNNEL_FIELDS) for _ in keys]
+            for cohort, flags in zip(self.cohorts, self.flags):
+                if cohort:
+                    i = row_of[cohort]
+                    totals[i] += 1
+                    for j, field in enumerate(FUNNEL_FIELDS):
+                        if flags & FUNNEL_BITS[field]:
+                            counts[i][j] += 1
+        return {"cohorts": keys, "stages": FUNNEL_FIELDS, "total": totals, "counts": counts}
+
+    def cohort_phases_section(self):
+        """Cohort x process phase for "כן" companies: completed and known steps.
+
+        `percent` is completed / known rounded half up, the figure the
+        dashboard's cohort chart shows.
+        """
+        keys = sorted(set(self.yes_cohorts) - {0})
+        bounds = []
+        offset = 0
+        for _, _, step_keys in PHASE_DEFS:
+            bounds.append((offset, offset + len(step_keys)))
+            offset += len(step_keys)
+
+        if np is not None and keys:
+            cohorts = np.asarray(self.yes_cohorts, dtype=np.int64)
+            onehot = (cohorts[None, :] == np.asarray(keys)[:, None]).astype(np.int64)
+            matrix = np.frombuffer(bytes(self.yes_steps), dtype=np.uint8).reshape(self.yes_total, STEP_COUNT)
+            starts = [start for start, _ in bounds]
+            completed = np.add.reduceat(onehot @ (matrix == STEP_YES).astype(np.int64), starts, axis=1)
+            known = np.add.reduceat(onehot @ (matrix != STEP_CODES[None]).astype(np.int64), starts, axis=1)
+            companies = [int(n) for n in onehot.sum(axis=1)]
+            completed = [[int(n) for n in row] for row in completed]
+            known = [[int(n) for n in row] for row in known]
+        else:
+            row_of = {key: i for i, key in enumerate(keys)}
+            companies = [0] * len(keys)
+            completed = [[0] * len(bounds) for _ in keys]
+            known = [[0] * len(bounds) for _ in keys]
+            for n, cohort in enumerate(self.yes_cohorts):
+                if not cohort:
+                    continue
+                i = row_of[cohort]
+                companies[i] += 1
+                row = self.yes_steps[n * STEP_COUNT:(n + 1) * STEP_COUNT]
+                for j, (start, end) in enumerate(bounds):
+                    phase = row[start:end]
+                    completed[i][j] += phase.count(STEP_YES)
+                    known[i][j] += len(phase) - phase.count(STEP_CODES[None])
+
+        percent = [[(200 * c + k) // (2 * k) if k else 0 for c, k in zip(c_row, k_row)]
+                   for c_row, k_row in zip(completed, known)]
+        return {
+            "cohorts": keys,
+            "phases": [name for name, _, _ in PHASE_DEFS],
+            "companies": companies,
+            "completed": completed,
+            "known": known,
+            "percent": percent,
+        }
+
+    def funnel_section(self):
+        funnel = {"total": self.total}
+        for field in FUNNEL_FIELDS:
+            funnel[field] = self.flag_count(field)
+        return funnel
+
+    def phases_section(self):
+        completed = self.step_counts(STEP_YES)
+        in_progress = self.step_counts(STEP_IN_PROGRESS)
+
+        phases = []
+        offset = 0
+        for phase_name, display_name, keys in PHASE_DEFS:
+            steps = []
+            for j, key in enumerate(keys, offset):
+                steps.append({
+                    "step": key,
+                    "completed": completed[j],
+                    "inProgress": in_progress[j],
+                    "total": self.yes_total,
+                })
+            offset += len(keys)
+            phases.append({
+                "name": phase_name,
+                "displayName": display_name,
+                "steps": steps,
             })
-        return stats
-
-    phases = [
-        {
-            "name": "learning",
-            "displayName": "למידה",
-            "steps": phase_stats("learning", LEARNING_KEYS),
-        },
-        {
-            "name": "development",
-            "displayName": "פיתוח",
-            "steps": phase_stats("development", DEVELOPMENT_KEYS),
-        },
-        {
-            "name": "marketing",
-            "displayName": "שיווק",
-            "steps": phase_stats("marketing", MARKETING_KEYS),
-        },
-    ]
+        return phases
+
+    def bottlenecks_section(self):
+        """Where each "כן" company is stuck: its frontier, the first step that is not "כן".
+
+        Steps run learning -> development -> marketing. The frontier of one
+        company is the length of the leading run of STEP_YES bytes in its
+        step row, found by one lstrip in C. `stuck` is the histogram over
+        steps, `atStep` lists the companies at each step that has any, and
+        `frontier` maps every company id to its step key (null once every
+        step is done).
+        """
+        keys = [f"{phase}.{key}" for phase, _, step_keys in PHASE_DEFS for key in step_keys]
+        done = bytes([STEP_YES])
+        stuck = [0] * STEP_COUNT
+        in_progress = [0] * STEP_COUNT
+        at_step = {}
+        frontier = {}
+        complete = 0
+        steps = bytes(self.yes_steps)
+        for n, cid in enumerate(self.yes_ids):
+            row = steps[n * STEP_COUNT:(n + 1) * STEP_COUNT]
+            j = STEP_COUNT - len(row.lstrip(done))
+            if j == STEP_COUNT:
+                complete += 1
+                frontier[cid] = None
+                continue
+            stuck[j] += 1
+            if row[j] == STEP_IN_PROGRESS:
+                in_progress[j] += 1
+            at_step.setdefault(keys[j], []).append(cid)
+            frontier[cid] = keys[j]
+
+        phase_stuck = {}
+        offset = 0
+        for phase, _, step_keys in PHASE_DEFS:
+            phase_stuck[phase] = sum(stuck[offset:offset + len(step_keys)])
+            offset += len(step_keys)
+        worst = max(range(STEP_COUNT), key=stuck.__getitem__)
+        return {
+            "steps": keys,
+            "stuck": stuck,
+            "inProgress": in_progress,
+            "phaseStuck": phase_stuck,
+            "complete": complete,
+            "bottleneck": keys[worst] if stuck[worst] else None,
+            "atStep": {key: at_step[key] for key in keys if key in at_step},
+            "frontier": frontier,
+        }
 
-    industry_counts = {}
-    for c in companies:
-        ind = c["industry"] if c["industry"] else "(לא מוגדר)"
-        industry_counts[ind] = industry_counts.get(ind, 0) + 1
+    def section(self, name):
+        if name == "funnel":
+            return self.funnel_section()
+        if name == "statusBreakdown":
+            return self.breakdown(self.status, self.status_dict)
+        if name == "phases":
+            return self.phases_section()
+        if name == "industryBreakdown":
+            return self.breakdown(self.industry, self.industry_dict)
+        if name == "sizeBreakdown":
+            return self.breakdown(self.size, self.size_dict)
+        if name == "recruitmentIndex":
+            return recruitment_index(self.recruitment_codes(), self.ids)
+        if name == "cohortFunnel":
+            return self.cohort_funnel_section()
+        if name == "cohortPhases":
+            return self.cohort_phases_section()
+        if name == "bottlenecks":
+            return self.bottlenecks_section()
+        raise KeyError(name)
+
+    def recruitment_codes(self):
+        """RECRUITMENT_LABELS code of every company, classified in one batch."""
+        return classify_recruitment(self.status_codes, self.flags)
+
+    def aggregates(self):
+        return {name: self.section(name) for name in AGGREGATE_SECTIONS}
 
-    size_counts = {}
-    for c in companies:
-        sz = c["companySize"] if c["companySize"] else "(לא מוגדר)"
-        size_counts[sz] = size_counts.get(sz, 0) + 1
 
+def build_aggregates(companies):
+    """Aggregate CompanyRecords or JSON-schema company dicts."""
+    return CompanyColumns.from_companies(companies).aggregates()
+
+
+def history_sections(dataset_path, now=None):
+    """stageTimes / velocity from the dataset's event log, {} if it has none.
+
+    They are computed as of `now`, by default the log's newest event, so an
+    unchanged log gives byte-identical output.
+    """
+    from company_events import history_aggregates  # imports this module
+    return history_aggregates(dataset_path, now)
+
+
+def builtin_columns(cohorts=DEFAULT_COHORTS):
+    """CompanyColumns for the built-in tables, packed straight from RAW.
+
+    Aggregates never read referral or community values, so they do not
+    depend on the seed and need no CompanyRecords; they do depend on the
+    cohort rules.
+    """
+    columns = CompanyColumns()
+    for idx, raw in enumerate(RAW):
+        cid, _, status, email, meet, agree_sent, agree_sign, paid = raw
+        columns.add(
+            cid, flags_mask(email, meet, agree_sent, agree_sign, paid), status,
+            ID_TO_INDUSTRY.get(cid), ID_TO_SIZE.get(cid),
+            PROCESS_STEPS.get(cid, NULL_STEPS),
+            cohort_for(idx, cohorts, cohort_fields(raw)),
+        )
+    return columns
+
+
+# ── Incremental build ──────────────────────────────────────────────────────────
+def _digest(obj):
+    payload = json.dumps(obj, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+# Per-company tables: company_fingerprint covers the entries each company
+# reads, so edits to them must not discard the whole build cache
+DATA_TABLES = frozenset({
+    "RAW", "INDUSTRY_MAP", "SIZE_MAP", "PROCESS_DATA", "OUTCOMES_DATA",
+    "NOTES_COMPANIES", "REQUIREMENTS_COMPANIES", "YES_COMPANIES",
+})
+
+
+def _generator_digest():
+    """Digest of this file's code, leaving out the DATA_TABLES assignments.
+
+    Taken over the syntax tree, so comments, formatting and line shifts
+    do not count either.
+    """
+    with open(os.path.abspath(__file__), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    tree.body = [
+        node for node in tree.body
+        if not (isinstance(node, ast.Assign)
+                and any(isinstance(t, ast.Name) and t.id in DATA_TABLES for t in node.targets))
+    ]
+    return hashlib.sha1(ast.dump(tree).encode("utf-8")).hexdigest()
+
+
+def company_fingerprint(idx, raw, seed=0, cohorts=DEFAULT_COHORTS):
+    """Digest of every input build_company reads for this company."""
+    cid = raw[0]
+    return _digest([
+        list(raw),
+        seed,
+        cohort_for(idx, cohorts, cohort_fields(raw)),
+        PROCESS_DATA.get(cid),
+        OUTCOMES_DATA.get(cid),
+        NOTES_COMPANIES.get(cid),
+        REQUIREMENTS_COMPANIES.get(cid),
+        ID_TO_INDUSTRY.get(cid),
+        ID_TO_SIZE.get(cid),
+        cid in YES_COMPANIES,
+    ])
+
+
+def aggregate_row(record):
+    """The fields of a CompanyRecord that CompanyColumns reads, JSON-ready."""
     return {
-        "funnel": funnel,
-        "statusBreakdown": status_counts,
-        "phases": phases,
-        "industryBreakdown": industry_counts,
-        "sizeBreakdown": size_counts,
+        "id": record.id,
+        "cohort": record.cohort,
+        "flags": record.flags,
+        "status": record.status,
+        "industry": record.industry,
+        "companySize": record.company_size,
+        "steps": record.steps.hex(),
     }
 
 
-# ── Main ───────────────────────────────────────────────────────────────────────
-def main():
-    companies = build_companies()
-    aggregates = build_aggregates(companies)
-
-    output = {
-        "companies": companies,
-        "aggregates": aggregates,
+def section_digests(row):
+    return {
+        name: _digest([row[field] for field in fields])
+        for name, fields in AGGREGATE_SECTIONS.items()
     }
 
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+def record_fragment(company):
+    """Serialize one company exactly as json.dump(indent=2) nests it in the output."""
+    text = json.dumps(company, ensure_ascii=False, indent=2)
+    return "    " + text.replace("\n", "\n    ")
+
+
+# Every key build_company emits, in output order
+RECORD_FIELDS = [
+    "id", "name", "companySize", "industry", "referralSource1",
+    "referralSource2", "cohort", "emailSent", "meetingHeld", "agreementSent",
+    "agreementSigned", "paid", "status", "recruitmentStatus", "notes",
+    "requirements", "process", "outcomes", "community",
+]
+
+
+def raise_for_errors(validator, source):
+    """Stop the build if validate_companies found errors (main reports the warnings)."""
+    errors = validator.errors
+    if errors:
+        lines = "\n".join(f"  {v}" for v in errors)
+        raise ValueError(f"{source}: {len(errors)} validation errors\n{lines}")
+
+
+class _AtomicFile:
+    """Text file written to `path + suffix` and renamed into place on commit()."""
+
+    def __init__(self, path, suffix=".tmp"):
+        self.path = path
+        self.tmp_path = path + suffix
+        self.f = open(self.tmp_path, "w", encoding="utf-8")
+
+    def commit(self):
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.f.closed:
+            self.f.close()
+            os.remove(self.tmp_path)
+
+
+class DatasetWriter(_AtomicFile):
+    """Streams {"companies": [...], "aggregates": {...}} to disk.
+
+    Records are written as they arrive, so only one serialized record is held
+    at a time. The bytes match json.dump(..., ensure_ascii=False, indent=2).
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.count = 0
+        self.f.write('{\n  "companies": ')
+
+    def write_fragment(self, fragment):
+        self.f.write(",\n" if self.count else "[\n")
+        self.f.write(fragment)
+        self.count += 1
+
+    def close(self, aggregates):
+        self.f.write("\n  ]" if self.count else "[]")
+        self.f.write(',\n  "aggregates": ')
+        self.f.write(json.dumps(aggregates, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+        self.f.write("\n}")
+        self.commit()
 
-    print(f"Generated {len(companies)} companies -> {OUTPUT_PATH}")
 
-    # Validation
-    with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
+class CacheWriter(_AtomicFile):
+    """Streams the build cache as JSON lines: one entry per company, then a trailer."""
+
+    def __init__(self, output_path):
+        super().__init__(build_cache_path(output_path))
+
+    def write_entry(self, entry):
+        self.f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+        self.f.write("\n")
+
+    def close(self, aggregates, output_path):
+        trailer = {
+            "version": BUILD_CACHE_VERSION,
+            "generator": _generator_digest(),
+            "search": SEARCH_FORMAT,
+            "output": _output_stamp(output_path),
+            "aggregates": aggregates,
+        }
+        self.f.write(json.dumps(trailer, ensure_ascii=False, separators=(",", ":")))
+        self.f.write("\n")
+        self.commit()
+
+
+def _output_stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def build_cache_path(output_path):
+    """Per-company fingerprints and serialized records from the last build."""
+    base, _ = os.path.splitext(os.path.basename(output_path))
+    return os.path.join(os.path.dirname(output_path), f".{base}.build-cache.jsonl")
+
+
+def load_build_cache(output_path):
+    """Return the previous build's cache, or None if it cannot be trusted.
+
+    The cache is discarded when the generator's code changed or when the
+    output file was modified since (e.g. by the dashboard save server).
+    Edits to the company tables only rebuild the companies they touch.
+    """
+    try:
+        with open(build_cache_path(output_path), "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        cache = json.loads(lines[-1])
+        if (cache.get("version") != BUILD_CACHE_VERSION
+                or cache.get("generator") != _generator_digest()
+                or cache.get("search") != SEARCH_FORMAT
+                or cache.get("output") != _output_stamp(output_path)):
+            return None
+        cache["companies"] = [json.loads(line) for line in lines[:-1]]
+        return cache
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def generate(output_path, cache=None, seed=0, cohorts=DEFAULT_COHORTS, aggregates=None,
+             compact=True, search=True, validator=None):
+    """Build companies one by one and stream them to `output_path`.
+
+    Each record is checked, serialized and written as soon as it is built,
+    and its aggregate row is packed into CompanyColumns, so no full list of
+    records is ever held. With a `cache` from the previous build, companies
+    whose fingerprint is unchanged reuse their cached serialized record, and
+    aggregate sections are recomputed only when a changed company moved a
+    field they read. Precomputed `aggregates` (shared between variants of
+    the same source) are written as given. The time-in-stage and velocity
+    sections come from the event log next to the output (company_events),
+    when there is one, and are never cached. With `compact`, the compact
+    encoding (see compact_dataset) is written next to the output as well,
+    and with `search` the full-text index (see search_index).
+
+    Every rebuilt record goes through validate_companies (`validator`, a
+    CompanyValidator, if the caller wants its warnings); any error aborts
+    the build before the output is replaced.
+
+    Returns (count, aggregates, rebuilt_ids, touched_sections).
+    """
+    from validate_companies import CompanyValidator  # imports this module
+
+    old_entries = cache["companies"] if cache else []
+    old_by_id = {e["id"]: e for e in old_entries}
+
+    columns = CompanyColumns()
+    encoder = CompactEncoder() if compact else None
+    searcher = SearchIndexBuilder() if search else None
+    validator = validator or CompanyValidator()
+    ids = []
+    seen = set()
+    rebuilt = []
+    touched = set()
+
+    with DatasetWriter(output_path) as out, CacheWriter(output_path) as cache_out:
+        for idx, raw in enumerate(RAW):
+            cid = raw[0]
+            if cid in seen:
+                raise ValueError(f"{cid}: duplicate company id")
+            seen.add(cid)
+
+            company = None
+            fingerprint = company_fingerprint(idx, raw, seed, cohorts)
+            entry = old_by_id.get(cid)
+            if entry is None or entry["fingerprint"] != fingerprint:
+                old = entry
+                record = build_company(idx, raw, seed, cohorts)
+                company = record.to_dict()
+                validator.check(company)
+                row = aggregate_row(record)
+                sections = section_digests(row)
+                tf, length = document_terms(company)
+                entry = {
+                    "id": cid,
+                    "fingerprint": fingerprint,
+                    "fragment": record_fragment(company),
+                    "row": row,
+                    "sections": sections,
+                    "search": [tf, length],
+                }
+                rebuilt.append(cid)
+                if old is None:
+                    touched.update(AGGREGATE_SECTIONS)
+                else:
+                    touched.update(name for name in AGGREGATE_SECTIONS
+                                   if old["sections"][name] != sections[name])
+
+            out.write_fragment(entry["fragment"])
+            cache_out.write_entry(entry)
+            columns.append_row(entry["row"])
+            if encoder is not None:
+                encoder.add(company if company is not None else json.loads(entry["fragment"]))
+            if searcher is not None:
+                searcher.add_terms(cid, *entry["search"])
+            ids.append(cid)
+
+        raise_for_errors(validator, output_path)
+
+        # Additions, removals and reordering shift totals and breakdown key order
+        if cache is None or ids != [e["id"] for e in old_entries]:
+            touched.update(AGGREGATE_SECTIONS)
+
+        if aggregates is None:
+            previous = cache["aggregates"] if cache else {}
+            aggregates = {
+                name: columns.section(name) if name in touched else previous[name]
+                for name in AGGREGATE_SECTIONS
+            }
+        cached = aggregates
+        aggregates = {**cached, **history_sections(output_path)}
+        out.close(aggregates)
+        cache_out.close(cached, output_path)
+
+    if encoder is not None:
+        write_compact(compact_path(output_path), encoder.finish(aggregates))
+    if searcher is not None:
+        write_index(search_path(output_path), searcher.finish())
+    return out.count, aggregates, rebuilt, touched
+
+
+# ── Dataset variants ───────────────────────────────────────────────────────────
+BUILTIN_SOURCE = "builtin"
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    """One dataset to generate.
+
+    `source` is BUILTIN_SOURCE (the tables in this file) or the path of an
+    existing companies JSON file to re-emit with fresh aggregates. `seed`
+    salts the referral/community draws of the built-in source. `cohorts`
+    reassigns cohorts; None keeps DEFAULT_COHORTS for the built-in source
+    and the file's own cohorts otherwise.
+    """
+    output: str
+    source: str = BUILTIN_SOURCE
+    seed: int = 0
+    cohorts: Optional[CohortRules] = None
+
+
+def load_variants(path):
+    """Read a JSON list of {"output", "source", "seed", "cohortSplit" | "cohortRules"} specs.
+
+    "cohortSplit": N is shorthand for CohortRules.split(N); "cohortRules"
+    is the CohortRules.from_json form. Relative paths are resolved against
+    the repository root.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+
+    def resolve(p):
+        return p if p == BUILTIN_SOURCE or os.path.isabs(p) else os.path.join(BASE_DIR, p)
+
+    def cohorts(item):
+        if "cohortRules" in item:
+            return CohortRules.from_json(item["cohortRules"])
+        if item.get("cohortSplit") is not None:
+            return CohortRules.split(item["cohortSplit"])
+        return None
+
+    return [
+        VariantSpec(
+            output=resolve(item["output"]),
+            source=resolve(item.get("source", BUILTIN_SOURCE)),
+            seed=item.get("seed", 0),
+            cohorts=cohorts(item),
+        )
+        for item in items
+    ]
+
+
+def load_source_companies(source):
+    with open(source, "r", encoding="utf-8") as f:
         data = json.load(f)
+    # The save server may leave a bare companies array behind
+    return data["companies"] if isinstance(data, dict) else data
 
-    assert len(data["companies"]) == 70, f"Expected 70 companies, got {len(data['companies'])}"
 
-    yes_count = sum(1 for c in data["companies"] if c["status"] == "כן")
-    print(f"  'כן' companies: {yes_count}")
-    print(f"  Funnel: {data['aggregates']['funnel']}")
-    print(f"  Status: {data['aggregates']['statusBreakdown']}")
-    print(f"  Industry: {data['aggregates']['industryBreakdown']}")
-    print(f"  Size: {data['aggregates']['sizeBreakdown']}")
-    print("Validation passed.")
+def load_valid_companies(source, cohorts=None):
+    """Companies of a dataset file, validated first so a broken save aborts early."""
+    from validate_companies import CompanyValidator  # imports this module
+
+    companies = load_source_companies(source)
+    if cohorts is not None:
+        companies = [dict(c, cohort=cohort_for(idx, cohorts, c)) for idx, c in enumerate(companies)]
+    validator = CompanyValidator()
+    for company in companies:
+        validator.check(company)
+    raise_for_errors(validator, source)
+    return companies
+
+
+def source_aggregates(source, cohorts=None):
+    if source == BUILTIN_SOURCE:
+        return builtin_columns(cohorts or DEFAULT_COHORTS).aggregates()
+    return {**build_aggregates(load_valid_companies(source, cohorts)), **history_sections(source)}
+
+
+def generate_from_file(source, output_path, cohorts=None, aggregates=None, compact=True,
+                       search=True):
+    """Re-emit the companies of an existing dataset file with aggregates.
+
+    The source's event log, if it has one, supplies the history sections.
+    """
+    companies = load_valid_companies(source, cohorts)
+    columns = CompanyColumns() if aggregates is None else None
+    encoder = CompactEncoder() if compact else None
+    searcher = SearchIndexBuilder() if search else None
+    with DatasetWriter(output_path) as out:
+        for company in companies:
+            out.write_fragment(record_fragment(company))
+            if columns is not None:
+                columns.append(company)
+            if encoder is not None:
+                encoder.add(company)
+            if searcher is not None:
+                searcher.add(company)
+        if aggregates is None:
+            aggregates = {**columns.aggregates(), **history_sections(source)}
+        out.close(aggregates)
+    if encoder is not None:
+        write_compact(compact_path(output_path), encoder.finish(aggregates))
+    if searcher is not None:
+        write_index(search_path(output_path), searcher.finish())
+    return out.count
+
+
+def run_variant(spec, aggregates, incremental=False, compact=True, search=True):
+    """Process-pool entry point: generate one variant with shared aggregates."""
+    os.makedirs(os.path.dirname(os.path.abspath(spec.output)), exist_ok=True)
+    if spec.source == BUILTIN_SOURCE:
+        cache = load_build_cache(spec.output) if incremental else None
+        cohorts = DEFAULT_COHORTS if spec.cohorts is None else spec.cohorts
+        count, _, _, _ = generate(spec.output, cache, spec.seed, cohorts, aggregates, compact, search)
+    else:
+        count = generate_from_file(spec.source, spec.output, spec.cohorts, aggregates, compact, search)
+    return count
+
+
+def generate_variants(specs, jobs=None, incremental=False, compact=True, search=True):
+    """Generate every variant concurrently; returns [(spec, count)] in input order.
+
+    Aggregates depend only on the source and cohort rules, so they are
+    computed once per distinct pair here and handed to every worker that
+    shares it.
+    """
+    outputs = [os.path.abspath(spec.output) for spec in specs]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError("variant specs must have distinct output paths")
+
+    shared = {}
+    for spec in specs:
+        key = (spec.source, spec.cohorts)
+        if key not in shared:
+            shared[key] = source_aggregates(spec.source, spec.cohorts)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(run_variant, spec, shared[spec.source, spec.cohorts], incremental, compact, search)
+            for spec in specs
+        ]
+        return [(spec, future.result()) for spec, future in zip(specs, futures)]
+
+
+# ── Main ───────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-serialize only companies whose inputs changed since the last build")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="output path (default: %(default)s)")
+    parser.add_argument("--variants", metavar="SPECS_JSON",
+                        help="generate every variant listed in SPECS_JSON concurrently instead of --output")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="worker processes for --variants (default: CPU count)")
+    parser.add_argument("--no-compact", dest="compact", action="store_false",
+                        help="skip writing the compact encoding next to each output")
+    parser.add_argument("--no-search", dest="search", action="store_false",
+                        help="skip writing the full-text search index next to each output")
+    parser.add_argument("--verify-output", action="store_true",
+                        help="re-read and validate the whole written file afterwards")
+    args = parser.parse_args(argv)
+
+    for line in unmatched_joins():
+        print(f"  ! {line}")
+
+    if args.variants:
+        specs = load_variants(args.variants)
+        for spec, count in generate_variants(specs, args.jobs, args.incremental, args.compact,
+                                             args.search):
+            print(f"Generated {count} companies -> {spec.output} "
+                  f"(source={os.path.basename(spec.source)}, seed={spec.seed}, "
+                  f"cohorts={'default' if spec.cohorts is None else 'custom'})")
+        return
+
+    output_path = args.output
+
+    cache = load_build_cache(output_path) if args.incremental else None
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    from validate_companies import ERROR, CompanyValidator, validate_file  # imports this module
+
+    validator = CompanyValidator()
+    count, aggregates, rebuilt, touched = generate(output_path, cache, compact=args.compact,
+                                                   search=args.search, validator=validator)
+
+    print(f"Generated {count} companies -> {output_path}")
+    if args.compact:
+        print(f"  Compact encoding -> {compact_path(output_path)}")
+    if args.search:
+        print(f"  Search index -> {search_path(output_path)}")
+    if args.incremental:
+        sections = ", ".join(name for name in AGGREGATE_SECTIONS if name in touched) or "none"
+        print(f"  Rebuilt {len(rebuilt)}/{count} companies; aggregate sections updated: {sections}")
+
+    print(f"  'כן' companies: {aggregates['statusBreakdown'].get('כן', 0)}")
+    print(f"  Funnel: {aggregates['funnel']}")
+    print(f"  Status: {aggregates['statusBreakdown']}")
+    print(f"  Industry: {aggregates['industryBreakdown']}")
+    print(f"  Size: {aggregates['sizeBreakdown']}")
+
+    # Records were validated as they were built; cached ones when they were first built
+    for v in validator.warnings:
+        print(f"  {v}")
+    scope = " in rebuilt records" if args.incremental else ""
+    print(f"Validation passed ({len(validator.warnings)} warnings{scope}).")
+
+    if args.verify_output:
+        # Opt-in: re-reads the whole file to re-check cached records and the aggregates
+        violations = validate_file(output_path)
+        for v in violations:
+            print(f"  {v}")
+        errors = sum(v.level == ERROR for v in violations)
+        if errors:
+            raise SystemExit(f"Output verification failed: {errors} errors.")
+        print(f"Output verified ({len(violations)} warnings).")
 
 
 if __name__ == "__main__":
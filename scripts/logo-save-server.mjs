@@ -6,6 +6,7 @@
  * Endpoints:
  *   POST /save-logo      — saves a logo image to public/logos/{id}.png
  *   POST /save-logo-bulk  — saves multiple logos at once
+ *   (both rebuild the sprite sheet with logo_images.py afterwards)
  *   GET  /saved-logos     — returns list of company IDs that have saved logos
  *   GET  /health          — health check
  *
@@ -15,8 +16,9 @@
  */
 
 import { createServer } from 'http'
-import { writeFile, readdir, stat, mkdir } from 'fs/promises'
-import { join, dirname } from 'path'
+import { execFile } from 'child_process'
+import { writeFile, readFile, readdir, stat, mkdir, rename } from 'fs/promises'
+import { join, dirname, sep } from 'path'
 import { fileURLToPath } from 'url'
 import { existsSync } from 'fs'
 
@@ -24,6 +26,8 @@ const __dirname = dirname(fileURLToPath(import.meta.url))
 const PROJECT_ROOT = join(__dirname, '..')
 const LOGOS_DIR = join(PROJECT_ROOT, 'public', 'logos')
 const CANDIDATES_DIR = join(LOGOS_DIR, 'candidates')
+const SPRITE_BUILDER = join(__dirname, 'logo_images.py')
+const SPRITE_MAP = join(PROJECT_ROOT, 'src', 'shaveh', 'data', 'logo_sprite.json')
 
 const PORT = 3456
 
@@ -66,6 +70,40 @@ async function getSavedLogos() {
   }
 }
 
+// ── Sprite ────────────────────────────────────────────────────────────────────
+// CompanyLogo draws a company from the sprite sheet whenever the sprite map
+// has a cell for it, so a saved logo only shows once the sheet is rebuilt.
+// Rebuilds run one at a time. When logo_images.py cannot run (no python3 or
+// no Pillow) the saved companies are dropped from the map instead, so the
+// dashboard falls back to their logos/<id>.png until the next rebuild.
+let spriteQueue = Promise.resolve()
+
+function rebuildSprite(companyIds) {
+  spriteQueue = spriteQueue.then(() => new Promise(resolve => {
+    execFile('python3', [SPRITE_BUILDER], { cwd: __dirname }, async err => {
+      if (!err) {
+        console.log('  Rebuilt logo sprite')
+      } else {
+        console.warn(`  Sprite rebuild failed (${err.message.split('\n')[0]}); un-spriting ${companyIds.join(', ')}`)
+        await dropFromSprite(companyIds).catch(e => console.error(`  Failed to update ${SPRITE_MAP}: ${e.message}`))
+      }
+      resolve()
+    })
+  }))
+  return spriteQueue
+}
+
+async function dropFromSprite(companyIds) {
+  if (!existsSync(SPRITE_MAP)) return
+  const spriteMap = JSON.parse(await readFile(SPRITE_MAP, 'utf-8'))
+  const before = Object.keys(spriteMap.logos).length
+  for (const id of companyIds) delete spriteMap.logos[id]
+  if (Object.keys(spriteMap.logos).length === before) return
+  const tmp = SPRITE_MAP + '.tmp'
+  await writeFile(tmp, JSON.stringify(spriteMap, null, 2) + '\n')
+  await rename(tmp, SPRITE_MAP)
+}
+
 async function fetchUrlToBuffer(url) {
   // Server-side fetch — no CORS restrictions
   const resp = await fetch(url, {
@@ -80,7 +118,8 @@ async function fetchUrlToBuffer(url) {
 async function saveLogo(companyId, imageData) {
   // imageData can be:
   // 1. A base64 data URL (from canvas or file reader)
-  // 2. A reference to a candidate file { candidateFile: "favicon.png" }
+  // 2. A reference to a candidate file, relative to the company's candidates
+  //    directory { candidateFile: "../_blobs/<sha256>.png" }
   // 3. A remote URL to fetch server-side { remoteUrl: "https://..." }
 
   const outPath = join(LOGOS_DIR, `${companyId}.png`)
@@ -104,12 +143,12 @@ async function saveLogo(companyId, imageData) {
       return false
     }
   } else if (typeof imageData === 'object' && imageData.candidateFile) {
-    // Copy from candidates directory
+    // Copy from candidates directory (shared blobs live in candidates/_blobs)
     const srcPath = join(CANDIDATES_DIR, companyId, imageData.candidateFile)
+    if (!srcPath.startsWith(CANDIDATES_DIR + sep)) return false
     try {
       const srcStat = await stat(srcPath)
       if (srcStat.size > 0) {
-        const { readFile } = await import('fs/promises')
         const data = await readFile(srcPath)
         await writeFile(outPath, data)
         return true
@@ -157,6 +196,7 @@ const server = createServer(async (req, res) => {
       const ok = await saveLogo(companyId, imageData)
       if (ok) {
         console.log(`  Saved logo: ${companyId}.png`)
+        await rebuildSprite([companyId])
         jsonResponse(res, 200, { ok: true, companyId })
       } else {
         jsonResponse(res, 500, { error: 'Failed to save' })
@@ -174,6 +214,8 @@ const server = createServer(async (req, res) => {
         results.push({ companyId: item.companyId, ok })
         if (ok) console.log(`  Saved logo: ${item.companyId}.png`)
       }
+      const savedIds = results.filter(r => r.ok).map(r => r.companyId)
+      if (savedIds.length) await rebuildSprite(savedIds)
       jsonResponse(res, 200, { results })
       return
     }
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Normalize the selected company logos and pack them into one sprite sheet.
+
+Every public/logos/<company_id>.png is checked by its magic bytes, decoded,
+downsized to fit a square cell (2x the largest size the dashboard draws) and
+centred on a transparent background. The cells are packed into a grid and
+written as a single WebP (PNG if this Pillow has no WebP support), with a
+coordinate map the dashboard imports to draw each logo from the sheet:
+
+    public/logos/sprite.webp
+    src/shaveh/data/logo_sprite.json
+
+Decoding and resizing run in a process pool. Requires Pillow.
+
+Usage:
+    python3 scripts/logo_images.py [--cell PX] [--jobs N]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from fetch_logo_candidates import sniff_extension
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is only needed for this stage
+    Image = features = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGOS_DIR = os.path.join(BASE_DIR, "public", "logos")
+SPRITE_MAP_PATH = os.path.join(BASE_DIR, "src", "shaveh", "data", "logo_sprite.json")
+
+# Largest CompanyLogo size is 48 CSS px; cells are drawn at 2x for retina
+DEFAULT_CELL = 96
+
+# Formats Pillow can decode (SVG and anything unrecognised are skipped)
+DECODABLE = {".png", ".jpg", ".gif", ".ico", ".webp"}
+
+
+# ── Per-logo normalization (runs in worker processes) ─────────────────────────
+def load_logo(path):
+    """Read and decode one image file as RGBA with transparent borders trimmed.
+
+    Returns (image, None) or (None, reason).
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return None, f"cannot read: {e.strerror}"
+    kind = sniff_extension(data)
+    if kind not in DECODABLE:
+        return None, f"unsupported format ({kind})"
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            im.load()
+            logo = im.convert("RGBA")
+    except Exception as e:
+        return None, f"cannot decode: {e}"
+
+    # Trim fully transparent borders so padding doesn't shrink the mark
+    bbox = logo.getchannel("A").getbbox()
+    if bbox is None:
+        return None, "image is fully transparent"
+    return logo.crop(bbox), None
+
+
+def normalize_logo(path, cell):
+    """Decode one logo and fit it into a cell×cell RGBA tile.
+
+    Returns (rgba_bytes, None) or (None, reason).
+    """
+    logo, reason = load_logo(path)
+    if logo is None:
+        return None, reason
+
+    logo.thumbnail((cell, cell), Image.LANCZOS)
+    tile = Image.new("RGBA", (cell, cell), (0, 0, 0, 0))
+    tile.paste(logo, ((cell - logo.width) // 2, (cell - logo.height) // 2))
+    return tile.tobytes(), None
+
+
+# ── Sprite sheet ───────────────────────────────────────────────────────────────
+def sprite_format():
+    return ("WEBP", ".webp") if features.check("webp") else ("PNG", ".png")
+
+
+def encode_sheet(tiles, cell):
+    """Pack cell×cell tiles row-major into one image. Returns (bytes, ext, columns, rows)."""
+    columns = max(1, math.ceil(math.sqrt(len(tiles))))
+    rows = max(1, math.ceil(len(tiles) / columns))
+    sheet = Image.new("RGBA", (columns * cell, rows * cell), (0, 0, 0, 0))
+    for i, tile in enumerate(tiles):
+        row, col = divmod(i, columns)
+        sheet.paste(Image.frombytes("RGBA", (cell, cell), tile), (col * cell, row * cell))
+
+    fmt, ext = sprite_format()
+    out = io.BytesIO()
+    if fmt == "WEBP":
+        sheet.save(out, fmt, quality=90, method=6)
+    else:
+        sheet.save(out, fmt, optimize=True)
+    return out.getvalue(), ext, columns, rows
+
+
+def logo_paths(logos_dir):
+    """company_id -> path for every selected logo (public/logos/<id>.png)."""
+    paths = {}
+    for name in sorted(os.listdir(logos_dir)):
+        base, ext = os.path.splitext(name)
+        if ext == ".png" and base != "sprite" and os.path.isfile(os.path.join(logos_dir, name)):
+            paths[base] = os.path.join(logos_dir, name)
+    return paths
+
+
+def build_sprite(logos_dir, map_path, cell=DEFAULT_CELL, jobs=None):
+    """Normalize every logo, write the sheet and its map. Returns (map, skipped)."""
+    paths = logo_paths(logos_dir)
+    ids = list(paths)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(normalize_logo, [paths[cid] for cid in ids], [cell] * len(ids)))
+
+    tiles, logos, skipped = [], {}, {}
+    for cid, (tile, reason) in zip(ids, results):
+        if tile is None:
+            skipped[cid] = reason
+            continue
+        logos[cid] = len(tiles)
+        tiles.append(tile)
+
+    data, ext, columns, rows = encode_sheet(tiles, cell)
+    sprite_name = "sprite" + ext
+    for stale in (".webp", ".png"):
+        stale_path = os.path.join(logos_dir, "sprite" + stale)
+        if stale != ext and os.path.exists(stale_path):
+            os.remove(stale_path)
+    with open(os.path.join(logos_dir, sprite_name), "wb") as f:
+        f.write(data)
+
+    sprite_map = {
+        # Content hash busts the browser cache when the sheet changes
+        "image": f"logos/{sprite_name}?v={hashlib.sha256(data).hexdigest()[:12]}",
+        "cell": cell,
+        "columns": columns,
+        "rows": rows,
+        "bytes": len(data),
+        "logos": logos,
+    }
+    with open(map_path, "w", encoding="utf-8") as f:
+        json.dump(sprite_map, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return sprite_map, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack the selected logos into one sprite sheet.")
+    parser.add_argument("--cell", type=int, default=DEFAULT_CELL,
+                        help="tile size in pixels (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--logos-dir", default=LOGOS_DIR,
+                        help="directory of <company_id>.png logos; the sheet is written here too")
+    parser.add_argument("--map", default=SPRITE_MAP_PATH, help="coordinate map output path")
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        sys.exit("logo_images.py requires Pillow (pip install Pillow)")
+
+    sprite_map, skipped = build_sprite(args.logos_dir, args.map, cell=args.cell, jobs=args.jobs)
+    source_bytes = sum(os.path.getsize(p) for p in logo_paths(args.logos_dir).values())
+    for cid, reason in sorted(skipped.items()):
+        print(f"  ! {cid}: {reason}")
+    print(f"Sprite: {len(sprite_map['logos'])} logos, {sprite_map['columns']}x{sprite_map['rows']} "
+          f"cells of {sprite_map['cell']}px, {sprite_map['bytes']:,} bytes "
+          f"(sources: {source_bytes:,} bytes)")
+    print(f"  Image: {os.path.join(args.logos_dir, sprite_map['image'].split('/')[-1].split('?')[0])}")
+    print(f"  Map:   {args.map}")
+
+
+if __name__ == "__main__":
+    main()
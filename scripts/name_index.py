@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Normalized name keys and a lookup index for joining plants and companies.
+
+normalize() turns a Hebrew (or Latin) name into a comparable form:
+
+  - niqqud and cantillation marks are removed,
+  - geresh / gershayim and ASCII or typographic quotes are removed
+    (מש"א, מש״א and משא are the same key),
+  - whitespace of any kind, direction marks, underscores, hyphens and maqaf
+    collapse to single spaces,
+  - Latin letters are case-folded.
+
+name_key() drops the spaces as well, and is what NameIndex matches exactly
+(one dict lookup). When that misses, the index falls back to an inverted
+index of character trigrams (final letters folded to their regular forms),
+so a fuzzy lookup only scores names that share a trigram with the query
+instead of scanning every name. Misses are recorded for reporting when the
+caller asks.
+
+Ids are not names: an index built with key=str matches them verbatim, so
+two ids that differ only in "_" and "-" stay two records.
+"""
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+_MARKS = re.compile("[\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7]")   # niqqud, cantillation
+_QUOTES = re.compile("[\"'`\u05F3\u05F4\u2018\u2019\u201C\u201D/]")         # geresh, gershayim, quotes
+_SEPARATORS = re.compile("[\\s\u00A0\u05BE\u200E\u200F\u202A-\u202E_\\-]+")   # spaces, maqaf, bidi marks
+_FINALS = str.maketrans("ךםןףץ", "כמנפצ")
+
+# Trailing company-form words that never distinguish two names
+LEGAL_SUFFIXES = ("בעמ", "ltd", "inc")
+
+# Names scoring below this (Dice over trigrams) are reported, not guessed
+DEFAULT_MIN_SCORE = 0.6
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFC", str(text))
+    text = _MARKS.sub("", text)
+    text = _QUOTES.sub("", text)
+    text = _SEPARATORS.sub(" ", text)
+    return text.strip().casefold()
+
+
+def name_key(text):
+    key = normalize(text).replace(" ", "")
+    for suffix in LEGAL_SUFFIXES:
+        if key.endswith(suffix) and len(key) > len(suffix):
+            key = key[:-len(suffix)]
+    return key
+
+
+def trigrams(key):
+    padded = f"^{key.translate(_FINALS)}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """name -> value lookups, exact on `key` (name_key()) and fuzzy on trigrams.
+
+    Aliases map extra spellings to the same value. For ids pass key=str and
+    fuzzy=False: ids then match verbatim (a near miss is a different record)
+    and the trigram index is used just to suggest what a miss probably
+    meant. `unmatched` counts the misses of lookups made with record=True.
+    """
+
+    def __init__(self, min_score=DEFAULT_MIN_SCORE, fuzzy=True, key=name_key):
+        self.min_score = min_score
+        self.fuzzy = fuzzy
+        self.key = key
+        self._values = {}                  # key -> value
+        self._names = {}                   # key -> name as first added
+        self._grams = defaultdict(set)     # trigram -> keys
+        self._gram_counts = {}             # key -> number of trigrams
+        self.unmatched = Counter()
+
+    @classmethod
+    def from_mapping(cls, mapping, aliases=None, **kwargs):
+        """Index `mapping`'s keys; `aliases` is {alias: canonical name}."""
+        index = cls(**kwargs)
+        for name, value in mapping.items():
+            index.add(name, value)
+        for alias, name in (aliases or {}).items():
+            index.add_alias(alias, name)
+        return index
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, name):
+        return self.key(name) in self._values
+
+    def add(self, name, value):
+        key = self.key(name)
+        if not key:
+            return
+        if key not in self._values:
+            self._names[key] = name
+            grams = trigrams(key)
+            self._gram_counts[key] = len(grams)
+            for gram in grams:
+                self._grams[gram].add(key)
+        self._values[key] = value
+
+    def add_alias(self, alias, name):
+        key = self.key(name)
+        if key not in self._values:
+            raise KeyError(f"alias {alias!r} points at unknown name {name!r}")
+        self.add(alias, self._values[key])
+
+    def _closest(self, key):
+        """(key, Dice score) of the indexed key sharing the most trigrams with `key`."""
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            for candidate in self._grams.get(gram, ()):
+                shared[candidate] += 1
+        best, best_score = None, 0.0
+        for candidate, count in shared.items():
+            score = 2 * count / (len(grams) + self._gram_counts[candidate])
+            if score > best_score:
+                best, best_score = candidate, score
+        return best, best_score
+
+    def match(self, name, record=False):
+        """(value, score) for `name`; score is 1.0 for an exact key, (None, 0.0) on a miss.
+
+        With `record`, a miss is counted in `unmatched` for report().
+        """
+        key = self.key(name)
+        if key in self._values:
+            return self._values[key], 1.0
+        if self.fuzzy:
+            best, score = self._closest(key)
+            if best is not None and score >= self.min_score:
+                return self._values[best], score
+        if record:
+            self.unmatched[name] += 1
+        return None, 0.0
+
+    def suggest(self, name):
+        """The indexed name closest to `name`, or None if nothing comes near."""
+        best, score = self._closest(self.key(name))
+        return None if best is None or score < self.min_score / 2 else self._names[best]
+
+    def get(self, name, default=None, record=False):
+        value, score = self.match(name, record)
+        return default if score == 0.0 else value
+
+    def report(self):
+        """One line per name that matched nothing, with the closest known name."""
+        lines = []
+        for name in self.unmatched:
+            suggestion = self.suggest(name)
+            lines.append(repr(name) if suggestion is None else f"{name!r} (closest: {suggestion!r})")
+        return lines
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Plant metrics for the Zionism 2000 dashboard, computed in one pass.
+
+compute_metrics() walks data["plants"] once and accumulates every summary
+figure - totals and per-group breakdowns by sector, geography and stage -
+plus the overall activity period. Results are cached next to plants.json,
+keyed by the file's content hash, so repeated exports skip the work.
+
+Program-wide figures that come from the phase table rather than from the
+plants (CEOs reached, HR managers trained) are derived by program_totals().
+
+Usage:
+    python3 scripts/plants_metrics.py [--group-by sector|geography|stage]
+    python3 scripts/plants_metrics.py --write-summary    # refresh plants.json "summary"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from plants_timeline import activity_range, month_key
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PLANTS_JSON = BASE_DIR / "src" / "data" / "plants.json"
+
+# Bump when the shape of the cached metrics changes
+METRICS_VERSION = 2
+
+# metric name -> plant field summed into it
+SUM_FIELDS = {
+    "participants": "totalParticipants",
+    "sessions": "totalSessions",
+    "ceos": "ceoCount",
+    "hrManagers": "hrManagerCount",
+    "mgmt": "mgmtParticipants",
+    "midMgmt": "midMgmtParticipants",
+    "workers": "workerParticipants",
+}
+GROUP_FIELDS = ("sector", "geography", "stage")
+
+STAGE_PILOT = "פיילוט"
+STAGE_ACTIVE = "תכנית פעילה"
+
+HEBREW_MONTHS = [
+    "ינואר", "פברואר", "מרץ", "אפריל", "מאי", "יוני",
+    "יולי", "אוגוסט", "ספטמבר", "אוקטובר", "נובמבר", "דצמבר",
+]
+
+
+def _empty_bucket():
+    bucket = dict.fromkeys(SUM_FIELDS, 0)
+    bucket["plants"] = 0
+    bucket["threeLayers"] = 0
+    return bucket
+
+
+# ── Engine ─────────────────────────────────────────────────────────────────────
+def compute_metrics(plants):
+    """Totals, group-bys and activity period for a list of plants, in one pass.
+
+    Groups keep the order in which their keys first appear in the data.
+    """
+    totals = _empty_bucket()
+    groups = {field: {} for field in GROUP_FIELDS}
+    start = end = None
+
+    for p in plants:
+        three_layers = p["mgmtParticipants"] > 0 and p["midMgmtParticipants"] > 0 and p["workerParticipants"] > 0
+        buckets = [totals]
+        for field in GROUP_FIELDS:
+            group = groups[field]
+            bucket = group.get(p[field])
+            if bucket is None:
+                bucket = group[p[field]] = _empty_bucket()
+            buckets.append(bucket)
+        for bucket in buckets:
+            bucket["plants"] += 1
+            bucket["threeLayers"] += three_layers
+            for metric, field in SUM_FIELDS.items():
+                bucket[metric] += p[field]
+
+        first, last = activity_range(p["activityPeriod"])
+        start = first if start is None else min(start, first)
+        end = last if end is None else max(end, last)
+
+    metrics = {"totals": totals, "groups": groups}
+    if start is not None:
+        metrics["period"] = {"start": month_key(start), "end": month_key(end), "months": end - start + 1}
+    return metrics
+
+
+def program_totals(phases):
+    """Program-wide CEO and HR-manager counts from the phase table.
+
+    Every CEO was reached in the first (exposure) phase, so the CEO figure is
+    the largest phase count; HR managers were trained separately per phase and
+    add up.
+    """
+    return {
+        "ceos": max((phase["ceos"] for phase in phases), default=0),
+        "hrManagers": sum(phase["hr_managers"] for phase in phases),
+    }
+
+
+def summary_block(metrics, phases):
+    """The plants.json "summary" block the dashboard reads."""
+    totals = metrics["totals"]
+    stages = metrics["groups"]["stage"]
+    program = program_totals(phases)
+    return {
+        "totalPlants": totals["plants"],
+        "totalParticipants": totals["participants"],
+        "totalSessions": totals["sessions"],
+        "totalCEOs": program["ceos"],
+        "totalHRManagers": program["hrManagers"],
+        "pilotCount": stages.get(STAGE_PILOT, {}).get("plants", 0),
+        "activeProgramCount": stages.get(STAGE_ACTIVE, {}).get("plants", 0),
+    }
+
+
+def format_month(key):
+    """"2023-12" -> "דצמבר 2023"."""
+    year, month = key.split("-")
+    return f"{HEBREW_MONTHS[int(month) - 1]} {year}"
+
+
+# ── Cache ──────────────────────────────────────────────────────────────────────
+def cache_path(plants_path):
+    plants_path = Path(plants_path)
+    return plants_path.with_name(f".{plants_path.stem}.metrics-cache.json")
+
+
+_memo = {}
+
+
+def load_metrics(plants_path=PLANTS_JSON):
+    """(data, metrics) for a plants.json file, reusing cached metrics when unchanged."""
+    with open(plants_path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
+    digest = hashlib.sha256(raw).hexdigest()
+
+    if digest in _memo:
+        return data, _memo[digest]
+
+    path = cache_path(plants_path)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("version") == METRICS_VERSION and cached.get("digest") == digest:
+            _memo[digest] = cached["metrics"]
+            return data, cached["metrics"]
+    except (OSError, ValueError):
+        pass
+
+    metrics = compute_metrics(data["plants"])
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": METRICS_VERSION, "digest": digest, "metrics": metrics}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # read-only checkout: the in-process memo still applies
+    _memo[digest] = metrics
+    return data, metrics
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute plant metrics from plants.json.")
+    parser.add_argument("--plants", type=Path, default=PLANTS_JSON, help="plants.json path")
+    parser.add_argument("--group-by", choices=GROUP_FIELDS, help="print the breakdown for one field")
+    parser.add_argument("--write-summary", action="store_true",
+                        help='rewrite the "summary" block of plants.json from the metrics')
+    args = parser.parse_args(argv)
+
+    data, metrics = load_metrics(args.plants)
+
+    if args.group_by:
+        print(json.dumps(metrics["groups"][args.group_by], ensure_ascii=False, indent=2))
+    else:
+        print(json.dumps(metrics["totals"], ensure_ascii=False, indent=2))
+
+    if args.write_summary:
+        from export_to_sheets import PHASES
+        summary = summary_block(metrics, PHASES)
+        if data.get("summary") == summary:
+            print(f"{args.plants}: summary already up to date")
+            return
+        data["summary"] = summary
+        with open(args.plants, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"{args.plants}: summary updated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Monthly session timeline for the Zionism 2000 plants.
+
+A Timeline holds one dense monthly series per layer (mgmt / midMgmt /
+workers) plus their prefix sums, so the total over any range of months is
+two lookups, and month / quarter / year rollups are one pass.
+
+It can be built from the checked-in plants.json "timeline" block, or
+derived from the plants themselves: each plant's session counts are spread
+evenly over its activityPeriod. The derivation uses a difference array, so
+it costs O(plants + months) however long the activity periods are.
+
+Usage:
+    python3 scripts/plants_timeline.py [--derive] [--period month|quarter|year]
+    python3 scripts/plants_timeline.py [--derive] --range 2024-01 2024-06
+    python3 scripts/plants_timeline.py --derive --write     # replace plants.json "timeline"
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PLANTS_JSON = BASE_DIR / "src" / "data" / "plants.json"
+
+# timeline layer -> plant field whose sessions it counts
+LAYERS = {
+    "mgmt": "mgmtSessions",
+    "midMgmt": "midMgmtSessions",
+    "workers": "workerSessions",
+}
+PERIODS = ("month", "quarter", "year")
+
+
+# ── Month arithmetic ───────────────────────────────────────────────────────────
+def month_index(year, month):
+    return year * 12 + month - 1
+
+
+def parse_month(key):
+    """"2024-03" -> month index."""
+    year, month = key.split("-")
+    return month_index(int(year), int(month))
+
+
+def month_key(index):
+    year, month = divmod(index, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def bucket_key(index, period):
+    year, month = divmod(index, 12)
+    if period == "year":
+        return f"{year:04d}"
+    if period == "quarter":
+        return f"{year:04d}-Q{month // 3 + 1}"
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def activity_range(period):
+    """(first, last) month index of a plant's activityPeriod, inclusive.
+
+    A period whose end precedes its start ("דצמבר 2023 - פברואר 2024" entered
+    with both years as 2024) is read as wrapping over the new year.
+    """
+    first = month_index(period["startYear"], period["startMonth"])
+    last = month_index(period["endYear"], period["endMonth"])
+    if last < first:
+        first -= 12
+    return first, last
+
+
+# ── Engine ─────────────────────────────────────────────────────────────────────
+class Timeline:
+    """Dense monthly series per layer, from month index `start`, with prefix sums.
+
+    `present` optionally limits the months rollups report (a stored timeline
+    may skip months); range totals always cover every month.
+    """
+
+    def __init__(self, start, series, present=None):
+        self.start = start
+        self.series = series
+        self.present = present
+        self.length = len(next(iter(series.values()), []))
+        self.prefix = {}
+        for layer, values in series.items():
+            running = [0.0]
+            for value in values:
+                running.append(running[-1] + value)
+            self.prefix[layer] = running
+
+    @classmethod
+    def from_monthly(cls, timeline):
+        """From a {"YYYY-MM": {layer: value}} dict (months may be missing)."""
+        if not timeline:
+            return cls(0, {layer: [] for layer in LAYERS})
+        indices = {parse_month(key): values for key, values in timeline.items()}
+        start, end = min(indices), max(indices)
+        series = {layer: [0] * (end - start + 1) for layer in LAYERS}
+        for index, values in indices.items():
+            for layer in LAYERS:
+                series[layer][index - start] = values.get(layer, 0)
+        return cls(start, series, present=set(indices))
+
+    @classmethod
+    def from_plants(cls, plants):
+        """Spread each plant's sessions evenly over its activity period."""
+        ranges = [activity_range(p["activityPeriod"]) for p in plants]
+        if not ranges:
+            return cls(0, {layer: [] for layer in LAYERS})
+        start = min(first for first, _ in ranges)
+        end = max(last for _, last in ranges)
+
+        series = {}
+        for layer, field in LAYERS.items():
+            diff = [0.0] * (end - start + 2)
+            for p, (first, last) in zip(plants, ranges):
+                per_month = p[field] / (last - first + 1)
+                diff[first - start] += per_month
+                diff[last - start + 1] -= per_month
+            values, running = [], 0.0
+            for delta in diff[:-1]:
+                running += delta
+                values.append(running)
+            series[layer] = values
+        return cls(start, series)
+
+    def months(self):
+        return [month_key(self.start + i) for i in range(self.length)]
+
+    def range_total(self, layer, first_key=None, last_key=None):
+        """Sum of `layer` over the months first_key..last_key inclusive, in O(1)."""
+        lo = 0 if first_key is None else parse_month(first_key) - self.start
+        hi = self.length if last_key is None else parse_month(last_key) - self.start + 1
+        lo, hi = max(lo, 0), min(hi, self.length)
+        if hi <= lo:
+            return 0.0
+        prefix = self.prefix[layer]
+        return prefix[hi] - prefix[lo]
+
+    def rollup(self, period="month", digits=2):
+        """{bucket: {layer: total}} by month, quarter or year, in time order."""
+        if period not in PERIODS:
+            raise ValueError(f"unknown period {period!r}")
+        buckets = {}
+        for i in range(self.length):
+            if self.present is not None and self.start + i not in self.present:
+                continue
+            bucket = buckets.setdefault(bucket_key(self.start + i, period), dict.fromkeys(LAYERS, 0))
+            for layer in LAYERS:
+                bucket[layer] += self.series[layer][i]
+        return {key: {layer: round(value, digits) for layer, value in values.items()}
+                for key, values in buckets.items()}
+
+
+def load_timeline(data, derive=False):
+    if derive:
+        return Timeline.from_plants(data["plants"])
+    return Timeline.from_monthly(data["timeline"])
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roll up the plants session timeline.")
+    parser.add_argument("--plants", type=Path, default=PLANTS_JSON, help="plants.json path")
+    parser.add_argument("--derive", action="store_true",
+                        help="derive the series from the plants instead of the stored timeline")
+    parser.add_argument("--period", choices=PERIODS, default="month", help="bucket size (default: %(default)s)")
+    parser.add_argument("--range", nargs=2, metavar=("FROM", "TO"), help="print totals for FROM..TO (YYYY-MM)")
+    parser.add_argument("--write", action="store_true",
+                        help='store the monthly series as the plants.json "timeline" block')
+    args = parser.parse_args(argv)
+
+    with open(args.plants, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    timeline = load_timeline(data, derive=args.derive)
+
+    if args.range:
+        totals = {layer: round(timeline.range_total(layer, *args.range), 2) for layer in LAYERS}
+        print(json.dumps(totals, ensure_ascii=False))
+    else:
+        for key, values in timeline.rollup(args.period).items():
+            print(f"{key}: " + ", ".join(f"{layer} {value:g}" for layer, value in values.items()))
+
+    if args.write:
+        data["timeline"] = timeline.rollup("month")
+        with open(args.plants, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"{args.plants}: timeline updated ({timeline.length} months)")
+
+
+if __name__ == "__main__":
+    main()
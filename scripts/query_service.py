@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Local query service over a Shaveh companies dataset.
+
+The dataset is loaded once and every filterable field gets one bitmap per
+value: a Python int whose bit i is set when company i has that value. A
+query is then pure integer arithmetic in C - OR the bitmaps of the values
+asked for within a field, AND the fields together, and count with
+int.bit_count() - so filter latency grows with the number of fields and
+values in the query, not with a scan over the companies. Group-bys AND the
+result with each value's bitmap of the grouping field.
+
+Query syntax (HTTP query string or --query):
+
+    status=כן&industry=מזון&industry=פיננסים    values of one field are OR-ed
+    paid=true&cohort=1                          fields are AND-ed
+    referralSource=שותף                         either referral source
+    groupBy=industry&groupBy=companySize        counts per value of the result
+    ids=1&limit=50&offset=0                     matching company ids
+
+Endpoints:
+    GET /query?...   {"count", "total", "groups"?, "ids"?}, with an ETag
+    GET /fields      every indexed field with its values and counts
+    GET /search?q=…  full-text search over names, notes and requirements
+                     (search_index, BM25), {"results": [{"id", "score"}]}
+    GET /health      health check
+
+The dataset file is re-read (and the index rebuilt) when it changes on
+disk, e.g. after a save from the dashboard.
+
+Usage:
+    python3 scripts/query_service.py [--data PATH] [--port 3458]
+    python3 scripts/query_service.py --query "status=כן&groupBy=industry"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from generate_v2_json import FUNNEL_FIELDS, OUTPUT_PATH, load_source_companies
+from search_index import build as build_search_index
+
+PORT = 3458
+
+# field -> company keys it reads (referralSource indexes both sources)
+INDEXED_FIELDS = {
+    "status": ("status",),
+    "recruitmentStatus": ("recruitmentStatus",),
+    "industry": ("industry",),
+    "companySize": ("companySize",),
+    "cohort": ("cohort",),
+    "referralSource": ("referralSource1", "referralSource2"),
+    "referralSource1": ("referralSource1",),
+    "referralSource2": ("referralSource2",),
+    **{field: (field,) for field in FUNNEL_FIELDS},
+}
+
+# Query parameters that are not filters
+CONTROL_PARAMS = ("groupBy", "ids", "limit", "offset")
+
+DEFAULT_LIMIT = 100
+
+
+def value_key(value):
+    """Company value -> the string a query names it by."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def positions(mask):
+    """Indices of the set bits of `mask`, lowest first."""
+    bits = format(mask, "b")[::-1]
+    i = bits.find("1")
+    while i != -1:
+        yield i
+        i = bits.find("1", i + 1)
+
+
+class QueryError(ValueError):
+    pass
+
+
+# ── Index ──────────────────────────────────────────────────────────────────────
+class CompanyIndex:
+    """Bitmap per (field, value) over a list of companies."""
+
+    def __init__(self, companies):
+        self.ids = [c.get("id") for c in companies]
+        self.count = len(companies)
+        self.all = (1 << self.count) - 1
+        self.bitmaps = {field: {} for field in INDEXED_FIELDS}
+
+        # Collect bit positions per value first; one int is built per value at the end
+        members = {field: {} for field in INDEXED_FIELDS}
+        for i, company in enumerate(companies):
+            for field, keys in INDEXED_FIELDS.items():
+                values = members[field]
+                for key in dict.fromkeys(value_key(company.get(k)) for k in keys):
+                    values.setdefault(key, []).append(i)
+        for field, values in members.items():
+            for key, rows in values.items():
+                self.bitmaps[field][key] = _bitmap(rows, self.count)
+
+    def select(self, filters):
+        """Bitmap of the companies matching {field: [values]} (OR within, AND across)."""
+        mask = self.all
+        for field, values in filters.items():
+            bitmaps = self.bitmaps.get(field)
+            if bitmaps is None:
+                raise QueryError(f"unknown field {field!r}")
+            union = 0
+            for value in values:
+                union |= bitmaps.get(value, 0)
+            mask &= union
+            if not mask:
+                break
+        return mask
+
+    def group_by(self, field, mask):
+        """{value: count} of `field` within `mask`, values with no match left out."""
+        bitmaps = self.bitmaps.get(field)
+        if bitmaps is None:
+            raise QueryError(f"unknown field {field!r}")
+        groups = {}
+        for value, bitmap in bitmaps.items():
+            n = (bitmap & mask).bit_count()
+            if n:
+                groups[value] = n
+        return groups
+
+    def fields(self):
+        return {field: {value: bitmap.bit_count() for value, bitmap in values.items()}
+                for field, values in self.bitmaps.items()}
+
+    def query(self, params):
+        """Answer a parsed query string ({name: [values]})."""
+        filters = {name: values for name, values in params.items() if name not in CONTROL_PARAMS}
+        mask = self.select(filters)
+        result = {"count": mask.bit_count(), "total": self.count}
+        if "groupBy" in params:
+            result["groups"] = {field: self.group_by(field, mask) for field in params["groupBy"]}
+        if params.get("ids", ["0"])[-1] not in ("0", "false", ""):
+            try:
+                limit = int(params.get("limit", [DEFAULT_LIMIT])[-1])
+                offset = int(params.get("offset", [0])[-1])
+            except ValueError:
+                raise QueryError("limit and offset must be integers") from None
+            ids = []
+            for n, i in enumerate(positions(mask)):
+                if n >= offset + limit:
+                    break
+                if n >= offset:
+                    ids.append(self.ids[i])
+            result["ids"] = ids
+        return result
+
+
+def _bitmap(rows, count):
+    """Int with the bits in `rows` set, built through a bytearray rather than shifting per row."""
+    buf = bytearray((count + 7) // 8)
+    for i in rows:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+# ── Dataset ────────────────────────────────────────────────────────────────────
+class Dataset:
+    """The companies file and its indexes, rebuilt when the file changes on disk."""
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = None
+        self.digest = None
+        self.index = None
+        self.search = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """(index, search index, digest), reloading first if the file changed."""
+        st = os.stat(self.path)
+        stamp = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            if stamp != self.stamp:
+                with open(self.path, "rb") as f:
+                    self.digest = hashlib.sha1(f.read()).hexdigest()
+                companies = load_source_companies(self.path)
+                self.index = CompanyIndex(companies)
+                self.search = build_search_index(companies)
+                self.stamp = stamp
+            return self.index, self.search, self.digest
+
+
+def parse_query(query_string):
+    return parse_qs(query_string, keep_blank_values=True)
+
+
+def etag_for(digest, path, query_string):
+    """Strong ETag over the dataset content and the normalized request."""
+    params = sorted((k, sorted(v)) for k, v in parse_query(query_string).items())
+    payload = json.dumps([digest, path, params], ensure_ascii=False)
+    return '"' + hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def search_results(search, params):
+    try:
+        limit = int(params.get("limit", [DEFAULT_LIMIT])[-1])
+    except ValueError:
+        raise QueryError("limit must be an integer") from None
+    query = " ".join(params.get("q", []))
+    return {"results": [{"id": cid, "score": score} for cid, score in search.search(query, limit)]}
+
+
+# ── HTTP ───────────────────────────────────────────────────────────────────────
+class QueryHandler(BaseHTTPRequestHandler):
+    dataset = None  # set by serve()
+
+    def _send(self, status, body=None, etag=None):
+        self.send_response(status)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "If-None-Match")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if body is None:
+            self.end_headers()
+            return
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_OPTIONS(self):
+        self._send(204)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send(200, {"ok": True})
+            return
+        if url.path not in ("/query", "/fields", "/search"):
+            self._send(404, {"error": "not found"})
+            return
+
+        try:
+            index, search, digest = self.dataset.current()
+        except (OSError, ValueError) as e:
+            self._send(500, {"error": f"cannot load dataset: {e}"})
+            return
+
+        etag = etag_for(digest, url.path, url.query)
+        if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+            self._send(304, etag=etag)
+            return
+        try:
+            if url.path == "/fields":
+                body = index.fields()
+            elif url.path == "/search":
+                body = search_results(search, parse_query(url.query))
+            else:
+                body = index.query(parse_query(url.query))
+        except QueryError as e:
+            self._send(400, {"error": str(e)})
+            return
+        self._send(200, body, etag=etag)
+
+    def log_message(self, format, *args):
+        pass  # one line per request is noise for a local dashboard helper
+
+
+def serve(path, port=PORT):
+    QueryHandler.dataset = Dataset(path)
+    index, _, _ = QueryHandler.dataset.current()
+    server = ThreadingHTTPServer(("127.0.0.1", port), QueryHandler)
+    print(f"\n  Query service running on http://localhost:{port}")
+    print(f"  Dataset: {path} ({index.count} companies)\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bitmap-indexed query service over a companies dataset.")
+    parser.add_argument("--data", default=OUTPUT_PATH, help="companies JSON (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=PORT, help="HTTP port (default: %(default)s)")
+    parser.add_argument("--query", metavar="QUERY_STRING", help="answer one query on stdout instead of serving")
+    args = parser.parse_args(argv)
+
+    if args.query is None:
+        serve(args.data, args.port)
+        return
+    index, _, _ = Dataset(args.data).current()
+    try:
+        result = index.query(parse_query(args.query))
+    except QueryError as e:
+        parser.error(str(e))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
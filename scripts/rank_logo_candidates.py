@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Score the fetched logo candidates and pick the best one per company.
+Run after fetch_logo_candidates.py, which rewrites the manifest unranked.
+
+Each candidate image in src/admin/data/logo_candidates.json is scored on:
+
+  - resolution    size of the logo mark after trimming transparent borders
+  - transparency  transparent background (or at least a plain one)
+  - entropy       colour entropy: penalizes blank tiles and photos
+  - aspect        close to square, like the cell it is drawn in
+  - agreement     perceptual-hash similarity to the company's other sources
+                  (independent sources returning the same mark are likely right)
+
+The weighted score is written to every candidate as `score`, and each
+company entry gets `best` (index into its candidates, or null). The admin
+page preselects the best candidate for companies without a selection.
+
+Images are analysed in a process pool, once per distinct file. Requires Pillow.
+
+Usage:
+    python3 scripts/rank_logo_candidates.py [--jobs N]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from fetch_logo_candidates import CANDIDATES_DIR, MANIFEST_PATH
+from logo_images import Image, load_logo
+
+WEIGHTS = {
+    "resolution": 0.30,
+    "transparency": 0.15,
+    "entropy": 0.15,
+    "aspect": 0.15,
+    "agreement": 0.25,
+}
+
+# Shorter side (px) at which resolution stops adding to the score
+FULL_RESOLUTION = 256
+
+# Colour entropy (bits, over 64 quantized colours) typical of a flat logo
+IDEAL_ENTROPY = 2.5
+
+
+# ── Per-image features (runs in worker processes) ─────────────────────────────
+def dhash(image, size=8):
+    """64-bit difference hash of the logo composited on white."""
+    flat = Image.new("RGBA", image.size, (255, 255, 255, 255))
+    flat.alpha_composite(image)
+    gray = flat.convert("L").resize((size + 1, size), Image.LANCZOS)
+    px = gray.tobytes()
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = px[row * (size + 1) + col]
+            right = px[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def color_entropy(image):
+    small = image.copy()
+    small.thumbnail((64, 64))
+    counts = {}
+    data = small.tobytes()
+    for i in range(0, len(data), 4):
+        r, g, b, a = data[i:i + 4]
+        key = (r >> 6, g >> 6, b >> 6) if a >= 128 else None
+        counts[key] = counts.get(key, 0) + 1
+    total = sum(counts.values())
+    return -sum(n / total * math.log2(n / total) for n in counts.values())
+
+
+def image_features(path):
+    """Per-image scores in [0, 1] plus the perceptual hash, or {"error": reason}."""
+    logo, reason = load_logo(path)
+    if logo is None:
+        return {"error": reason}
+    width, height = logo.size
+
+    alpha_min = logo.getchannel("A").getextrema()[0]
+    if alpha_min < 255:
+        transparency = 1.0
+    else:
+        corners = {logo.getpixel(xy) for xy in ((0, 0), (width - 1, 0), (0, height - 1), (width - 1, height - 1))}
+        transparency = 0.6 if len(corners) == 1 else 0.2
+
+    entropy = color_entropy(logo)
+    return {
+        "resolution": min(1.0, min(width, height) / FULL_RESOLUTION) ** 0.5,
+        "transparency": transparency,
+        "entropy": max(0.0, 1 - abs(entropy - IDEAL_ENTROPY) / 3.5),
+        "aspect": min(width, height) / max(width, height),
+        "hash": dhash(logo),
+    }
+
+
+# ── Ranking ────────────────────────────────────────────────────────────────────
+def hash_similarity(a, b):
+    return 1 - bin(a ^ b).count("1") / 64
+
+
+def score_company(features):
+    """Scores for one company's candidates (None where the image is unusable)."""
+    scores = []
+    for i, f in enumerate(features):
+        if "error" in f:
+            scores.append(None)
+            continue
+        others = [g["hash"] for j, g in enumerate(features) if j != i and "error" not in g]
+        agreement = max((hash_similarity(f["hash"], h) for h in others), default=0.0)
+        parts = dict(f, agreement=agreement)
+        scores.append(round(sum(WEIGHTS[k] * parts[k] for k in WEIGHTS), 3))
+    return scores
+
+
+def candidate_path(company_id, filename):
+    return os.path.normpath(os.path.join(CANDIDATES_DIR, company_id, filename))
+
+
+def rank_manifest(manifest, jobs=None):
+    """Add `score` to every candidate and `best` to every company, in place.
+
+    Returns {path: error} for candidates that could not be analysed.
+    """
+    paths = sorted({candidate_path(cid, c["filename"])
+                    for cid, entry in manifest.items() for c in entry["candidates"]})
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        features = dict(zip(paths, executor.map(image_features, paths, chunksize=8)))
+
+    for cid, entry in manifest.items():
+        candidates = entry["candidates"]
+        scores = score_company([features[candidate_path(cid, c["filename"])] for c in candidates])
+        for candidate, score in zip(candidates, scores):
+            candidate["score"] = score
+        ranked = [i for i, s in enumerate(scores) if s is not None]
+        entry["best"] = max(ranked, key=lambda i: scores[i]) if ranked else None
+    return {p: f["error"] for p, f in features.items() if "error" in f}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score logo candidates and pick the best per company.")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="candidates manifest to update in place")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        sys.exit("rank_logo_candidates.py requires Pillow (pip install Pillow)")
+
+    with open(args.manifest, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    errors = rank_manifest(manifest, jobs=args.jobs)
+
+    tmp_path = args.manifest + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, args.manifest)
+
+    for path, reason in sorted(errors.items()):
+        print(f"  ! {os.path.relpath(path, CANDIDATES_DIR)}: {reason}")
+    picked = sum(1 for entry in manifest.values() if entry["best"] is not None)
+    total = sum(len(entry["candidates"]) for entry in manifest.values())
+    print(f"Ranked {total} candidates: best pick for {picked}/{len(manifest)} companies")
+    print(f"  Manifest: {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
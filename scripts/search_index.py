@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Hebrew full-text index over the companies' names, notes and requirements.
+
+Text is normalized with name_index.normalize (niqqud, geresh / gershayim
+and quotes removed, Latin case-folded), HTML from the rich-text editor is
+dropped, and final letters are folded to their regular forms. Each Hebrew
+word is indexed under its surface form and under the forms left after
+stripping up to three one-letter prefixes (ו ה ב ל מ ש כ) while at least
+MIN_STEM letters remain, so "ולמשרד", "המשרד" and "משרד" all reach the
+same postings. A query word is looked up by the longest of its forms that
+is in the vocabulary, surface form first, so a prefix is only stripped
+from it when the word itself is not indexed ("משרד" never shrinks to
+"רד").
+
+Documents are ranked with BM25 (name matches weigh more than notes). Query
+words whose surface form is not in the vocabulary also go through a
+trigram index over the vocabulary: words containing the query as a substring, or close to it by
+trigram overlap, are scored at a discount. Only postings of the query's
+terms are touched, so a search stays in the milliseconds however many
+long notes there are.
+
+The generator writes the index next to the dataset (companies.search.json);
+the query side rebuilds the trigram map from the stored vocabulary.
+
+Usage:
+    python3 scripts/search_index.py "QUERY" [--index PATH | --data PATH] [--limit N]
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import time
+from collections import Counter, defaultdict
+
+from name_index import normalize, trigrams
+
+# Bump when the tokenizer changes: build caches keep document_terms() per company
+FORMAT = "shaveh-search/2"
+
+# Field -> weight applied to its term frequencies
+FIELDS = {"name": 3.0, "notes": 1.0, "requirements": 1.0}
+
+PREFIX_LETTERS = frozenset("והבלמשכ")
+MAX_PREFIXES = 3
+MIN_STEM = 3
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Partial (trigram) matches count this much of an exact term match
+PARTIAL_WEIGHT = 0.5
+MIN_PARTIAL_SIMILARITY = 0.5
+
+_TAGS = re.compile(r"<[^>]+>")
+_WORDS = re.compile(r"\w+")
+_HEBREW = re.compile(r"[א-ת]")
+_FINALS = str.maketrans("ךםןףץ", "כמנפצ")
+
+
+# ── Tokenizer ──────────────────────────────────────────────────────────────────
+def words(text):
+    """Normalized words of `text`, finals folded, in order."""
+    if not text:
+        return []
+    text = normalize(_TAGS.sub(" ", str(text)))
+    return [w.translate(_FINALS) for w in _WORDS.findall(text)]
+
+
+def stems(word):
+    """`word` and the forms left by stripping Hebrew prefix letters, longest first."""
+    forms = [word]
+    if _HEBREW.match(word):
+        i = 0
+        while i < MAX_PREFIXES and word[i] in PREFIX_LETTERS and len(word) - i - 1 >= MIN_STEM:
+            i += 1
+            forms.append(word[i:])
+    return forms
+
+
+def document_terms(company):
+    """Weighted term frequencies of one company across FIELDS."""
+    tf = Counter()
+    length = 0.0
+    for field, weight in FIELDS.items():
+        for word in words(company.get(field)):
+            length += weight
+            for term in dict.fromkeys(stems(word)):
+                tf[term] += weight
+    return tf, length
+
+
+# ── Building ───────────────────────────────────────────────────────────────────
+class SearchIndexBuilder:
+    """Accumulates companies one at a time; finish() returns the JSON index."""
+
+    def __init__(self):
+        self.ids = []
+        self.lengths = []
+        self.postings = defaultdict(list)     # term -> [doc, tf, doc, tf, ...]
+
+    def add(self, company):
+        self.add_terms(company.get("id"), *document_terms(company))
+
+    def add_terms(self, company_id, tf, length):
+        """Add a company by its document_terms(), e.g. kept from an earlier build."""
+        doc = len(self.ids)
+        self.ids.append(company_id)
+        self.lengths.append(length)
+        for term, freq in tf.items():
+            self.postings[term] += (doc, freq)
+
+    def finish(self):
+        terms = sorted(self.postings)
+        return {
+            "format": FORMAT,
+            "fields": FIELDS,
+            "ids": self.ids,
+            "lengths": self.lengths,
+            "terms": terms,
+            "postings": [self.postings[t] for t in terms],
+        }
+
+
+def build(companies):
+    builder = SearchIndexBuilder()
+    for company in companies:
+        builder.add(company)
+    return SearchIndex(builder.finish())
+
+
+def search_path(json_path):
+    """companies.json -> companies.search.json"""
+    base, ext = os.path.splitext(json_path)
+    return f"{base}.search{ext}"
+
+
+def write_index(path, index_data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(index_data, ensure_ascii=False, separators=(",", ":")))
+    os.replace(tmp_path, path)
+
+
+# ── Querying ───────────────────────────────────────────────────────────────────
+class SearchIndex:
+    """BM25 search over a finished index (SearchIndexBuilder.finish() output)."""
+
+    def __init__(self, data):
+        if data.get("format") != FORMAT:
+            raise ValueError(f"not a {FORMAT} index")
+        self.ids = data["ids"]
+        self.lengths = data["lengths"]
+        self.postings = dict(zip(data["terms"], data["postings"]))
+        count = len(self.ids)
+        avgdl = (sum(self.lengths) / count) if count else 0.0
+        # BM25 length normalization per document, computed once
+        self.norms = [K1 * (1 - B + B * length / (avgdl or 1.0)) for length in self.lengths]
+        self.idf = {
+            term: math.log(1 + (count - len(p) // 2 + 0.5) / (len(p) // 2 + 0.5))
+            for term, p in self.postings.items()
+        }
+        self.grams = defaultdict(set)
+        for term in self.postings:
+            for gram in trigrams(term):
+                self.grams[gram].add(term)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _score_term(self, term, weight, scores):
+        postings = self.postings.get(term)
+        if not postings:
+            return
+        factor = self.idf[term] * weight * (K1 + 1)
+        norms = self.norms
+        it = iter(postings)
+        for doc, tf in zip(it, it):
+            scores[doc] += factor * tf / (tf + norms[doc])
+
+    def partial_terms(self, word):
+        """(term, similarity) for vocabulary terms that contain or resemble `word`."""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            for term in self.grams.get(gram, ()):
+                shared[term] += 1
+        matches = []
+        for term, n in shared.items():
+            if word in term:
+                matches.append((term, len(word) / len(term)))
+                continue
+            similarity = 2 * n / (len(grams) + len(trigrams(term)))
+            if similarity >= MIN_PARTIAL_SIMILARITY:
+                matches.append((term, similarity))
+        return matches
+
+    def search(self, query, limit=20):
+        """[(company id, score)] best first."""
+        scores = defaultdict(float)
+        for word in words(query):
+            if word in self.postings:
+                self._score_term(word, 1.0, scores)
+                continue
+            # Prefixed query words ("למשרד") match their longest indexed stem
+            stem = next((form for form in stems(word)[1:] if form in self.postings), None)
+            if stem is not None:
+                self._score_term(stem, 1.0, scores)
+            partial = {}
+            for form in stems(word):
+                for term, similarity in self.partial_terms(form):
+                    if term != stem and similarity > partial.get(term, 0.0):
+                        partial[term] = similarity
+            for term, similarity in partial.items():
+                self._score_term(term, PARTIAL_WEIGHT * similarity, scores)
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.ids[doc], round(score, 4)) for doc, score in ranked]
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    from generate_v2_json import OUTPUT_PATH, load_source_companies
+
+    parser = argparse.ArgumentParser(description="Search the companies' names, notes and requirements.")
+    parser.add_argument("query", help="search text")
+    parser.add_argument("--index", help="index file (default: <data>.search.json, built from --data if missing)")
+    parser.add_argument("--data", default=OUTPUT_PATH, help="companies JSON (default: %(default)s)")
+    parser.add_argument("--limit", type=int, default=20, help="results to show (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index_path = args.index or search_path(args.data)
+    if os.path.exists(index_path):
+        index = SearchIndex.load(index_path)
+    else:
+        index = build(load_source_companies(args.data))
+    loaded = time.perf_counter()
+    results = index.search(args.query, args.limit)
+    done = time.perf_counter()
+
+    for company_id, score in results:
+        print(f"  {score:8.3f}  {company_id}")
+    print(f"{len(results)} results (load {1000 * (loaded - start):.1f} ms, "
+          f"search {1000 * (done - loaded):.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
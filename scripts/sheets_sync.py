@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Diff-based sync of worksheet tabs into a Google Spreadsheet.
+
+The current state is read once (sheet metadata plus one batched values
+read), compared cell by cell against the desired tabs, and every change -
+new, renamed, resized or removed worksheets, header formatting, RTL,
+frozen header rows and changed cells - goes out in a single batch_update.
+An export that changes nothing makes no writes at all.
+
+Values are written typed (numbers as numbers, text as text) and read back
+with UNFORMATTED_VALUE, so an unchanged cell always compares equal.
+
+FakeSpreadsheet implements the same three calls in memory (optionally
+persisted to a JSON file) for running the exporter without Google access.
+"""
+
+import copy
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+HEADER_FORMAT = {
+    "textFormat": {"bold": True},
+    "backgroundColor": {"red": 0.85, "green": 0.92, "blue": 1.0},
+}
+
+
+@dataclass
+class Tab:
+    """One worksheet: title and rows (the first row is the header)."""
+    title: str
+    rows: list
+
+    @property
+    def width(self):
+        return max((len(row) for row in self.rows), default=0)
+
+
+@dataclass
+class SyncResult:
+    requests: list
+    changed_cells: dict    # title -> number of cells written or cleared
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+def quote_title(title):
+    """Sheet title as an A1 range ('It''s' style quoting)."""
+    return "'" + title.replace("'", "''") + "'"
+
+
+def unquote_title(range_name):
+    title = range_name.split("!")[0]
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title
+
+
+def _normalize(value):
+    """Empty strings and missing cells are the same thing in a sheet."""
+    return None if value == "" else value
+
+
+def _same(a, b):
+    a, b = _normalize(a), _normalize(b)
+    return a == b and isinstance(a, bool) == isinstance(b, bool)
+
+
+def cell_data(value):
+    value = _normalize(value)
+    if value is None:
+        return {}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+
+def _cell(rows, r, c):
+    if r < len(rows) and c < len(rows[r]):
+        return rows[r][c]
+    return None
+
+
+# ── Planning ───────────────────────────────────────────────────────────────────
+def diff_cells(sheet_id, current, desired):
+    """updateCells requests turning `current` rows into `desired` rows.
+
+    Changed cells are grouped into runs per row, and consecutive rows whose
+    runs span the same columns share one request. Returns (requests, cells).
+    """
+    height = max(len(current), len(desired))
+    width = max((len(row) for row in current + desired), default=0)
+
+    runs = []   # (row, start_col, end_col)
+    for r in range(height):
+        c = 0
+        while c < width:
+            if _same(_cell(current, r, c), _cell(desired, r, c)):
+                c += 1
+                continue
+            start = c
+            while c < width and not _same(_cell(current, r, c), _cell(desired, r, c)):
+                c += 1
+            runs.append((r, start, c))
+
+    requests = []
+    cells = 0
+    i = 0
+    while i < len(runs):
+        row, start, end = runs[i]
+        j = i + 1
+        while j < len(runs) and runs[j][1:] == (start, end) and runs[j][0] == row + (j - i):
+            j += 1
+        block = [[cell_data(_cell(desired, r, c)) for c in range(start, end)] for r, _, _ in runs[i:j]]
+        requests.append({"updateCells": {
+            "start": {"sheetId": sheet_id, "rowIndex": row, "columnIndex": start},
+            "rows": [{"values": values} for values in block],
+            "fields": "userEnteredValue",
+        }})
+        cells += (end - start) * (j - i)
+        i = j
+    return requests, cells
+
+
+def plan_sync(spreadsheet, tabs, rtl=True):
+    """Read the spreadsheet once and return the SyncResult that makes it match `tabs`.
+
+    Worksheets are matched by title; an unmatched existing worksheet is
+    renamed for an unmatched tab before new ones are added, and worksheets
+    that are no longer wanted are deleted.
+    """
+    sheets = [s["properties"] for s in spreadsheet.fetch_sheet_metadata()["sheets"]]
+    by_title = {props["title"]: props for props in sheets}
+    wanted = {tab.title for tab in tabs}
+    spare = [props for props in sheets if props["title"] not in wanted]
+
+    assigned = {}       # tab title -> existing sheet properties
+    for tab in tabs:
+        if tab.title in by_title:
+            assigned[tab.title] = by_title[tab.title]
+        elif spare:
+            assigned[tab.title] = spare.pop(0)
+
+    current_values = {}
+    if assigned:
+        ranges = [quote_title(props["title"]) for props in assigned.values()]
+        response = spreadsheet.values_batch_get(ranges, params={"valueRenderOption": "UNFORMATTED_VALUE"})
+        for tab_title, value_range in zip(assigned, response.get("valueRanges", [])):
+            current_values[tab_title] = value_range.get("values", [])
+
+    structure, formats, values = [], [], []
+    changed_cells = {}
+    next_id = max((props["sheetId"] for props in sheets), default=0) + 1
+
+    for index, tab in enumerate(tabs):
+        need_rows, need_cols = len(tab.rows), tab.width
+        props = assigned.get(tab.title)
+        if props is None:
+            sheet_id, next_id = next_id, next_id + 1
+            structure.append({"addSheet": {"properties": {
+                "sheetId": sheet_id,
+                "title": tab.title,
+                "index": index,
+                "rightToLeft": rtl,
+                "gridProperties": {"rowCount": need_rows, "columnCount": need_cols, "frozenRowCount": 1},
+            }}})
+            header_known = False
+        else:
+            sheet_id = props["sheetId"]
+            grid = props.get("gridProperties", {})
+            update, fields = {"sheetId": sheet_id}, []
+            if props["title"] != tab.title:
+                update["title"] = tab.title
+                fields.append("title")
+            if props.get("index") != index:
+                update["index"] = index
+                fields.append("index")
+            if props.get("rightToLeft", False) != rtl:
+                update["rightToLeft"] = rtl
+                fields.append("rightToLeft")
+            grid_update = {}
+            if grid.get("rowCount", 0) < need_rows:
+                grid_update["rowCount"] = need_rows
+            if grid.get("columnCount", 0) < need_cols:
+                grid_update["columnCount"] = need_cols
+            if grid.get("frozenRowCount", 0) != 1:
+                grid_update["frozenRowCount"] = 1
+            if grid_update:
+                update["gridProperties"] = grid_update
+                fields += [f"gridProperties.{key}" for key in grid_update]
+            if fields:
+                structure.append({"updateSheetProperties": {"properties": update, "fields": ",".join(fields)}})
+            header_known = props["title"] == tab.title
+
+        current = current_values.get(tab.title, [])
+        if not header_known or diff_cells(sheet_id, current[:1], tab.rows[:1])[1]:
+            formats.append({"repeatCell": {
+                "range": {"sheetId": sheet_id, "startRowIndex": 0, "endRowIndex": 1,
+                          "startColumnIndex": 0, "endColumnIndex": need_cols},
+                "cell": {"userEnteredFormat": HEADER_FORMAT},
+                "fields": "userEnteredFormat(textFormat,backgroundColor)",
+            }})
+
+        requests, cells = diff_cells(sheet_id, current, tab.rows)
+        values += requests
+        changed_cells[tab.title] = cells
+
+    deletes = [{"deleteSheet": {"sheetId": props["sheetId"]}} for props in spare]
+    return SyncResult(structure + formats + values + deletes, changed_cells)
+
+
+def sync_tabs(spreadsheet, tabs, rtl=True):
+    """Make `spreadsheet` match `tabs` with at most one batch_update."""
+    result = plan_sync(spreadsheet, tabs, rtl=rtl)
+    if result.requests:
+        spreadsheet.batch_update({"requests": result.requests})
+    return result
+
+
+# ── Local fake backend ─────────────────────────────────────────────────────────
+class FakeSpreadsheet:
+    """In-memory stand-in for gspread.Spreadsheet covering the sync calls.
+
+    State is {"sheets": [{"properties": {...}, "values": [[...]]}]}, loaded
+    from and saved to `path` when one is given. `calls` counts API calls.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.calls = {"fetch_sheet_metadata": 0, "values_batch_get": 0, "batch_update": 0}
+        if self.path and self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        else:
+            self.state = {"sheets": [{"properties": {
+                "sheetId": 0, "title": "Sheet1", "index": 0,
+                "gridProperties": {"rowCount": 1000, "columnCount": 26},
+            }, "values": []}]}
+        self.url = f"file://{self.path.resolve()}" if self.path else "fake://spreadsheet"
+
+    def save(self):
+        if self.path:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+
+    def _sheet(self, sheet_id):
+        for sheet in self.state["sheets"]:
+            if sheet["properties"]["sheetId"] == sheet_id:
+                return sheet
+        raise KeyError(f"no sheet with id {sheet_id}")
+
+    def _reindex(self):
+        for i, sheet in enumerate(self.state["sheets"]):
+            sheet["properties"]["index"] = i
+
+    def fetch_sheet_metadata(self, params=None):
+        self.calls["fetch_sheet_metadata"] += 1
+        return {"sheets": [{"properties": copy.deepcopy(s["properties"])} for s in self.state["sheets"]]}
+
+    def values_batch_get(self, ranges, params=None):
+        self.calls["values_batch_get"] += 1
+        by_title = {s["properties"]["title"]: s for s in self.state["sheets"]}
+        value_ranges = []
+        for range_name in ranges:
+            rows = [list(row) for row in by_title[unquote_title(range_name)]["values"]]
+            # The API omits trailing empty cells and rows
+            for row in rows:
+                while row and row[-1] is None:
+                    row.pop()
+            while rows and not rows[-1]:
+                rows.pop()
+            value_ranges.append({"range": range_name, "values": rows})
+        return {"valueRanges": value_ranges}
+
+    def batch_update(self, body):
+        self.calls["batch_update"] += 1
+        for request in body["requests"]:
+            (kind, args), = request.items()
+            getattr(self, "_" + kind)(args)
+        return {"replies": [{} for _ in body["requests"]]}
+
+    def _addSheet(self, args):
+        props = copy.deepcopy(args["properties"])
+        sheets = self.state["sheets"]
+        sheets.insert(props.get("index", len(sheets)), {"properties": props, "values": []})
+        self._reindex()
+
+    def _deleteSheet(self, args):
+        sheet = self._sheet(args["sheetId"])
+        if len(self.state["sheets"]) == 1:
+            raise ValueError("cannot delete the only sheet")
+        self.state["sheets"].remove(sheet)
+        self._reindex()
+
+    def _updateSheetProperties(self, args):
+        props = args["properties"]
+        sheet = self._sheet(props["sheetId"])
+        for field in args["fields"].split(","):
+            source, target = props, sheet["properties"]
+            *parents, leaf = field.split(".")
+            for key in parents:
+                source = source[key]
+                target = target.setdefault(key, {})
+            target[leaf] = source[leaf]
+        if "index" in props:
+            self.state["sheets"].remove(sheet)
+            self.state["sheets"].insert(props["index"], sheet)
+            self._reindex()
+
+    def _updateCells(self, args):
+        start = args["start"]
+        sheet = self._sheet(start["sheetId"])
+        grid = sheet["properties"]["gridProperties"]
+        values = sheet["values"]
+        for i, row in enumerate(args["rows"]):
+            r = start["rowIndex"] + i
+            for j, cell in enumerate(row["values"]):
+                c = start["columnIndex"] + j
+                if r >= grid["rowCount"] or c >= grid["columnCount"]:
+                    raise ValueError(f"cell ({r}, {c}) is outside the grid")
+                while len(values) <= r:
+                    values.append([])
+                while len(values[r]) <= c:
+                    values[r].append(None)
+                entered = cell.get("userEnteredValue")
+                values[r][c] = next(iter(entered.values())) if entered else None
+
+    def _repeatCell(self, args):
+        sheet = self._sheet(args["range"]["sheetId"])
+        sheet["headerFormat"] = args["cell"]["userEnteredFormat"]
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Round-trip tests for the compact dataset encoding.
+
+Usage:
+    cd scripts && python3 -m unittest test_compact_dataset
+"""
+
+import glob
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from compact_dataset import compact_path, decode, dumps, encode, read_compact, write_compact
+from generate_v2_json import BASE_DIR, OUTPUT_PATH, generate
+
+DATA_DIR = os.path.dirname(OUTPUT_PATH)
+DECODER_JS = os.path.join(BASE_DIR, "src", "shaveh", "compactDataset.js")
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {"companies": data} if isinstance(data, list) else data
+
+
+def source_datasets():
+    return sorted(p for p in glob.glob(os.path.join(DATA_DIR, "companies*.json"))
+                  if not p.endswith(".compact.json"))
+
+
+class RoundTripTest(unittest.TestCase):
+    def assertRoundTrips(self, data):
+        self.assertEqual(decode(json.loads(dumps(encode(data)))), data)
+
+    def test_checked_in_datasets(self):
+        for path in source_datasets():
+            with self.subTest(dataset=os.path.basename(path)):
+                self.assertRoundTrips(load_json(path))
+
+    def test_generated_dataset(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "companies.json")
+            generate(output, search=False)
+            self.assertEqual(read_compact(compact_path(output)), load_json(output))
+
+    def test_column_kinds(self):
+        many = [f"note {i}" for i in range(20)]   # too many distinct values for an enum
+        companies = [
+            {"id": f"c{i}", "paid": i % 2 == 0, "emailSent": [None, True, False][i % 3],
+             "status": ["כן", "לא", None][i % 3], "notes": many[i], "employees": i * 7,
+             "contacts": [{"name": f"n{i}"}] if i % 4 else [],
+             "process": {"learning": {"industryReview": ["done", None][i % 2]}},
+             "nextAction": {}}
+            for i in range(20)
+        ]
+        companies[3]["extra"] = "only here"
+        del companies[5]["employees"]
+        self.assertRoundTrips({"companies": companies, "aggregates": {"total": 20}})
+
+    def test_value_and_object_at_one_path(self):
+        with self.assertRaises(ValueError):
+            encode({"companies": [{"process": "none"}, {"process": {"a": 1}}]})
+
+    def test_dashboard_encoding_is_current(self):
+        path = os.path.join(DATA_DIR, "companies.json")
+        self.assertEqual(read_compact(compact_path(path)), load_json(path))
+
+
+@unittest.skipUnless(shutil.which("node"), "node is not installed")
+class JsDecoderTest(unittest.TestCase):
+    """src/shaveh/compactDataset.js decodes what compact_dataset.py writes."""
+
+    SCRIPT = (
+        "import { readFileSync } from 'fs'\n"
+        "const { decodeCompact } = await import(process.argv[1])\n"
+        "const dataset = JSON.parse(readFileSync(process.argv[2], 'utf8'))\n"
+        "process.stdout.write(JSON.stringify(decodeCompact(dataset)))\n"
+    )
+
+    def test_datasets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for path in source_datasets():
+                with self.subTest(dataset=os.path.basename(path)):
+                    data = load_json(path)
+                    encoded = os.path.join(tmp, "dataset.compact.json")
+                    write_compact(encoded, encode(data))
+                    result = subprocess.run(
+                        ["node", "--input-type=module", "-e", self.SCRIPT, "--",
+                         "file://" + DECODER_JS, encoded],
+                        capture_output=True, text=True, encoding="utf-8", check=True)
+                    self.assertEqual(json.loads(result.stdout), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Conditional requests and negative caching of the logo fetcher, against a
+stub HTTP server on localhost.
+
+Usage:
+    cd scripts && python3 -m unittest test_fetch_logo_candidates
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fetch_logo_candidates import NEGATIVE_TTL, BlobStore, HttpCache, HttpPool, LogoFetcher
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(200)
+LAST_MODIFIED = "Mon, 05 Oct 2026 08:00:00 GMT"
+
+# path -> response headers; a request carrying a matching validator gets a 304
+ROUTES = {
+    "/etag.png": {"ETag": '"v1"', "Cache-Control": "max-age=0"},
+    "/dated.png": {"Last-Modified": LAST_MODIFIED, "Cache-Control": "max-age=0"},
+    "/fresh.png": {"ETag": '"v1"', "Cache-Control": "max-age=3600"},
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        headers = ROUTES.get(self.path)
+        if headers is None:
+            self.reply(404, {}, b"not found")
+            return
+        etag, modified = headers.get("ETag"), headers.get("Last-Modified")
+        if ((etag and self.headers.get("If-None-Match") == etag)
+                or (modified and self.headers.get("If-Modified-Since") == modified)):
+            self.reply(304, headers, b"")
+        else:
+            self.reply(200, headers, PNG)
+
+    def reply(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "_http_cache.json")
+        self.blobs = BlobStore(os.path.join(self.tmp.name, "_blobs"))
+        self.pool = HttpPool(max_connections=2, host_interval=0)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def run_fetch(self, path):
+        """One fetcher run over `path` with the cache index read from and saved to disk."""
+        cache = HttpCache(self.cache_path)
+        blob = LogoFetcher(self.pool, cache, self.blobs).image(self.base + path)
+        cache.save()
+        return blob, cache
+
+    def requests_for(self, path):
+        return [headers for p, headers in self.server.requests if p == path]
+
+    def test_etag_revalidated_with_if_none_match(self):
+        blob, cache = self.run_fetch("/etag.png")
+        self.assertTrue(self.blobs.exists(blob))
+        self.assertEqual(cache.stats["downloaded"], 1)
+
+        again, cache = self.run_fetch("/etag.png")
+        self.assertEqual(again, blob)
+        self.assertEqual(cache.stats["not_modified"], 1)
+        self.assertEqual(cache.stats["downloaded"], 0)
+        first, second = self.requests_for("/etag.png")
+        self.assertNotIn("If-None-Match", first)
+        self.assertEqual(second["If-None-Match"], '"v1"')
+
+    def test_last_modified_revalidated_with_if_modified_since(self):
+        blob, _ = self.run_fetch("/dated.png")
+        again, cache = self.run_fetch("/dated.png")
+        self.assertEqual(again, blob)
+        self.assertEqual(cache.stats["not_modified"], 1)
+        self.assertEqual(self.requests_for("/dated.png")[1]["If-Modified-Since"], LAST_MODIFIED)
+
+    def test_fresh_entry_served_without_a_request(self):
+        blob, _ = self.run_fetch("/fresh.png")
+        again, cache = self.run_fetch("/fresh.png")
+        self.assertEqual(again, blob)
+        self.assertEqual(cache.stats["fresh"], 1)
+        self.assertEqual(len(self.requests_for("/fresh.png")), 1)
+
+    def test_404_remembered_until_its_ttl_expires(self):
+        self.assertIsNone(self.run_fetch("/missing.png")[0])
+        blob, cache = self.run_fetch("/missing.png")
+        self.assertIsNone(blob)
+        self.assertEqual(cache.stats["negative"], 1)
+        self.assertEqual(len(self.requests_for("/missing.png")), 1)
+
+        # Age the negative entry past its TTL: the next run asks again
+        cache.urls[self.base + "/missing.png"]["fetchedAt"] -= NEGATIVE_TTL + 1
+        cache.save()
+        blob, cache = self.run_fetch("/missing.png")
+        self.assertIsNone(blob)
+        self.assertEqual(cache.stats["negative"], 0)
+        self.assertEqual(len(self.requests_for("/missing.png")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Diff sync of tabs into a FakeSpreadsheet.
+
+Usage:
+    cd scripts && python3 -m unittest test_sheets_sync
+"""
+
+import contextlib
+import copy
+import io
+import os
+import tempfile
+import unittest
+
+from export_backends import SheetsBackend
+from sheets_sync import FakeSpreadsheet, Tab, sync_tabs
+
+TABS = [
+    Tab("מפעלים", [["מפעל", "עובדים", "פעיל"], ["ארז", 120, True], ["כפרית", 85, False]]),
+    Tab("סיכום", [["מדד", "ערך"], ["סה\"כ עובדים", 205], ["ממוצע", 102.5]]),
+]
+
+
+def values(sheet, title):
+    for s in sheet.state["sheets"]:
+        if s["properties"]["title"] == title:
+            return s["values"]
+    raise KeyError(title)
+
+
+class SyncTabsTest(unittest.TestCase):
+    def setUp(self):
+        self.sheet = FakeSpreadsheet()
+        self.first = sync_tabs(self.sheet, TABS)
+
+    def test_first_sync_writes_every_tab(self):
+        self.assertEqual(self.sheet.calls["batch_update"], 1)
+        self.assertEqual([s["properties"]["title"] for s in self.sheet.state["sheets"]],
+                         [tab.title for tab in TABS])
+        for tab in TABS:
+            self.assertEqual(values(self.sheet, tab.title), tab.rows)
+        self.assertEqual(self.first.changed_cells, {"מפעלים": 9, "סיכום": 6})
+
+    def test_second_sync_changes_nothing(self):
+        result = sync_tabs(self.sheet, TABS)
+        self.assertEqual(result.requests, [])
+        self.assertEqual(result.changed_cells, {"מפעלים": 0, "סיכום": 0})
+        self.assertEqual(self.sheet.calls, {"fetch_sheet_metadata": 2, "values_batch_get": 2,
+                                            "batch_update": 1})
+
+    def test_edited_cell_is_one_range(self):
+        tabs = copy.deepcopy(TABS)
+        tabs[0].rows[2][1] = 90
+        result = sync_tabs(self.sheet, tabs)
+        self.assertEqual(self.sheet.calls["batch_update"], 2)
+        self.assertEqual(len(result.requests), 1)
+        update = result.requests[0]["updateCells"]
+        self.assertEqual(update["start"]["rowIndex"], 2)
+        self.assertEqual(update["start"]["columnIndex"], 1)
+        self.assertEqual(update["rows"], [{"values": [{"userEnteredValue": {"numberValue": 90}}]}])
+        self.assertEqual(result.changed_cells, {"מפעלים": 1, "סיכום": 0})
+        self.assertEqual(values(self.sheet, "מפעלים"), tabs[0].rows)
+
+    def test_removed_tab_is_deleted(self):
+        result = sync_tabs(self.sheet, TABS[:1])
+        self.assertEqual(result.requests[-1], {"deleteSheet": {"sheetId": 1}})
+        self.assertEqual([s["properties"]["title"] for s in self.sheet.state["sheets"]], ["מפעלים"])
+
+
+class SheetsBackendTest(unittest.TestCase):
+    def test_saved_fake_sheet_stays_up_to_date(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sheet.json")
+            backend = SheetsBackend(lambda: FakeSpreadsheet(path))
+            with contextlib.redirect_stdout(io.StringIO()):
+                first, second = backend.write(TABS), backend.write(TABS)
+            self.assertIn("changes in one batch update", first)
+            self.assertIn("already up to date", second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Validate a Shaveh companies dataset.
+
+The schema below is compiled once into a flat tuple of small check
+functions (one per field, plus the cross-field invariants), which are then
+run over every company in a single pass. Nothing stops at the first
+problem: every violation is collected, so one run reports them all.
+
+Violations are errors (the dashboard or the aggregates would misread the
+record: wrong types, unknown statuses, missing fields, duplicate ids, stale
+aggregates) or warnings (the record is readable but inconsistent: a funnel
+flag set without the one before it, a recruitmentStatus that differs from
+the one the flags imply, a step state the generator does not produce, an
+aggregate section an older generator did not write).
+Records edited in the dashboard and saved by companies-save-server.mjs
+routinely carry warnings.
+
+Usage:
+    python3 scripts/validate_companies.py [FILE.json ...] [--strict] [--quiet]
+    python3 scripts/validate_companies.py --json - < companies.json   # what the save server runs
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from generate_v2_json import (
+    FUNNEL_FIELDS,
+    OUTPUT_PATH,
+    PHASE_DEFS,
+    RECORD_FIELDS,
+    RECRUITMENT_LABELS,
+    STATUSES,
+    STEP_STATES,
+    build_aggregates,
+    get_recruitment_status,
+)
+
+ERROR = "error"
+WARNING = "warning"
+
+# recruitmentStatus values set by hand in the dashboard's edit form
+# (src/shaveh/App.jsx) on top of the ones get_recruitment_status derives
+MANUAL_RECRUITMENT_STATUSES = ("הצטרפו, טרם שילמו",)
+
+NULLABLE = type(None)
+
+# field -> accepted value types
+FIELD_TYPES = {
+    "id": (str,),
+    "name": (str,),
+    "companySize": (str, NULLABLE),
+    "industry": (str, NULLABLE),
+    "referralSource1": (str, NULLABLE),
+    "referralSource2": (str, NULLABLE),
+    "cohort": (int, NULLABLE),
+    "emailSent": (bool,),
+    "meetingHeld": (bool,),
+    "agreementSent": (bool,),
+    "agreementSigned": (bool,),
+    "paid": (bool,),
+    "status": (str,),
+    "recruitmentStatus": (str,),
+    "notes": (str, NULLABLE),
+    "requirements": (str, NULLABLE),
+    "process": (dict,),
+    "outcomes": (dict,),
+    "community": (dict,),
+    "contacts": (list,),
+    "interactions": (list,),
+    "nextAction": (str, NULLABLE),
+}
+
+
+@dataclass(frozen=True)
+class Violation:
+    level: str
+    index: Optional[int]      # None for dataset-level problems
+    company_id: object
+    field: str
+    message: str
+
+    def __str__(self):
+        if self.index is None:
+            where = "dataset"
+        else:
+            where = f"#{self.index}" if self.company_id is None else f"{self.company_id}"
+        return f"{self.level}: {where}.{self.field}: {self.message}"
+
+
+# ── Compiled checks ────────────────────────────────────────────────────────────
+# Each check is fn(company, emit) and calls emit(level, field, message) per problem.
+
+def _type_check(field, types):
+    names = "/".join("null" if t is NULLABLE else t.__name__ for t in types)
+    required = field in RECORD_FIELDS
+
+    def check(c, emit):
+        if field not in c:
+            if required:
+                emit(ERROR, field, "missing")
+            return
+        # Exact type match, so True is not accepted where an int is expected
+        if type(c[field]) not in types:
+            emit(ERROR, field, f"expected {names}, got {c[field]!r}")
+    return check
+
+
+def _enum_check(field, allowed, level=ERROR):
+    allowed = frozenset(allowed)
+
+    def check(c, emit):
+        value = c.get(field)
+        if isinstance(value, str) and value not in allowed:
+            emit(level, field, f"unknown value {value!r}")
+    return check
+
+
+def _process_check():
+    phases = tuple((name, tuple(keys)) for name, _, keys in PHASE_DEFS)
+    states = frozenset(STEP_STATES)
+
+    def check(c, emit):
+        process = c.get("process")
+        if not isinstance(process, dict):
+            return
+        for phase_name, keys in phases:
+            phase = process.get(phase_name)
+            if not isinstance(phase, dict):
+                emit(ERROR, f"process.{phase_name}", "missing")
+                continue
+            for key in keys:
+                if key not in phase:
+                    emit(ERROR, f"process.{phase_name}.{key}", "missing")
+                elif phase[key] not in states:
+                    emit(WARNING, f"process.{phase_name}.{key}",
+                         f"step state {phase[key]!r} is counted as unknown in the aggregates")
+    return check
+
+
+def _community_check():
+    def check(c, emit):
+        community = c.get("community")
+        if not isinstance(community, dict):
+            return
+        for key, value in community.items():
+            if value is not None and type(value) is not bool:
+                emit(ERROR, f"community.{key}", f"expected bool/null, got {value!r}")
+    return check
+
+
+def _funnel_order_check():
+    pairs = tuple(zip(FUNNEL_FIELDS[1:], FUNNEL_FIELDS))
+
+    def check(c, emit):
+        for later, earlier in pairs:
+            if c.get(later) is True and c.get(earlier) is False:
+                emit(WARNING, later, f"set without {earlier}")
+    return check
+
+
+def _recruitment_status_check():
+    def check(c, emit):
+        flags = [c.get(field) for field in FUNNEL_FIELDS]
+        if not isinstance(c.get("status"), str) or any(type(f) is not bool for f in flags):
+            return  # already reported as a type error
+        expected = get_recruitment_status(c["status"], *flags)
+        if c.get("recruitmentStatus") != expected:
+            emit(WARNING, "recruitmentStatus",
+                 f"{c.get('recruitmentStatus')!r}, but status and flags imply {expected!r}")
+    return check
+
+
+def compile_checks():
+    checks = [_type_check(field, types) for field, types in FIELD_TYPES.items()]
+    checks += [
+        _enum_check("status", STATUSES),
+        _enum_check("recruitmentStatus", RECRUITMENT_LABELS + MANUAL_RECRUITMENT_STATUSES),
+        _process_check(),
+        _community_check(),
+        _funnel_order_check(),
+        _recruitment_status_check(),
+    ]
+    return tuple(checks)
+
+
+# ── Validator ──────────────────────────────────────────────────────────────────
+class CompanyValidator:
+    """Collects violations record by record, in one pass.
+
+    Usable on a stream (generate_v2_json feeds it each record as it is
+    built) or on a whole dataset through validate().
+    """
+
+    _compiled = None
+
+    def __init__(self):
+        if CompanyValidator._compiled is None:
+            CompanyValidator._compiled = compile_checks()
+        self.checks = CompanyValidator._compiled
+        self.violations = []
+        self.count = 0
+        self._seen = {}
+
+    def check(self, company):
+        index = self.count
+        self.count += 1
+        if not isinstance(company, dict):
+            self.violations.append(Violation(ERROR, index, None, "", "record is not an object"))
+            return
+        company_id = company.get("id")
+
+        def emit(level, field, message):
+            self.violations.append(Violation(level, index, company_id, field, message))
+
+        for check in self.checks:
+            check(company, emit)
+        if isinstance(company_id, str):
+            first = self._seen.setdefault(company_id, index)
+            if first != index:
+                emit(ERROR, "id", f"duplicate of record #{first}")
+
+    def check_aggregates(self, companies, aggregates):
+        """Compare a stored aggregates block with the one the companies produce."""
+        if aggregates is None:
+            self.violations.append(Violation(WARNING, None, None, "aggregates", "no aggregates block"))
+            return
+        if self.errors:
+            return  # the aggregates cannot be recomputed from broken records
+        expected = build_aggregates(companies)
+        for name, value in expected.items():
+            if name not in aggregates:
+                # Written by an older generator; the dashboard computes what it lacks
+                self.violations.append(Violation(WARNING, None, None, f"aggregates.{name}", "missing"))
+            elif aggregates[name] != value:
+                self.violations.append(Violation(ERROR, None, None, f"aggregates.{name}", "out of date"))
+
+    @property
+    def errors(self):
+        return [v for v in self.violations if v.level == ERROR]
+
+    @property
+    def warnings(self):
+        return [v for v in self.violations if v.level == WARNING]
+
+
+def validate(data):
+    """All violations in a dataset ({"companies", "aggregates"} or a bare list)."""
+    validator = CompanyValidator()
+    companies = data if isinstance(data, list) else data.get("companies")
+    if not isinstance(companies, list):
+        validator.violations.append(Violation(ERROR, None, None, "companies", "missing or not a list"))
+        return validator.violations
+    for company in companies:
+        validator.check(company)
+    validator.check_aggregates(companies, None if isinstance(data, list) else data.get("aggregates"))
+    return validator.violations
+
+
+def validate_file(path):
+    """validate() on a JSON file; "-" reads standard input."""
+    if path == "-":
+        return validate(json.load(sys.stdin))
+    with open(path, "r", encoding="utf-8") as f:
+        return validate(json.load(f))
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate companies datasets.")
+    parser.add_argument("files", nargs="*", default=[OUTPUT_PATH], help="datasets (default: %(default)s)")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings as well as errors")
+    parser.add_argument("--quiet", action="store_true", help="print only the per-file summary")
+    parser.add_argument("--json", action="store_true",
+                        help='print {"errors": [...], "warnings": [...]} per file instead of text')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for path in args.files:
+        start = time.perf_counter()
+        try:
+            violations = validate_file(path)
+        except (OSError, ValueError) as e:
+            violations = [Violation(ERROR, None, None, "", f"cannot read: {e}")]
+        elapsed = (time.perf_counter() - start) * 1000
+
+        errors = sum(v.level == ERROR for v in violations)
+        warnings = len(violations) - errors
+        failed = failed or errors > 0 or (args.strict and warnings > 0)
+        if args.json:
+            print(json.dumps({
+                "file": path,
+                "errors": [str(v) for v in violations if v.level == ERROR],
+                "warnings": [str(v) for v in violations if v.level == WARNING],
+            }, ensure_ascii=False))
+            continue
+        if not args.quiet:
+            for v in violations:
+                print(f"  {v}")
+        print(f"{path}: {errors} errors, {warnings} warnings ({elapsed:.1f} ms)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
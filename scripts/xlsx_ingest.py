@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Read per-plant employee, CEO and HR data from the raw XLSX reports.
+
+Both reports (the Bituach Leumi workshop report and the Joint tender table)
+are streamed with openpyxl's read-only mode, one row at a time, so memory
+stays flat however large the workbooks get. In every worksheet the first
+row that names a factory column and at least one data column is taken as
+the header; rows below it become records until the next blank row.
+
+Factory names are matched to plant ids through name_index (whitespace,
+quote marks, niqqud, a trailing בע"מ and small spelling differences are
+tolerated), and
+the result is an {plant_id: {"employees", "ceo_name", "hr_name"}} table.
+
+Parsed tables are cached per file, keyed by mtime and size and, when those
+change, by content hash, so repeated exports skip re-parsing. When a file
+or openpyxl is missing, the hand-copied tables passed in as the fallback are
+used for everything the reports don't provide.
+
+Usage:
+    python3 scripts/xlsx_ingest.py [FILE.xlsx ...]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from name_index import NameIndex, normalize
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # openpyxl is optional; the hand-copied tables are the fallback
+    load_workbook = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CACHE_PATH = BASE_DIR / ".xlsx-ingest-cache.json"
+
+# Bump when the parsed record layout changes
+INGEST_VERSION = 1
+
+# Output field -> header labels that mean it (compared after name_index.normalize)
+COLUMN_ALIASES = {
+    "name": ("שם מפעל", "מפעל", "שם המפעל", "מפעלים"),
+    "employees": ("מספר עובדים", "מס עובדים", "עובדים", "כמות עובדים", "סהכ עובדים"),
+    "ceo_name": ("שם מנכל", "מנכל", "שם המנכל"),
+    "hr_name": ("שם מנהלת משא", "שם מנהל משא", "מנהלת משא", "מנהל משא", "משא"),
+}
+
+# Below this similarity a name is reported as unmatched instead of guessed
+MIN_SIMILARITY = 0.75
+
+
+# ── Names ──────────────────────────────────────────────────────────────────────
+def plant_index(plants):
+    """NameIndex over every plant's display name."""
+    index = NameIndex(min_score=MIN_SIMILARITY)
+    for p in plants:
+        index.add(p["name"], p["id"])
+    return index
+
+
+def match_plant(index, plant_ids, name):
+    """Plant id for `name`: a plant id as is, else the display name it matches.
+
+    Ids are compared verbatim, never through the name normalization, which
+    would fold ids that differ only in "_" or "-" into one.
+    """
+    if name in plant_ids:
+        return name
+    return index.get(name, record=True)
+
+
+# ── Streaming reader ───────────────────────────────────────────────────────────
+def _header_columns(row):
+    """field -> column index if `row` looks like a header, else None."""
+    labels = [normalize(v) if isinstance(v, str) else "" for v in row]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in labels:
+                columns[field] = labels.index(alias)
+                break
+    if "name" in columns and len(columns) > 1:
+        return columns
+    return None
+
+
+def _as_int(value):
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        digits = re.sub(r"[^\d]", "", value)
+        return int(digits) if digits else 0
+    return 0
+
+
+def read_records(path):
+    """Yield {"name", "employees"?, "ceo_name"?, "hr_name"?} rows from every worksheet."""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            columns = None
+            for row in ws.iter_rows(values_only=True):
+                if columns is None:
+                    columns = _header_columns(row)
+                    continue
+                if not any(v not in (None, "") for v in row):
+                    columns = None          # a blank row ends the table
+                    continue
+                name = row[columns["name"]] if columns["name"] < len(row) else None
+                if not isinstance(name, str) or not name.strip():
+                    continue
+                record = {"name": name.strip()}
+                for field, col in columns.items():
+                    if field == "name" or col >= len(row) or row[col] in (None, ""):
+                        continue
+                    record[field] = _as_int(row[col]) if field == "employees" else str(row[col]).strip()
+                yield record
+    finally:
+        wb.close()
+
+
+# ── Cache ──────────────────────────────────────────────────────────────────────
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if cache.get("version") == INGEST_VERSION else {"version": INGEST_VERSION, "files": {}}
+    except (OSError, ValueError):
+        return {"version": INGEST_VERSION, "files": {}}
+
+
+def cached_records(path, cache):
+    """Records of one workbook, re-parsed only when its content changed."""
+    stat = os.stat(path)
+    entry = cache["files"].get(str(path))
+    if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+        return entry["records"]
+    digest = _file_digest(path)
+    if entry and entry["sha256"] == digest:
+        records = entry["records"]
+    else:
+        records = list(read_records(path))
+    cache["files"][str(path)] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": digest,
+                                 "records": records}
+    return records
+
+
+# ── Lookup table ───────────────────────────────────────────────────────────────
+def build_factory_table(plants, paths, fallback=None, cache_path=CACHE_PATH):
+    """{plant_id: {"employees", "ceo_name", "hr_name"}} for every plant.
+
+    `fallback` is a hand-copied {factory name: {...}} table; the reports'
+    values take precedence over it. Returns (table, report) where report
+    lists the sources read and the names that matched no plant.
+    """
+    index = plant_index(plants)
+    table = {p["id"]: {"employees": 0, "ceo_name": "", "hr_name": ""} for p in plants}
+    report = {"read": [], "skipped": [], "unmatched": []}
+
+    for name, extra in (fallback or {}).items():
+        plant_id = match_plant(index, table, name)
+        if plant_id is not None:
+            table[plant_id].update(extra)
+
+    usable = [Path(p) for p in paths if Path(p).exists()]
+    report["skipped"] = [str(p) for p in paths if not Path(p).exists()]
+    if usable and load_workbook is None:
+        report["skipped"] += [str(p) for p in usable]
+        usable = []
+
+    if usable:
+        cache = _load_cache(cache_path)
+        for path in usable:
+            for record in cached_records(path, cache):
+                plant_id = match_plant(index, table, record["name"])
+                if plant_id is None:
+                    continue
+                row = table[plant_id]
+                for field in ("employees", "ceo_name", "hr_name"):
+                    if record.get(field):
+                        row[field] = record[field]
+            report["read"].append(str(path))
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+
+    report["unmatched"] = index.report()
+    return table, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest plant employee data from the XLSX reports.")
+    parser.add_argument("files", nargs="*", type=Path, help="workbooks (default: the two raw reports)")
+    args = parser.parse_args(argv)
+
+    from export_to_sheets import FACTORY_EXTRA, XLSX_BITUACH, XLSX_JOINT
+    from plants_metrics import PLANTS_JSON
+
+    with open(PLANTS_JSON, "r", encoding="utf-8") as f:
+        plants = json.load(f)["plants"]
+    table, report = build_factory_table(plants, args.files or [XLSX_BITUACH, XLSX_JOINT], FACTORY_EXTRA)
+
+    for path in report["read"]:
+        print(f"  read     {path}")
+    for path in report["skipped"]:
+        print(f"  skipped  {path}")
+    for line in report["unmatched"]:
+        print(f"  ! no plant matches {line}")
+    print(json.dumps(table, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -95,6 +95,22 @@ export default function App() {
     })
   }, [])
 
+  // Select the ranked best candidate (scripts/rank_logo_candidates.py) for
+  // every company that has no selection and no saved logo yet
+  const handlePickBest = useCallback(() => {
+    setSelections(prev => {
+      const next = { ...prev }
+      for (const company of allCompanies) {
+        const entry = logoCandidatesData[company.id]
+        if (next[company.id] || savedLogos[company.id] || entry?.best == null) continue
+        const best = entry.candidates[entry.best]
+        next[company.id] = { filename: best.filename, source: best.source }
+      }
+      saveSelectionsLocal(next)
+      return next
+    })
+  }, [allCompanies, savedLogos])
+
   const handleManualUpload = useCallback((companyId, file, directUrl) => {
     if (file) {
       const reader = new FileReader()
@@ -230,6 +246,13 @@ export default function App() {
             className="flex-1 bg-white border border-gray-200 rounded-lg px-4 py-2 text-sm focus:outline-none focus:border-blue-400 focus:ring-1 focus:ring-blue-200"
           />
           <div className="flex gap-1">
+            <button
+              onClick={handlePickBest}
+              className="px-3 py-2 rounded-lg text-sm font-medium bg-white text-gray-600 hover:bg-gray-100 transition-colors"
+              title="Select the highest-scoring candidate for every company without a selection"
+            >
+              Pick best
+            </button>
             {[
               { key: 'all', label: `All (${allCompanies.length})` },
               { key: 'saved', label: `Saved (${savedCount})` },
@@ -338,10 +361,12 @@ function CompanyLogoCard({ company, candidates, selection, isSaved, isSaving, ma
 
   // Build all displayable candidates
   const allCandidates = [
-    ...candidateList.map(c => ({
+    ...candidateList.map((c, i) => ({
       src: `${BASE}logos/candidates/${company.id}/${c.filename}`,
       filename: c.filename,
       source: c.source,
+      score: c.score,
+      badge: i === candidates.best ? 'best' : undefined,
       key: `${c.source}_${c.filename}`,
     })),
     ...fetchedImages.map((w, i) => ({
@@ -459,7 +484,7 @@ function CompanyLogoCard({ company, candidates, selection, isSaved, isSaving, ma
                   ? 'border-blue-500 ring-2 ring-blue-200 scale-105'
                   : 'border-gray-200 hover:border-blue-300'
               }`}
-              title={`${cand.badge || cand.source} — click to ${isSel ? 'deselect' : 'select'}`}
+              title={`${cand.badge === 'search' ? 'search' : cand.source}${cand.score != null ? ` (score ${cand.score})` : ''} — click to ${isSel ? 'deselect' : 'select'}`}
             >
               <img
                 src={cand.src}
@@ -472,8 +497,8 @@ function CompanyLogoCard({ company, candidates, selection, isSaved, isSaving, ma
                 }}
               />
               {cand.badge && (
-                <span className="absolute bottom-0 left-0 right-0 bg-blue-600/80 text-white text-[8px] text-center leading-tight py-px">
-                  search
+                <span className={`absolute bottom-0 left-0 right-0 ${cand.badge === 'best' ? 'bg-green-600/80' : 'bg-blue-600/80'} text-white text-[8px] text-center leading-tight py-px`}>
+                  {cand.badge}
                 </span>
               )}
             </button>
@@ -12,13 +12,15 @@ const MILESTONES = {
 }
 
 export default function TimelineChart({ timeline }) {
-  // Build sorted list of all months Dec 2023 → Nov 2025
+  // Every month from the first to the last timeline entry (gaps shown as 0)
+  const keys = Object.keys(timeline).sort()
   const allMonths = []
-  for (let y = 2023; y <= 2025; y++) {
-    const startM = y === 2023 ? 12 : 1
-    const endM = y === 2025 ? 11 : 12
-    for (let m = startM; m <= endM; m++) {
+  if (keys.length) {
+    let [y, m] = keys[0].split('-').map(Number)
+    const [endY, endM] = keys[keys.length - 1].split('-').map(Number)
+    while (y < endY || (y === endY && m <= endM)) {
       allMonths.push(`${y}-${String(m).padStart(2, '0')}`)
+      if (++m > 12) { m = 1; y++ }
     }
   }
 
@@ -1,7 +1,8 @@
 import { useState, useMemo, useCallback, useEffect, useRef } from 'react'
 import { motion, AnimatePresence } from 'framer-motion'
 import { BarChart3, RefreshCw, Building2, LayoutGrid, Pencil, Save, X, Eye, ChevronDown, Mail, FileDown, List, Columns3 } from 'lucide-react'
-import data from './data/companies.json'
+import compactData from './data/companies.compact.json'
+import logoSprite from './data/logo_sprite.json'
 import ThemeContext from './ThemeContext'
 import RichTextEditor from './components/RichTextEditor'
 import StepStatusPicker from './components/StepStatusPicker'
@@ -32,12 +33,36 @@ import CohortAnalysis from './components/CohortAnalysis'
 import CRMKanban from './components/CRMKanban'
 import CRMTable from './components/CRMTable'
 import CRMCard from './components/CRMCard'
+import { decodeCompact } from './compactDataset'
 
 const BASE = import.meta.env.BASE_URL
 
+// companies.json in the compact encoding written by scripts/compact_dataset.py
+const data = decodeCompact(compactData)
+
+// Logos packed by scripts/logo_images.py: one sheet request for the whole page
 export function CompanyLogo({ companyId, size = 32, className = '' }) {
   const [hidden, setHidden] = useState(false)
   if (hidden) return null
+  const cell = logoSprite.logos[companyId]
+  if (cell !== undefined) {
+    const col = cell % logoSprite.columns
+    const row = Math.floor(cell / logoSprite.columns)
+    return (
+      <span
+        role="img"
+        aria-hidden="true"
+        className={`inline-block rounded-lg shrink-0 ${className}`}
+        style={{
+          width: size,
+          height: size,
+          backgroundImage: `url(${BASE}${logoSprite.image})`,
+          backgroundSize: `${logoSprite.columns * size}px ${logoSprite.rows * size}px`,
+          backgroundPosition: `-${col * size}px -${row * size}px`,
+        }}
+      />
+    )
+  }
   return (
     <img
       src={`${BASE}logos/${companyId}.png`}
@@ -598,11 +623,17 @@ export default function App({ role = 'guest' }) {
         {/* ── Section 6b: Community Timeline + Cohort Analysis ── */}
         <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
           <CommunityTimeline companies={filteredTab2} />
-          <CohortAnalysis companies={filteredTab2} />
+          <CohortAnalysis
+            companies={filteredTab2}
+            matrix={!tab2HasFilters && companies === data.companies ? data.aggregates?.cohortPhases : null}
+          />
         </div>
 
         {/* ── Section 7: Process Tracker (23 steps) ── */}
-        <ProcessTracker companies={filteredTab2} />
+        <ProcessTracker
+          companies={filteredTab2}
+          bottlenecks={!tab2HasFilters && companies === data.companies ? data.aggregates?.bottlenecks : null}
+        />
 
         {/* ── Section 8: "They didn't say no" ── */}
         <UndecidedList companies={filteredTab2} onCompanyClick={openDrawer} />
@@ -0,0 +1,58 @@
+// Decoder for the compact dataset written by scripts/compact_dataset.py
+// (format shaveh-compact/1): one column per leaf field, bit-packed booleans
+// and enum codes, other strings as indices into a shared string table.
+
+const FORMAT = 'shaveh-compact/1'
+
+function unpackBits(data, width, count) {
+  const raw = atob(data)
+  const mask = (1 << width) - 1
+  const codes = new Array(count)
+  for (let i = 0, pos = 0; i < count; i++, pos += width) {
+    const byte = pos >> 3
+    const shift = pos & 7
+    let value = raw.charCodeAt(byte)
+    if (shift + width > 8) value |= raw.charCodeAt(byte + 1) << 8
+    codes[i] = (value >> shift) & mask
+  }
+  return codes
+}
+
+function columnValues(column, count, strings) {
+  const { kind, data } = column
+  if (kind === 'bool') return unpackBits(data, 1, count).map(code => code === 1)
+  if (kind === 'tri') return unpackBits(data, 2, count).map(code => (code === 0 ? null : code === 2))
+  if (kind === 'enum') {
+    const labels = [null, ...column.labels]
+    return unpackBits(data, 4, count).map(code => labels[code])
+  }
+  if (kind === 'str') return data.map(i => (i < 0 ? null : strings[i]))
+  return data
+}
+
+// { format, count, strings, columns, aggregates } -> { companies, aggregates }
+export function decodeCompact(dataset) {
+  if (dataset.format !== FORMAT) throw new Error(`unsupported compact format ${dataset.format}`)
+  const { count, strings } = dataset
+  const records = Array.from({ length: count }, () => ({}))
+
+  for (const column of dataset.columns) {
+    let targets = records
+    if (column.present) {
+      const present = unpackBits(column.present, 1, count)
+      targets = records.filter((_, i) => present[i])
+    }
+    const values = columnValues(column, targets.length, strings)
+    const parents = column.path.slice(0, -1)
+    const leaf = column.path[column.path.length - 1]
+    for (let i = 0; i < targets.length; i++) {
+      let target = targets[i]
+      for (const key of parents) target = target[key] ??= {}
+      target[leaf] = values[i]
+    }
+  }
+
+  const result = { companies: records }
+  if (dataset.aggregates !== undefined) result.aggregates = dataset.aggregates
+  return result
+}
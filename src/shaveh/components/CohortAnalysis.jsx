@@ -34,7 +34,10 @@ const PHASES = [
   },
 ]
 
-export default function CohortAnalysis({ companies }) {
+// `matrix` is the generator's aggregates.cohortPhases (cohort x phase
+// completion, precomputed); it only describes the unfiltered dataset, so
+// the chart computes from `companies` when it is not given.
+function computeMatrix(companies) {
   const yesCompanies = companies.filter(c => c.status === 'כן' && c.cohort)
 
   // Group by cohort
@@ -46,15 +49,12 @@ export default function CohortAnalysis({ companies }) {
   })
 
   // Sorted cohort keys
-  const cohortKeys = Object.keys(cohorts).map(Number).sort()
-  const categories = cohortKeys.map(k => COHORT_LABELS[k] || `מחזור ${k}`)
+  const cohortKeys = Object.keys(cohorts).map(Number).sort((a, b) => a - b)
 
-  // For each phase, compute average completion % per cohort
-  const series = PHASES.map(phase => ({
-    name: phase.label,
-    data: cohortKeys.map(cohortKey => {
-      const group = cohorts[cohortKey]
-      if (!group.length) return 0
+  // For each cohort, average completion % per phase
+  const percent = cohortKeys.map(cohortKey => {
+    const group = cohorts[cohortKey]
+    return PHASES.map(phase => {
       let totalSteps = 0
       let completedSteps = 0
       group.forEach(c => {
@@ -69,8 +69,29 @@ export default function CohortAnalysis({ companies }) {
         })
       })
       return totalSteps > 0 ? Math.round((completedSteps / totalSteps) * 100) : 0
-    }),
-  }))
+    })
+  })
+
+  return {
+    cohorts: cohortKeys,
+    phases: PHASES.map(p => p.name),
+    companies: cohortKeys.map(k => cohorts[k].length),
+    percent,
+  }
+}
+
+export default function CohortAnalysis({ companies, matrix }) {
+  const { cohorts: cohortKeys, phases, companies: counts, percent } = matrix || computeMatrix(companies)
+  const yesCount = counts.reduce((sum, n) => sum + n, 0)
+  const categories = cohortKeys.map(k => COHORT_LABELS[k] || `מחזור ${k}`)
+
+  const series = PHASES.map(phase => {
+    const column = phases.indexOf(phase.name)
+    return {
+      name: phase.label,
+      data: percent.map(row => (column === -1 ? 0 : row[column])),
+    }
+  })
 
   const options = {
     chart: {
@@ -139,7 +160,7 @@ export default function CohortAnalysis({ companies }) {
     <div className="bg-sh-card rounded-card-sh shadow-card p-4 sm:p-6">
       <h2 className="text-lg font-bold text-sh-text mb-1">התקדמות לפי מחזור</h2>
       <p className="text-sm text-sh-text-muted mb-2">
-        אחוז השלמת שלבים לפי שנת הצטרפות ({yesCompanies.length} חברות)
+        אחוז השלמת שלבים לפי שנת הצטרפות ({yesCount} חברות)
       </p>
       <ReactApexChart
         type="bar"
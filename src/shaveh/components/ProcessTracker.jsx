@@ -42,9 +42,32 @@ const PHASES = [
   { name: 'marketing', label: 'שיווק', color: '#e9ab56' },
 ]
 
-export default function ProcessTracker({ companies }) {
+// Companies stuck at each step: a company's frontier is its first step, in
+// phase order, that is not 'כן'. Keys are 'phase.step'.
+function stuckCounts(yesCompanies) {
+  const counts = {}
+  yesCompanies.forEach(c => {
+    for (const phase of PHASES) {
+      const steps = c.process?.[phase.name] || {}
+      const stepKey = Object.keys(steps).find(k => steps[k] !== 'כן')
+      if (stepKey) {
+        const key = `${phase.name}.${stepKey}`
+        counts[key] = (counts[key] || 0) + 1
+        return
+      }
+    }
+  })
+  return counts
+}
+
+// `bottlenecks` is the generator's aggregates.bottlenecks; it only describes
+// the unfiltered dataset, so the counts are computed here when it is not given.
+export default function ProcessTracker({ companies, bottlenecks }) {
   const theme = useTabTheme()
   const yesCompanies = companies.filter(c => c.status === 'כן')
+  const stuck = bottlenecks
+    ? Object.fromEntries(bottlenecks.steps.map((key, i) => [key, bottlenecks.stuck[i]]))
+    : stuckCounts(yesCompanies)
 
   // Aggregate: for each step, count כן / בתהליך / לא across all "כן" companies
   const phaseData = PHASES.map(phase => {
@@ -62,6 +85,7 @@ export default function ProcessTracker({ companies }) {
         return {
           key: stepKey,
           label: STEP_LABELS[stepKey] || stepKey,
+          stuck: stuck[`${phase.name}.${stepKey}`] || 0,
           yes: yesCount,
           inProgress: inProgressCount,
           no: noCount,
@@ -118,6 +142,12 @@ export default function ProcessTracker({ companies }) {
                     <div className="w-10 sm:w-16 text-[10px] sm:text-xs text-sh-text-muted text-left flex-shrink-0">
                       {step.yes}/{step.total}
                     </div>
+                    <div
+                      className="w-5 text-[10px] sm:text-xs font-bold text-sh-pink text-left flex-shrink-0"
+                      title="חברות שנתקעו בשלב זה"
+                    >
+                      {step.stuck > 0 ? step.stuck : ''}
+                    </div>
                   </motion.div>
                 )
               })}
@@ -140,6 +170,10 @@ export default function ProcessTracker({ companies }) {
           <div className="w-3 h-3 rounded-sm bg-sh-bg" />
           <span className="text-xs text-sh-text-muted">טרם התחיל</span>
         </div>
+        <div className="flex items-center gap-1">
+          <span className="text-xs font-bold text-sh-pink">N</span>
+          <span className="text-xs text-sh-text-muted">נתקעו בשלב</span>
+        </div>
       </div>
     </div>
   )
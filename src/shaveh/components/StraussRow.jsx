@@ -1,23 +1,5 @@
-import { useState } from 'react'
 import { motion } from 'framer-motion'
-
-const BASE = import.meta.env.BASE_URL
-
-function StraussLogo({ companyId }) {
-  const [hidden, setHidden] = useState(false)
-  if (hidden) return null
-  return (
-    <img
-      src={`${BASE}logos/${companyId}.png`}
-      alt=""
-      width={32}
-      height={32}
-      className="object-contain rounded-lg shrink-0"
-      onError={() => setHidden(true)}
-      loading="lazy"
-    />
-  )
-}
+import { CompanyLogo } from '../App'
 
 const STRAUSS_IDS = [
   'strauss_sweets',
@@ -75,7 +57,7 @@ export default function StraussRow({ companies }) {
               }`}
             >
               <div className="flex items-center gap-2 mb-1">
-                <StraussLogo companyId={company.id} />
+                <CompanyLogo companyId={company.id} />
                 <div className="text-sm font-bold text-sh-text">
                   {company.name.replace('שטראוס ', '')}
                 </div>